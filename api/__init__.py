@@ -1,12 +1,29 @@
+import os
 from flask import Flask
 from flask_cors import CORS
 # Import the Blueprint from routes
 from .routes import api_bp 
 # Import the DB functions from the new db.py
 from .db import close_connection 
+from .datasets import datasets
 
-def create_app():
-    """Application factory function."""
+PRELOAD_MODES = ('off', 'sync', 'background')
+
+def create_app(preload: str = None, preload_names: list = None):
+    """
+    Application factory function.
+
+    :param preload: How to load the datasets at startup, overriding the
+                    PRELOAD_DATASETS environment variable (default 'off'):
+                    'off' loads each dataset on its first request, 'sync'
+                    loads them before returning, and 'background' loads in
+                    a thread while /api/v1/ready reports 503.
+    :param preload_names: The datasets to preload, overriding the
+                          comma-separated PRELOAD_DATASET_NAMES environment
+                          variable. By default the small and derived
+                          datasets are preloaded but not the full 15-minute
+                          tables (e.g., 'counts_15m'), which must be named.
+    """
     app = Flask(__name__)
 
     CORS(app, origins=[
@@ -27,4 +44,18 @@ def create_app():
     # Register the Blueprint defined in routes.py
     app.register_blueprint(api_bp)
 
-    return app
\ No newline at end of file
+    preload = (preload or os.getenv('PRELOAD_DATASETS', 'off')).lower()
+    if preload not in PRELOAD_MODES:
+        raise ValueError(f"Invalid preload mode: {preload}. Use one of {', '.join(PRELOAD_MODES)}.")
+    app.config['PRELOAD_DATASETS'] = preload
+
+    if preload_names is None and os.getenv('PRELOAD_DATASET_NAMES'):
+        preload_names = [name.strip() for name in os.getenv('PRELOAD_DATASET_NAMES').split(',') if name.strip()]
+    unknown = [name for name in preload_names or () if name not in datasets]
+    if unknown:
+        raise ValueError(f"Unknown datasets to preload: {', '.join(unknown)}.")
+
+    if preload != 'off':
+        datasets.start_preload(background=(preload == 'background'), names=preload_names)
+
+    return app
@@ -0,0 +1,929 @@
+import os
+import json
+import struct
+import threading
+import time
+import zipfile
+import numpy as np
+import pandas as pd
+from contextlib import contextmanager
+from pathlib import Path
+from .serializers import CodedColumn, encode_records
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+except ImportError:
+    pa = None
+    ds = None
+
+PARTITIONED_READS_AVAILABLE = ds is not None
+MAPPED_READS_AVAILABLE = pa is not None
+
+
+def has_current_arrow_copy(file_path: Path, arrow_path: Path) -> bool:
+    """Whether pyarrow is installed and arrow_path is at least as new as file_path."""
+    if not MAPPED_READS_AVAILABLE or not os.path.exists(arrow_path) or not os.path.exists(file_path):
+        return False
+    return os.stat(arrow_path).st_mtime_ns >= os.stat(file_path).st_mtime_ns
+
+
+def load_npz(file_path: Path) -> dict:
+    """
+    Reads the arrays of an .npz archive, memory-mapping those stored
+    uncompressed (as np.savez writes them) instead of copying them, so every
+    worker process shares the page cache's single copy. The file must be
+    replaced, not rewritten in place, while it is mapped.
+    """
+    arrays = {}
+    with zipfile.ZipFile(file_path) as archive, open(file_path, 'rb') as f:
+        for info in archive.infolist():
+            if info.compress_type != zipfile.ZIP_STORED or not info.filename.endswith('.npy'):
+                continue
+            # The member's data follows its local header, whose name and extra field lengths are at bytes 26-30
+            f.seek(info.header_offset + 26)
+            name_length, extra_length = struct.unpack('<HH', f.read(4))
+            f.seek(info.header_offset + 30 + name_length + extra_length)
+
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+            elif version == (2, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+            else:
+                continue
+            if dtype.hasobject or not shape or not np.prod(shape):
+                continue
+            arrays[info.filename[:-len('.npy')]] = np.memmap(
+                file_path, dtype=dtype, mode='r', offset=f.tell(), shape=shape,
+                order='F' if fortran_order else 'C'
+            )
+
+    with np.load(file_path) as npz:
+        for name in npz.files:
+            if name not in arrays:
+                arrays[name] = npz[name]
+    return arrays
+
+
+class TimeSeriesTable():
+    """
+    A dataset held as NumPy column arrays sorted by a timestamp column.
+
+    Date ranges are located with a binary search over the sorted timestamps,
+    and slices share memory with the parent table, so a lookup costs
+    O(log n) regardless of how many rows the dataset holds.
+    """
+
+    def __init__(self, time_col: str, columns: dict):
+        self.time_col = time_col
+        self.columns = columns
+        self.times = columns[time_col]
+        self._key_indexes = {}
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, time_col: str) -> 'TimeSeriesTable':
+        """Builds a table from a DataFrame, sorting its rows by time_col."""
+        times = df[time_col].to_numpy(dtype='datetime64[ns]')
+        # Same order as DataFrame.sort_index(): rows already in time order are
+        # kept as they are, otherwise quicksort decides the order of ties
+        if len(times) and (times[1:] < times[:-1]).any():
+            order = np.argsort(times)
+        else:
+            order = np.arange(len(times))
+        columns = {col: df[col].to_numpy()[order] for col in df.columns}
+        columns[time_col] = times[order]
+        return cls(time_col, columns)
+
+    @classmethod
+    def from_arrow(cls, file_path: Path, time_col: str) -> 'TimeSeriesTable':
+        """
+        Opens an Arrow IPC file written by the ETL's ArrowLoader.df_to_arrow
+        memory-mapped: the columns are NumPy views of the mapped file, so
+        loading reads no data up front and every worker process shares the
+        page cache's single copy. Dictionary-encoded text columns become
+        CodedColumns. Requires pyarrow.
+        """
+        table = pa.ipc.open_file(pa.memory_map(str(file_path))).read_all().combine_chunks()
+        columns = {}
+        for name, column in zip(table.column_names, table.columns):
+            array = column.chunk(0) if column.num_chunks else column.combine_chunks()
+            if pa.types.is_dictionary(array.type) and not array.null_count:
+                columns[name] = CodedColumn(
+                    array.indices.to_numpy(),
+                    array.dictionary.to_numpy(zero_copy_only=False).astype(object)
+                )
+            elif pa.types.is_dictionary(array.type):
+                columns[name] = array.dictionary_decode().to_numpy(zero_copy_only=False)
+            elif array.null_count or not (pa.types.is_primitive(array.type) or pa.types.is_temporal(array.type)):
+                # Decoded (copied) as pd.read_parquet would
+                columns[name] = table.select([name]).to_pandas()[name].to_numpy()
+            else:
+                columns[name] = array.to_numpy(zero_copy_only=False)
+
+        times = np.asarray(columns[time_col], dtype='datetime64[ns]')
+        columns[time_col] = times
+        if len(times) and (times[1:] < times[:-1]).any():
+            # Files not written by df_to_arrow may be unsorted
+            order = np.argsort(times)
+            columns = {col: values[order] for col, values in columns.items()}
+        return cls(time_col, columns)
+
+    @classmethod
+    def from_file(cls, file_path: Path, time_col: str, arrow_path: Path = None) -> 'TimeSeriesTable':
+        """
+        Loads a Parquet file, or maps its Arrow copy at arrow_path instead
+        when pyarrow is installed and the copy is at least as new as the file.
+        """
+        if arrow_path is not None and has_current_arrow_copy(file_path, arrow_path):
+            return cls.from_arrow(arrow_path, time_col)
+        return cls.from_frame(pd.read_parquet(file_path), time_col)
+
+    @classmethod
+    def loader(cls, time_col: str, arrow_path: Path = None):
+        """
+        Returns a DatasetRegistry loader for Parquet files using their Arrow
+        copy at arrow_path (see from_file). Register it with
+        depends_on=[arrow_path] so a new copy reloads the table.
+        """
+        return lambda file_path: cls.from_file(file_path, time_col, arrow_path)
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def bounds(self, start, end) -> tuple:
+        """
+        Returns the (lo, hi) row positions of the rows with start <= time <= end.
+
+        :param start: Inclusive lower bound (anything np.datetime64 accepts).
+        :param end: Inclusive upper bound.
+        """
+        start = np.datetime64(start, 'ns')
+        end = np.datetime64(end, 'ns')
+        lo = int(np.searchsorted(self.times, start, side='left'))
+        hi = int(np.searchsorted(self.times, end, side='right'))
+        return lo, max(lo, hi)
+
+    def slice(self, start, end, key_col: str = None, keys: list = None) -> 'TimeSeriesTable':
+        """
+        Returns a zero-copy view of the rows with start <= time <= end, or
+        with keys, only the rows whose key_col value is one of them (see
+        slice_keys).
+        """
+        if keys is not None:
+            return self.slice_keys(key_col, keys, start, end)
+        lo, hi = self.bounds(start, end)
+        return self.take_range(lo, hi)
+
+    def take_range(self, lo: int, hi: int) -> 'TimeSeriesTable':
+        """Returns a zero-copy view of the rows at positions [lo, hi)."""
+        return TimeSeriesTable(
+            self.time_col,
+            {col: values[lo:hi] for col, values in self.columns.items()}
+        )
+
+    def take(self, positions: np.ndarray) -> 'TimeSeriesTable':
+        """Returns the rows at the given (ascending) positions."""
+        return TimeSeriesTable(
+            self.time_col,
+            {col: values[positions] for col, values in self.columns.items()}
+        )
+
+    def key_index(self, key_col: str) -> 'KeyIndex':
+        """Returns the table's index by key_col, built on first use."""
+        index = self._key_indexes.get(key_col)
+        if index is None:
+            index = self._key_indexes[key_col] = KeyIndex(self, key_col)
+        return index
+
+    def slice_keys(self, key_col: str, keys: list, start, end) -> 'TimeSeriesTable':
+        """
+        Returns the rows with a key_col value in keys and start <= time <= end,
+        in table order, reading only those keys' blocks of the key index.
+        """
+        return self.take(self.key_index(key_col).positions(keys, start, end))
+
+    def to_frame(self, columns: list = None) -> pd.DataFrame:
+        """Materializes the given columns (default: all) as a DataFrame."""
+        columns = columns or list(self.columns)
+        return pd.DataFrame({col: np.asarray(self.columns[col]) for col in columns})
+
+
+class KeyIndex():
+    """
+    Row-offset index of a TimeSeriesTable by a key column (e.g., a location).
+
+    The table's row positions are clustered by key, then time, and each key's
+    rows are a contiguous block of that order, found by its offsets. A query
+    for a few keys binary-searches their blocks' timestamps, so it only
+    touches those keys' rows however many rows the table holds.
+    """
+
+    def __init__(self, table: TimeSeriesTable, key_col: str):
+        codes, keys = pd.factorize(np.asarray(table.columns[key_col]), sort=True)
+        # Stable, so each key's block keeps the table's time order
+        self.order = np.argsort(codes, kind='stable')
+        self.keys = pd.Index(keys)
+        self.offsets = np.searchsorted(codes[self.order], np.arange(len(keys) + 1))
+        self.times = table.times[self.order]
+
+    def positions(self, keys: list, start, end) -> np.ndarray:
+        """
+        Returns the table positions, ascending, of the rows with one of the
+        keys and start <= time <= end. Unknown keys match no rows.
+        """
+        start = np.datetime64(start, 'ns')
+        end = np.datetime64(end, 'ns')
+
+        blocks = []
+        for key in np.unique(self.keys.get_indexer(keys)):
+            if key < 0:
+                continue
+            block_start, block_end = self.offsets[key], self.offsets[key + 1]
+            times = self.times[block_start:block_end]
+            lo = block_start + int(np.searchsorted(times, start, side='left'))
+            hi = block_start + int(np.searchsorted(times, end, side='right'))
+            blocks.append(self.order[lo:max(lo, hi)])
+
+        if not blocks:
+            return np.empty(0, dtype=np.int64)
+        return blocks[0] if len(blocks) == 1 else np.sort(np.concatenate(blocks))
+
+
+class PartitionedTimeSeries():
+    """
+    A month-partitioned Parquet dataset (year=YYYY/month=MM/part-0.parquet),
+    as written by the ETL's df_to_partitioned_parquet, read lazily with
+    pyarrow dataset filters.
+
+    A range query only opens the partitions of the months it covers and only
+    decodes the row groups whose min/max statistics overlap it, so nothing
+    but the requested rows is held in memory. Requires pyarrow; check
+    PARTITIONED_READS_AVAILABLE first.
+    """
+
+    def __init__(self, dataset_dir: Path, time_col: str):
+        self.dataset_dir = dataset_dir
+        self.time_col = time_col
+
+    @classmethod
+    def opener(cls, time_col: str):
+        """Returns a DatasetRegistry loader for datasets partitioned on time_col."""
+        return lambda dataset_dir: cls(dataset_dir, time_col)
+
+    def slice(self, start, end, key_col: str = None, keys: list = None) -> TimeSeriesTable:
+        """
+        Reads the rows with start <= time <= end into a TimeSeriesTable,
+        optionally only those whose key_col value is one of keys.
+        """
+        start = pd.Timestamp(start)
+        end = pd.Timestamp(end)
+
+        # Discovered per query: listing the partitions is cheap and always
+        # reflects the files the ETL last wrote
+        dataset = ds.dataset(
+            self.dataset_dir,
+            format='parquet',
+            partitioning=ds.partitioning(pa.schema([('year', pa.int32()), ('month', pa.int32())]), flavor='hive')
+        )
+        year, month = ds.field('year'), ds.field('month')
+        in_months = (
+            ((year > start.year) | ((year == start.year) & (month >= start.month)))
+            & ((year < end.year) | ((year == end.year) & (month <= end.month)))
+        )
+        time = ds.field(self.time_col)
+        in_range = (time >= pa.scalar(start.to_datetime64())) & (time <= pa.scalar(end.to_datetime64()))
+        if keys is not None:
+            in_range = in_range & ds.field(key_col).isin(keys)
+
+        columns = [name for name in dataset.schema.names if name not in ('year', 'month')]
+        df = dataset.to_table(columns=columns, filter=in_months & in_range).to_pandas()
+        return TimeSeriesTable.from_frame(df, self.time_col)
+
+
+class TimeOfDayProfile():
+    """
+    Cumulative (day, key, 15-minute slot) cube of volume sums and row counts,
+    as written by the ETL's build_time_of_day_profile.
+
+    The average volume per key and time of day over any date range comes from
+    prefix-sum differences, in O(keys x 96) no matter how long the range is.
+    """
+
+    SLOT = np.timedelta64(15, 'm')
+    SLOTS_PER_DAY = 96
+    TIME_BINS = np.array([f"{m // 60:02d}:{m % 60:02d}:00" for m in range(0, 24 * 60, 15)])
+
+    def __init__(self, days: np.ndarray, keys: dict, cum_sum: np.ndarray, cum_count: np.ndarray):
+        self.days = days
+        self.keys = keys
+        self.cum_sum = cum_sum
+        self.cum_count = cum_count
+
+    @classmethod
+    def from_npz(cls, file_path: Path) -> 'TimeOfDayProfile':
+        """Opens a profile, memory-mapping the cubes (see load_npz)."""
+        npz = load_npz(file_path)
+        keys = {col: npz[f'key_{col}'] for col in npz['key_cols']}
+        return cls(npz['days'], keys, npz['cum_sum'], npz['cum_count'])
+
+    def _day_totals(self, cum: np.ndarray, day: int) -> np.ndarray:
+        """Returns the (key, slot) totals of a single day (zeros if it has no data)."""
+        i = int(np.searchsorted(self.days, day))
+        if i < len(self.days) and self.days[i] == day:
+            return cum[i + 1] - cum[i]
+        return np.zeros(cum.shape[1:], dtype=np.int64)
+
+    def _range_totals(self, cum: np.ndarray, first_slot: int, last_slot: int) -> np.ndarray:
+        """Returns the (key, slot) totals between two absolute slot numbers, inclusive."""
+        first_day, first = divmod(first_slot, self.SLOTS_PER_DAY)
+        last_day, last = divmod(last_slot, self.SLOTS_PER_DAY)
+
+        if first_day == last_day:
+            totals = self._day_totals(cum, first_day)
+            totals[:, :first] = 0
+            totals[:, last + 1:] = 0
+            return totals
+
+        # Whole days strictly between the first and last day
+        lo = int(np.searchsorted(self.days, first_day + 1))
+        hi = int(np.searchsorted(self.days, last_day))
+        totals = (cum[hi] - cum[lo]).astype(np.int64)
+        totals[:, first:] += self._day_totals(cum, first_day)[:, first:]
+        totals[:, :last + 1] += self._day_totals(cum, last_day)[:, :last + 1]
+        return totals
+
+    def average(self, start, end, value_name: str) -> pd.DataFrame:
+        """
+        Averages the volume of every row with start <= time <= end per key and
+        time of day, matching a groupby mean over the raw 15-minute rows.
+
+        :param start: Inclusive lower bound (anything np.datetime64 accepts).
+        :param end: Inclusive upper bound.
+        :param value_name: The name of the average column in the result.
+        :return: One row per (key, time_bin) that has data, ordered by key.
+        """
+        epoch = np.datetime64(0, 'ns')
+        slot_ns = self.SLOT.astype('timedelta64[ns]').astype(np.int64)
+        # Round the bounds inwards to the nearest slot boundary
+        first_slot = -(-(np.datetime64(start, 'ns') - epoch).astype(np.int64) // slot_ns)
+        last_slot = (np.datetime64(end, 'ns') - epoch).astype(np.int64) // slot_ns
+
+        if last_slot < first_slot:
+            return pd.DataFrame(columns=[*self.keys, 'time_bin', value_name])
+
+        sums = self._range_totals(self.cum_sum, int(first_slot), int(last_slot))
+        counts = self._range_totals(self.cum_count, int(first_slot), int(last_slot))
+
+        key_idx, slot_idx = np.nonzero(counts)
+        result = {col: values[key_idx] for col, values in self.keys.items()}
+        result['time_bin'] = self.TIME_BINS[slot_idx]
+        result[value_name] = sums[key_idx, slot_idx] / counts[key_idx, slot_idx]
+        return pd.DataFrame(result)
+
+
+class DailyVolumeIndex():
+    """
+    Dense (key, day) matrices of cumulative daily volumes and row counts, as
+    written by the ETL's build_daily_volume_index.
+
+    The mean daily volume per key over any date range is one subtraction of
+    each matrix.
+    """
+
+    def __init__(self, first_day: int, key_col: str, keys: np.ndarray,
+                 cum_volume: np.ndarray, cum_count: np.ndarray):
+        self.first_day = first_day
+        self.key_col = key_col
+        self.keys = keys
+        self.cum_volume = cum_volume
+        self.cum_count = cum_count
+
+    @classmethod
+    def from_npz(cls, file_path: Path) -> 'DailyVolumeIndex':
+        """Opens an index, memory-mapping the matrices (see load_npz)."""
+        npz = load_npz(file_path)
+        return cls(
+            int(npz['first_day']), str(npz['key_col']), npz['keys'],
+            npz['cum_volume'], npz['cum_count']
+        )
+
+    def average(self, start, end, value_name: str) -> pd.DataFrame:
+        """
+        Averages the daily volume of every row with start <= dt <= end per key,
+        matching a groupby mean over the raw daily rows.
+
+        :param start: Inclusive lower bound (anything np.datetime64 accepts).
+        :param end: Inclusive upper bound.
+        :param value_name: The name of the average column in the result.
+        :return: One row per key that has data, ordered by key.
+        """
+        start = np.datetime64(start, 'ns')
+        end = np.datetime64(end, 'ns')
+        # Rows are dated at midnight, so round the bounds inwards to whole days
+        first = start.astype('datetime64[D]')
+        if first < start:
+            first += 1
+        last = end.astype('datetime64[D]')
+
+        n_days = self.cum_volume.shape[1] - 1
+        lo = min(max(int(first.astype(np.int64)) - self.first_day, 0), n_days)
+        hi = min(max(int(last.astype(np.int64)) - self.first_day + 1, 0), n_days)
+
+        if hi <= lo:
+            return pd.DataFrame(columns=[self.key_col, value_name])
+
+        volume = self.cum_volume[:, hi] - self.cum_volume[:, lo]
+        count = self.cum_count[:, hi] - self.cum_count[:, lo]
+        has_data = count > 0
+
+        return pd.DataFrame({
+            self.key_col: self.keys[has_data],
+            value_name: volume[has_data] / count[has_data],
+        })
+
+
+class LocationGroups():
+    """
+    The location group dimension, as written by the ETL's
+    build_location_groups: every group's name and coordinates, numbered in
+    (name, coordinates) order, and the location_dir_ids of its counters.
+
+    The by-location-name datasets are loaded with their name and coordinates
+    columns as integer codes into this dimension (see table_loader), so
+    responses encode each group's fields once instead of once per row.
+    """
+
+    def __init__(self, names: np.ndarray, coordinates: np.ndarray, dir_ids: np.ndarray, group_offsets: np.ndarray):
+        self.names = names
+        self.coordinates = coordinates
+        self.dir_ids = dir_ids
+        self.group_offsets = group_offsets
+
+    @classmethod
+    def from_npz(cls, file_path: Path) -> 'LocationGroups':
+        with np.load(file_path) as npz:
+            return cls(
+                npz['names'].astype(object), npz['coordinates'].astype(object),
+                npz['dir_ids'], npz['group_offsets']
+            )
+
+    @classmethod
+    def table_loader(cls, groups_path: Path, time_col: str, arrow_path: Path = None):
+        """
+        Returns a DatasetRegistry loader for by-location-name Parquet files
+        (or their Arrow copy at arrow_path, see TimeSeriesTable.from_file),
+        which codes their rows against the dimension at groups_path. Register
+        it with depends_on=[groups_path, arrow_path] so a new dimension or
+        copy reloads the table.
+        """
+        def loader(file_path):
+            table = TimeSeriesTable.from_file(file_path, time_col, arrow_path)
+            if not groups_path.exists():
+                return table
+            return cls.from_npz(groups_path).coded_table(table)
+        return loader
+
+    def group_codes(self, names: np.ndarray, coordinates: np.ndarray) -> np.ndarray:
+        """Returns the group number of every (name, coordinates) pair, or -1 if it is not a group."""
+        if isinstance(names, CodedColumn) and isinstance(coordinates, CodedColumn):
+            # Look up each distinct pair of codes once
+            pairs = names.codes.astype(np.int64) * len(coordinates.values) + coordinates.codes
+            pair_codes, unique_pairs = pd.factorize(pairs)
+            groups = self.group_codes(
+                names.values[unique_pairs // len(coordinates.values)],
+                coordinates.values[unique_pairs % len(coordinates.values)]
+            )
+            return groups[pair_codes]
+        groups = pd.MultiIndex.from_arrays([self.names, self.coordinates])
+        return groups.get_indexer(pd.MultiIndex.from_arrays([names, coordinates]))
+
+    def coded_table(self, table: TimeSeriesTable) -> TimeSeriesTable:
+        """
+        Returns the table with its name and coordinates columns coded by
+        group, or the table as-is if any row is not one of the groups (e.g.,
+        the dimension is older than the file).
+        """
+        codes = self.group_codes(table.columns['name'], table.columns['coordinates'])
+        if (codes < 0).any():
+            print("⚠️ Rows outside the location groups; keeping the name and coordinates columns as text.")
+            return table
+
+        columns = dict(table.columns)
+        columns['name'] = CodedColumn(codes, self.names)
+        columns['coordinates'] = CodedColumn(codes, self.coordinates)
+        return TimeSeriesTable(table.time_col, columns)
+
+
+def largest_triangle_three_buckets(y: np.ndarray, n_points: int) -> np.ndarray:
+    """
+    Picks n_points of an evenly spaced series that keep its visual shape,
+    with the Largest-Triangle-Three-Buckets algorithm: the first and last
+    points are kept, and from each of n_points - 2 buckets in between, the
+    point forming the largest triangle with the previously picked point and
+    the average of the next bucket.
+
+    :param y: The series' values.
+    :param n_points: The number of points to keep (at least 3).
+    :return: The positions of the kept points, ascending.
+    """
+    n = len(y)
+    if n_points >= n:
+        return np.arange(n)
+
+    # n_points - 2 buckets over the points between the first and the last
+    edges = (np.arange(n_points - 1) * (n - 2) // (n_points - 2)) + 1
+    picked = np.empty(n_points, dtype=np.int64)
+    picked[0] = a = 0
+    for i in range(n_points - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_lo = hi
+        next_hi = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = (next_lo + next_hi - 1) / 2
+        avg_y = y[next_lo:next_hi].mean()
+
+        xs = np.arange(lo, hi)
+        areas = np.abs((a - avg_x) * (y[lo:hi] - y[a]) - (a - xs) * (avg_y - y[a]))
+        picked[i + 1] = a = lo + int(np.argmax(areas))
+    picked[-1] = n - 1
+    return picked
+
+
+class DailyChart():
+    """
+    The sparse daily chart, as written by the ETL's build_daily_chart: the
+    spans of consecutive days each location has counts on, with their
+    volumes.
+
+    Requests window, filter and downsample it (see encode), densifying only
+    the days and locations they return; days without counts are null. The
+    full chart is encoded once, on first use.
+    """
+
+    RESOLUTIONS = ('day', 'week', 'month')
+
+    def __init__(self, first_day: int, n_days: int, locations: np.ndarray, span_key: np.ndarray,
+                 span_start: np.ndarray, span_offsets: np.ndarray, volumes: np.ndarray):
+        self.first_day = first_day
+        self.n_days = n_days
+        self.locations = locations
+        self.span_start = span_start
+        self.span_offsets = span_offsets
+        self.volumes = volumes
+        # Spans are sorted by location, so each location's spans are a contiguous run
+        self._location_spans = np.searchsorted(span_key, np.arange(len(locations) + 1))
+        self._body = None
+
+    @classmethod
+    def from_npz(cls, file_path: Path) -> 'DailyChart':
+        with np.load(file_path) as npz:
+            return cls(
+                int(npz['first_day']), int(npz['n_days']), npz['keys'].astype(object),
+                npz['span_key'], npz['span_start'], npz['span_offsets'], npz['volumes']
+            )
+
+    def _matrix(self, lo: int, hi: int, columns: np.ndarray) -> np.ndarray:
+        """Returns the (day, location) volumes of days [lo, hi) of the chart, NaN where there is no count."""
+        matrix = np.full((hi - lo, len(columns)), np.nan)
+        for j, location in enumerate(columns):
+            for span in range(self._location_spans[location], self._location_spans[location + 1]):
+                offset = self.span_offsets[span]
+                start = self.span_start[span] - self.first_day
+                end = start + self.span_offsets[span + 1] - offset
+                first, last = max(start, lo), min(end, hi)
+                if first < last:
+                    matrix[first - lo:last - lo, j] = self.volumes[offset + first - start:offset + last - start]
+        return matrix
+
+    def body(self) -> str:
+        """Returns every location on every day, encoded."""
+        if self._body is None:
+            self._body = self.encode()
+        return self._body
+
+    def encode(self, start=None, end=None, locations: list = None, resolution='day') -> str:
+        """
+        Encodes a window of the chart as {"availableLocations": [...], "data":
+        [{"date": ..., location: volume or null, ...}]}, the layout jsonify
+        gives the dense chart table.
+
+        :param start: Inclusive first day (default: the first day of data).
+        :param end: Inclusive last day (default: the last day of data).
+        :param locations: The locations to return (default: all).
+        :param resolution: 'day'; 'week' or 'month' for the mean daily volume
+                           of each location per calendar week (labelled by
+                           its Monday) or month (labelled by its first day);
+                           or a number of days to keep, picked with
+                           largest_triangle_three_buckets on the selected
+                           locations' total volume.
+        :raises KeyError: If a location is not in the chart.
+        """
+        first = 0 if start is None else int(np.datetime64(start, 'D').astype(np.int64)) - self.first_day
+        last = self.n_days - 1 if end is None else int(np.datetime64(end, 'D').astype(np.int64)) - self.first_day
+        lo = min(max(first, 0), self.n_days)
+        hi = min(max(last + 1, lo), self.n_days)
+
+        columns = np.arange(len(self.locations))
+        if locations is not None:
+            columns = pd.Index(self.locations).get_indexer(locations)
+            if (columns < 0).any():
+                raise KeyError(f"Unknown location: {locations[int(np.argmin(columns))]}")
+
+        dates = (self.first_day + np.arange(lo, hi)).astype('datetime64[D]')
+        values = self._matrix(lo, hi, columns)
+
+        if resolution in ('week', 'month'):
+            if resolution == 'week':
+                # The epoch was a Thursday, so Monday-based weeks start 3 days earlier
+                periods = (dates.astype(np.int64) + 3) // 7 * 7 - 3
+                period_starts = np.unique(periods).astype('datetime64[D]')
+            else:
+                periods = dates.astype('datetime64[M]').astype(np.int64)
+                period_starts = np.unique(periods).astype('datetime64[M]').astype('datetime64[D]')
+            _, period_idx = np.unique(periods, return_inverse=True)
+
+            has_data = ~np.isnan(values)
+            sums = np.zeros((len(period_starts), len(columns)))
+            counts = np.zeros((len(period_starts), len(columns)))
+            np.add.at(sums, period_idx, np.where(has_data, values, 0))
+            np.add.at(counts, period_idx, has_data)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                values = np.where(counts > 0, sums / counts, np.nan)
+            dates = period_starts
+        elif resolution != 'day':
+            picked = largest_triangle_three_buckets(np.nansum(values, axis=1), int(resolution))
+            dates, values = dates[picked], values[picked]
+
+        names = self.locations[columns].tolist()
+        records = encode_records(
+            {'date': np.datetime_as_string(dates), **{name: values[:, j] for j, name in enumerate(names)}},
+            nan_as_null=True
+        )
+        return '{"availableLocations":' + json.dumps(names, separators=(',', ':')) + ',"data":' + records + '}'
+
+
+class FeatureCollection():
+    """
+    A GeoJSON FeatureCollection pre-encoded the way jsonify would encode it.
+
+    The full collection is served as-is, and features are indexed by
+    str(feature['id']) so filtered responses are assembled from already
+    encoded features without walking or re-encoding the collection.
+    """
+
+    def __init__(self, data: dict):
+        if not data.get('features'):
+            data['features'] = []
+
+        self.body = self._encode(data)
+        self._features_by_id = {}
+        for feature in data['features']:
+            self._features_by_id.setdefault(str(feature.get('id')), []).append(self._encode(feature))
+
+    @staticmethod
+    def _encode(obj) -> str:
+        return json.dumps(obj, sort_keys=True, separators=(',', ':'))
+
+    @classmethod
+    def from_file(cls, file_path: Path) -> 'FeatureCollection':
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except json.JSONDecodeError:
+            raise ValueError(f"Error decoding JSON data from {file_path}. File might be corrupted.")
+
+        print(f"✅ Data loaded and cached successfully from: {file_path}")
+        return cls(data)
+
+    def filtered_body(self, feature_id: str) -> str:
+        """Returns a FeatureCollection of the features whose id is feature_id."""
+        features = self._features_by_id.get(feature_id, [])
+        return '{"features":[' + ','.join(features) + '],"type":"FeatureCollection"}'
+
+
+class DatasetRegistry():
+    """
+    Process-wide store of the datasets served by the API.
+
+    Each dataset is decoded once per worker (Parquet files into a
+    TimeSeriesTable sorted by their timestamp column), except for the ones
+    memory-mapped from an Arrow copy, which all workers share. The file's mtime is
+    checked on every lookup so a new ETL run is picked up without restarting
+    the server.
+
+    Datasets can be preloaded at startup (see start_preload), by default
+    only those registered with preload=True; `ready` is set once no preload
+    is in progress and `load_times` holds how long each dataset took to
+    load, in seconds.
+
+    Inside snapshot(), lookups from the same thread keep returning the
+    version of each dataset they first got, so several queries answered
+    together see the same data even if the ETL replaces files meanwhile.
+    """
+
+    def __init__(self):
+        self._specs = {}
+        self._entries = {}
+        self._preloaded_by_default = set()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.load_times = {}
+        self.ready = threading.Event()
+        self.ready.set()
+
+    def register(self, name: str, file_path: Path, time_col: str = None, loader=None, depends_on: list = (),
+                 preload: bool = True):
+        """
+        Registers a data file under a dataset name.
+
+        :param name: The name used to look the dataset up (e.g., 'counts_daily').
+        :param file_path: Path to the data file.
+        :param time_col: For Parquet files, the timestamp column to sort the rows by.
+        :param loader: Optional callable that builds the dataset from file_path,
+                       used instead of loading a Parquet TimeSeriesTable.
+        :param depends_on: Other files the loader reads; the dataset is also
+                           reloaded when one of them changes, appears or goes.
+        :param preload: Whether preload() loads the dataset when not given
+                        names. Large tables that routes can read in part
+                        (e.g., from a partitioned copy) should pass False.
+        """
+        if loader is None:
+            loader = TimeSeriesTable.loader(time_col)
+        self._specs[name] = (Path(file_path), loader, [Path(path) for path in depends_on])
+        self._entries.pop(name, None)
+        if preload:
+            self._preloaded_by_default.add(name)
+        else:
+            self._preloaded_by_default.discard(name)
+
+    def _version(self, name: str) -> tuple:
+        """The mtimes of a dataset's file and of the files it depends on (None if missing)."""
+        file_path, _, depends_on = self._specs[name]
+        version = [os.stat(file_path).st_mtime_ns]
+        for path in depends_on:
+            version.append(path.stat().st_mtime_ns if path.exists() else None)
+        return tuple(version)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._specs
+
+    def files(self, *names) -> list:
+        """
+        Returns the files the named datasets are loaded from: each one's file
+        and the files it depends on, without repeats.
+        """
+        paths = []
+        for name in names:
+            file_path, _, depends_on = self._specs[name]
+            paths.extend(path for path in [file_path, *depends_on] if path not in paths)
+        return paths
+
+    def get(self, name: str):
+        """
+        Returns the dataset, loading it on first use or when the file changed
+        on disk.
+
+        The returned dataset is shared between requests and must be treated
+        as read-only.
+        """
+        pinned = self._pinned()
+        if pinned is not None and name in pinned:
+            return pinned[name]
+
+        file_path, loader, _ = self._specs[name]
+        version = self._version(name)
+
+        entry = self._entries.get(name)
+        if entry is None or entry[0] != version:
+            with self._lock:
+                # Another thread may have loaded the file while we waited
+                entry = self._entries.get(name)
+                if entry is None or entry[0] != version:
+                    print(f"🚀 Loading dataset '{name}' from {file_path}...")
+                    started = time.perf_counter()
+                    entry = (version, loader(file_path))
+                    self.load_times[name] = time.perf_counter() - started
+                    self._entries[name] = entry
+
+        if pinned is not None:
+            pinned[name] = entry[1]
+        return entry[1]
+
+    def loaded(self, name: str):
+        """Returns the dataset if it is already in memory and current, otherwise None."""
+        pinned = self._pinned()
+        if pinned is not None and name in pinned:
+            return pinned[name]
+
+        entry = self._entries.get(name)
+        if entry is None:
+            return None
+        try:
+            version = self._version(name)
+        except FileNotFoundError:
+            return None
+        return entry[1] if entry[0] == version else None
+
+    def get_derived(self, name: str, source_name: str):
+        """
+        Returns a dataset precomputed from another one, or None if its file is
+        missing or older than the source file (e.g., the ETL was interrupted
+        between the two steps).
+        """
+        pinned = self._pinned()
+        if pinned is not None and name in pinned:
+            return pinned[name]
+
+        file_path = self._specs[name][0]
+        source_path = self._specs[source_name][0]
+
+        if not file_path.exists():
+            return None
+        if source_path.exists() and source_path.stat().st_mtime_ns > file_path.stat().st_mtime_ns:
+            return None
+        return self.get(name)
+
+    def _pinned(self):
+        """The datasets pinned by this thread's snapshot, or None outside of one."""
+        return getattr(self._local, 'pinned', None)
+
+    @contextmanager
+    def snapshot(self):
+        """
+        Pins every dataset this thread looks up inside the block to the
+        version it first gets. Yields a dict the block can use to share
+        intermediate results (e.g., range reads) between its queries; both
+        are dropped when the block exits. Nested snapshots share the outer one.
+        """
+        if self._pinned() is not None:
+            yield self._local.scratch
+            return
+
+        self._local.pinned = {}
+        self._local.scratch = {}
+        try:
+            yield self._local.scratch
+        finally:
+            self._local.pinned = None
+            self._local.scratch = None
+
+    def snapshot_scratch(self):
+        """The scratch dict of this thread's snapshot, or None outside of one."""
+        return getattr(self._local, 'scratch', None)
+
+    def preload(self, names: list = None) -> dict:
+        """
+        Loads the given datasets (default: every one registered with
+        preload=True) so the first requests don't pay for decoding and
+        indexing them. Missing files are
+        skipped and a dataset that fails to load is left for its route to
+        report.
+
+        :param names: The dataset names to load.
+        :return: The load time of each dataset that was loaded, in seconds.
+        """
+        if names is None:
+            names = [name for name in self._specs if name in self._preloaded_by_default]
+        loaded = {}
+        try:
+            for name in names:
+                file_path = self._specs[name][0]
+                if not file_path.exists():
+                    print(f"⚠️ Skipping preload of '{name}': {file_path} not found.")
+                    continue
+                try:
+                    self.get(name)
+                except Exception as e:
+                    print(f"❌ Failed to preload '{name}': {e}")
+                    continue
+                loaded[name] = self.load_times.get(name, 0.0)
+                print(f"✅ Preloaded '{name}' in {loaded[name]:.3f}s")
+        finally:
+            self.ready.set()
+
+        print(f"✅ Preloaded {len(loaded)} dataset(s) in {sum(loaded.values()):.3f}s")
+        return loaded
+
+    def start_preload(self, background: bool = False, names: list = None):
+        """
+        Preloads datasets, clearing `ready` until it is done.
+
+        :param background: If True, loads in a daemon thread and returns it
+                           immediately instead of blocking.
+        :param names: The dataset names to load (default: see preload).
+        """
+        self.ready.clear()
+        if background:
+            thread = threading.Thread(target=self.preload, args=(names,), name='dataset-preload', daemon=True)
+            thread.start()
+            return thread
+        self.preload(names)
+        return None
+
+    def clear(self):
+        """Drops every loaded dataset; the next lookup reloads from disk."""
+        with self._lock:
+            self._entries.clear()
+
+
+datasets = DatasetRegistry()
@@ -0,0 +1,398 @@
+import json
+import numpy as np
+import pandas as pd
+from typing import List, Dict
+
+SLOT = np.timedelta64(15, 'm')
+SLOTS_PER_DAY = 96
+
+
+def build_time_of_day_profile(
+    df: pd.DataFrame,
+    time_col: str,
+    key_cols: List[str],
+    value_col: str
+) -> Dict[str, np.ndarray]:
+    """
+    Builds a cumulative (day, key, time-of-day slot) cube of volume sums and
+    row counts from 15-minute counts.
+
+    Row i of 'cum_sum'/'cum_count' holds the totals of every day before days[i],
+    so the totals of any run of days come from subtracting two rows. Keys are
+    sorted the way a pandas groupby would sort them.
+
+    :param df: 15-minute counts.
+    :param time_col: The datetime column (e.g., 'datetime_bin').
+    :param key_cols: The columns identifying a location (e.g., ['location_dir_id']).
+    :param value_col: The volume column to sum (e.g., 'bin_volume').
+    :return: Arrays ready to be saved with np.savez.
+    """
+    times = df[time_col].to_numpy(dtype='datetime64[ns]')
+    day = times.astype('datetime64[D]')
+    offset = times - day
+
+    if (offset % SLOT != np.timedelta64(0, 'ns')).any():
+        raise ValueError(f"'{time_col}' has values that are not on a 15-minute boundary.")
+
+    slot = (offset // SLOT).astype(np.int64)
+    days, day_idx = np.unique(day.astype(np.int64), return_inverse=True)
+
+    key_idx, keys = pd.MultiIndex.from_frame(df[key_cols].astype(str)).factorize(sort=True)
+
+    n_days, n_keys = len(days), len(keys)
+    flat = (day_idx * n_keys + key_idx) * SLOTS_PER_DAY + slot
+    size = n_days * n_keys * SLOTS_PER_DAY
+
+    sums = np.bincount(flat, weights=df[value_col].to_numpy(dtype=np.float64), minlength=size)
+    counts = np.bincount(flat, minlength=size)
+
+    shape = (n_days, n_keys, SLOTS_PER_DAY)
+    cum_sum = np.zeros((n_days + 1, n_keys, SLOTS_PER_DAY), dtype=np.int64)
+    cum_count = np.zeros((n_days + 1, n_keys, SLOTS_PER_DAY), dtype=np.int64)
+    np.cumsum(sums.astype(np.int64).reshape(shape), axis=0, out=cum_sum[1:])
+    np.cumsum(counts.reshape(shape), axis=0, out=cum_count[1:])
+
+    # Halve the cube's footprint whenever the totals fit
+    if cum_sum.max(initial=0) < np.iinfo(np.int32).max:
+        cum_sum = cum_sum.astype(np.int32)
+    cum_count = cum_count.astype(np.int32)
+
+    arrays = {
+        'days': days,
+        'key_cols': np.array(key_cols),
+        'cum_sum': cum_sum,
+        'cum_count': cum_count,
+    }
+    for i, col in enumerate(key_cols):
+        arrays[f'key_{col}'] = np.array(keys.get_level_values(i), dtype=str)
+
+    return arrays
+
+
+def build_daily_volume_index(
+    df: pd.DataFrame,
+    time_col: str,
+    key_col: str,
+    value_col: str
+) -> Dict[str, np.ndarray]:
+    """
+    Builds dense (key, day) matrices of cumulative daily volumes and row counts
+    over every day between the first and last date.
+
+    Column j of 'cum_volume'/'cum_count' holds the totals of the days before
+    first_day + j, so the mean daily volume of a key over any date range is
+    one subtraction of each matrix.
+
+    :param df: Daily counts with one midnight timestamp per row.
+    :param time_col: The date column (e.g., 'dt').
+    :param key_col: The column identifying a location (e.g., 'location_dir_id').
+    :param value_col: The volume column to sum (e.g., 'daily_volume').
+    :return: Arrays ready to be saved with np.savez.
+    """
+    times = df[time_col].to_numpy(dtype='datetime64[ns]')
+    day = times.astype('datetime64[D]')
+
+    if (times != day).any():
+        raise ValueError(f"'{time_col}' has values that are not at midnight.")
+
+    day = day.astype(np.int64)
+    first_day = day.min()
+    n_days = int(day.max() - first_day) + 1
+
+    key_idx, keys = pd.factorize(df[key_col].astype(str), sort=True)
+    n_keys = len(keys)
+
+    flat = key_idx * n_days + (day - first_day)
+    size = n_keys * n_days
+    volume = np.bincount(flat, weights=df[value_col].to_numpy(dtype=np.float64), minlength=size)
+    count = np.bincount(flat, minlength=size)
+
+    cum_volume = np.zeros((n_keys, n_days + 1), dtype=np.int64)
+    cum_count = np.zeros((n_keys, n_days + 1), dtype=np.int32)
+    np.cumsum(volume.astype(np.int64).reshape(n_keys, n_days), axis=1, out=cum_volume[:, 1:])
+    np.cumsum(count.reshape(n_keys, n_days), axis=1, out=cum_count[:, 1:])
+
+    return {
+        'first_day': np.array(first_day),
+        'key_col': np.array(key_col),
+        'keys': np.array(keys, dtype=str),
+        'cum_volume': cum_volume,
+        'cum_count': cum_count,
+    }
+
+
+def build_daily_chart(
+    df: pd.DataFrame,
+    time_col: str,
+    key_col: str,
+    value_col: str
+) -> Dict[str, np.ndarray]:
+    """
+    Builds the sparse daily chart: the volume of every key on every day it
+    has counts, stored as spans of consecutive active days.
+
+    Span i belongs to keys[span_key[i]], starts on day span_start[i] (days
+    since the epoch) and its volumes are volumes[span_offsets[i]:span_offsets[i + 1]].
+    Keys are sorted and each key's spans are in date order. The chart covers
+    first_day to first_day + n_days - 1; days outside every span have no data.
+
+    :param df: Daily counts with one midnight timestamp per row.
+    :param time_col: The date column (e.g., 'dt').
+    :param key_col: The column identifying a chart series (e.g., 'location_name').
+    :param value_col: The volume column to sum (e.g., 'daily_volume').
+    :return: Arrays ready to be saved with np.savez.
+    """
+    day = df[time_col].to_numpy(dtype='datetime64[ns]').astype('datetime64[D]').astype(np.int64)
+    first_day = int(day.min()) if len(day) else 0
+    n_days = int(day.max()) - first_day + 1 if len(day) else 0
+
+    key_idx, keys = pd.factorize(df[key_col], sort=True)
+    cells, cell_idx = np.unique(key_idx * n_days + (day - first_day), return_inverse=True)
+    volumes = np.bincount(cell_idx, weights=df[value_col].to_numpy(dtype=np.float64), minlength=len(cells))
+
+    cell_key, cell_day = np.divmod(cells, max(n_days, 1))
+    # A span ends where the next cell is another key or not the next day
+    breaks = np.flatnonzero((np.diff(cell_key) != 0) | (np.diff(cell_day) != 1)) + 1
+    span_starts = np.concatenate([[0], breaks]) if len(cells) else np.empty(0, dtype=np.int64)
+
+    volumes = volumes.astype(np.int64)
+    if volumes.max(initial=0) < np.iinfo(np.int32).max:
+        volumes = volumes.astype(np.int32)
+
+    return {
+        'first_day': np.array(first_day),
+        'n_days': np.array(n_days),
+        'keys': np.array(keys, dtype=str),
+        'span_key': cell_key[span_starts],
+        'span_start': cell_day[span_starts] + first_day,
+        'span_offsets': np.append(span_starts, len(cells)),
+        'volumes': volumes,
+    }
+
+
+# The period columns of each location group stats granularity
+LOCATION_GROUP_STATS_PERIODS = {
+    'yearly': ['year'],
+    'monthly': ['year', 'month'],
+    'weekly': ['year', 'month', 'week'],
+}
+
+
+def location_group_names(location_names: pd.Series) -> pd.Series:
+    """Maps counter names to their location group's name (trimmed, without ' (retired)')."""
+    return location_names.str.strip(' ').str.replace(' (retired)', '', regex=False)
+
+
+def build_location_group_stats(df: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    """
+    Computes the yearly, monthly and weekly stats of every location group
+    from daily counts in one pass: the rows are collapsed to one per group
+    and day once, and each granularity aggregates those.
+
+    Each period gets its first and last active day, the days between them,
+    the active days and their share, the total volume, the mean daily volume
+    (truncated, as in SQL integer division) and location_dir_ids, a JSON
+    array of the group's counters in the order of their first row by
+    record_id. Periods are formatted like SQLite's strftime('%Y'), '%m' and
+    '%W' (weeks starting on Monday).
+
+    :param df: Daily counts with record_id, location_name, location_dir_id,
+               dt (datetime) and daily_volume columns.
+    :return: A DataFrame per granularity, sorted by location_name and period.
+    """
+    df = df.sort_values('record_id', kind='stable')
+    dates = pd.DatetimeIndex(df['dt']).normalize()
+    rows = pd.DataFrame({
+        'location_name': location_group_names(df['location_name']).to_numpy(),
+        'dt': dates,
+        'year': dates.year,
+        'month': dates.month,
+        'week': (dates.dayofyear + 6 - dates.weekday) // 7,
+        'location_dir_id': df['location_dir_id'].astype('int64').to_numpy(),
+        'daily_volume': df['daily_volume'].to_numpy(),
+    })
+
+    # One row per group and active day, shared by every granularity
+    days = rows.groupby(['location_name', 'dt', 'year', 'month', 'week'], sort=False)['daily_volume'].sum().reset_index()
+
+    stats = {}
+    for granularity, period_cols in LOCATION_GROUP_STATS_PERIODS.items():
+        keys = ['location_name'] + period_cols
+        periods = days.groupby(keys).agg(
+            first_active=('dt', 'min'),
+            last_active=('dt', 'max'),
+            days_active=('dt', 'size'),
+            total_vol=('daily_volume', 'sum'),
+        )
+        periods['location_dir_ids'] = (
+            rows.drop_duplicates(keys + ['location_dir_id'])
+            .groupby(keys, sort=False)['location_dir_id']
+            .agg(_json_int_array)
+        )
+        periods = periods.reset_index()
+        for col in period_cols:
+            periods[col] = periods[col].map('{:04d}'.format if col == 'year' else '{:02d}'.format)
+        stats[granularity] = _location_group_stats_frame(periods, period_cols)
+
+    return stats
+
+
+def combine_location_group_stats(stats: pd.DataFrame, counters: pd.DataFrame = None) -> pd.DataFrame:
+    """
+    Combines per-period location group stats (e.g., the yearly ones) into
+    overall stats per location group. The counters of location_dir_ids are
+    listed in the order of their first row by record_id if counters is
+    given, otherwise in the order they first appear by period.
+
+    :param stats: A frame from build_location_group_stats, or read back from
+                  its table, covering every period of the groups.
+    :param counters: The first record_id of every counter, with location_name,
+                     location_dir_id and record_id columns (a counter may be
+                     listed under several names, e.g., once retired).
+    :return: The overall stats, sorted by mean daily volume (descending).
+    """
+    stats = stats.sort_values(['location_name', 'first_active'])
+    stats = stats.assign(
+        first_active=pd.to_datetime(stats['first_active']),
+        last_active=pd.to_datetime(stats['last_active']),
+        location_dir_ids=stats['location_dir_ids'].map(json.loads),
+    )
+    overall = stats.groupby('location_name').agg(
+        first_active=('first_active', 'min'),
+        last_active=('last_active', 'max'),
+        days_active=('days_active', 'sum'),
+        total_vol=('total_vol', 'sum'),
+        location_dir_ids=('location_dir_ids', lambda ids: _json_int_array(id for period in ids for id in period)),
+    ).reset_index()
+
+    if counters is not None:
+        first_rows = (
+            pd.DataFrame({
+                'location_name': location_group_names(counters['location_name']).to_numpy(),
+                'location_dir_id': counters['location_dir_id'].astype('int64').to_numpy(),
+                'record_id': counters['record_id'].to_numpy(),
+            })
+            .sort_values('record_id', kind='stable')
+            .drop_duplicates(['location_name', 'location_dir_id'])
+        )
+        ordered_ids = first_rows.groupby('location_name', sort=False)['location_dir_id'].agg(_json_int_array)
+        overall['location_dir_ids'] = overall['location_name'].map(ordered_ids).fillna(overall['location_dir_ids'])
+
+    overall = _location_group_stats_frame(overall, [])
+    return overall.sort_values('avg_daily_vol', ascending=False, kind='stable').reset_index(drop=True)
+
+
+def _location_group_stats_frame(periods: pd.DataFrame, period_cols: List[str]) -> pd.DataFrame:
+    """Derives the stats columns, in table order, from first/last active day, days active and total volume."""
+    days_bw_first_last = (periods['last_active'] - periods['first_active']).dt.days + 1
+    return pd.DataFrame({
+        'location_name': periods['location_name'],
+        **{col: periods[col] for col in period_cols},
+        'location_dir_ids': periods['location_dir_ids'],
+        'first_active': periods['first_active'].dt.strftime('%Y-%m-%dT%H:%M:%S'),
+        'last_active': periods['last_active'].dt.strftime('%Y-%m-%dT%H:%M:%S'),
+        'days_bw_first_last': days_bw_first_last,
+        'days_active': periods['days_active'],
+        'prct_active_days': periods['days_active'] / days_bw_first_last,
+        'total_vol': periods['total_vol'],
+        'avg_daily_vol': (periods['total_vol'] // periods['days_active']).astype(np.float64),
+    })
+
+
+def _json_int_array(values) -> str:
+    """Formats integers as a compact JSON array, keeping the first of any repeats."""
+    return '[' + ','.join(str(value) for value in dict.fromkeys(values)) + ']'
+
+
+def build_location_groups(features: List[dict]) -> Dict[str, np.ndarray]:
+    """
+    Builds the location group dimension from the counter_groups GeoJSON
+    features: groups are numbered in (name, coordinates) order, as a pandas
+    groupby would sort them, and each group's counters are listed in
+    ascending location_dir_id order.
+
+    The counters of group g are dir_ids[group_offsets[g]:group_offsets[g + 1]].
+    Coordinates are kept as the strings the by-location-name files store
+    (e.g., '[-79.3681194, 43.6738047]').
+
+    :param features: The features of counter_groups.geojson.
+    :return: Arrays ready to be saved with np.savez.
+    """
+    groups = sorted(
+        (
+            feature['properties']['name'],
+            str([float(value) for value in feature['geometry']['coordinates']]),
+            sorted(int(dir_id) for dir_id in feature['properties']['location_dir_ids']),
+        )
+        for feature in features
+    )
+
+    dir_ids = np.array([dir_id for _, _, ids in groups for dir_id in ids], dtype=np.int64)
+    if len(np.unique(dir_ids)) != len(dir_ids):
+        raise ValueError("A location_dir_id belongs to more than one location group.")
+
+    return {
+        'names': np.array([name for name, _, _ in groups], dtype=str),
+        'coordinates': np.array([coordinates for _, coordinates, _ in groups], dtype=str),
+        'dir_ids': dir_ids,
+        'group_offsets': np.cumsum([0] + [len(ids) for _, _, ids in groups]).astype(np.int64),
+    }
+
+
+def aggregate_by_location_group(
+    groups: Dict[str, np.ndarray],
+    df: pd.DataFrame,
+    time_col: str,
+    value_col: str
+) -> pd.DataFrame:
+    """
+    Sums counts per location group and time with integer keys: each row's
+    location_dir_id is mapped to its group through the dimension, volumes are
+    summed with one bincount over the (group, time) cells, and the counters
+    present in each cell are collected as a bitmask of the group's members.
+    Rows of counters outside every group are dropped.
+
+    :param groups: The dimension from build_location_groups.
+    :param df: Counts with location_dir_id, time_col and value_col columns.
+    :param time_col: The time column (e.g., 'datetime_bin').
+    :param value_col: The volume column to sum (e.g., 'bin_volume').
+    :return: name, coordinates, time_col, value_col and location_dir_ids
+             (e.g., '[1, 2]') columns, sorted by group and time.
+    """
+    dir_ids = groups['dir_ids']
+    offsets = groups['group_offsets']
+    group_of_member = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+    if np.diff(offsets).max(initial=0) > 62:
+        raise ValueError("A location group has more counters than fit in a 64-bit mask.")
+
+    ids = df['location_dir_id'].to_numpy(dtype=np.int64)
+    # Dense location_dir_id -> member position lookup, -1 outside every group
+    lookup = np.full(max(dir_ids.max(initial=0), ids.max(initial=0)) + 1, -1, dtype=np.int64)
+    lookup[dir_ids] = np.arange(len(dir_ids))
+    member = lookup[ids]
+    known = member >= 0
+
+    member = member[known]
+    group = group_of_member[member]
+    time_idx, times = pd.factorize(df[time_col][known], sort=True)
+
+    cells, cell_idx = np.unique(group * len(times) + time_idx, return_inverse=True)
+    totals = np.bincount(cell_idx, weights=df[value_col].to_numpy(dtype=np.float64)[known], minlength=len(cells))
+    masks = np.zeros(len(cells), dtype=np.int64)
+    np.bitwise_or.at(masks, cell_idx, np.left_shift(1, member - offsets[group]))
+
+    cell_group = cells // max(len(times), 1)
+    # A group's cells share a handful of counter combinations, so each list is formatted once
+    combo_idx, combos = pd.MultiIndex.from_arrays([cell_group, masks]).factorize()
+    combo_ids = np.array([
+        str([int(dir_id) for bit, dir_id in enumerate(dir_ids[offsets[g]:offsets[g + 1]]) if mask >> bit & 1])
+        for g, mask in combos
+    ], dtype=object)
+
+    return pd.DataFrame({
+        'name': groups['names'][cell_group].astype(object),
+        'coordinates': groups['coordinates'][cell_group].astype(object),
+        time_col: times.take(cells % max(len(times), 1)),
+        value_col: totals.astype(np.int64),
+        'location_dir_ids': combo_ids[combo_idx],
+    })
@@ -1,7 +1,9 @@
 from etl_pipelines.toronto_open_data.client import CityOfTorontoClient
 from etl_pipelines.bicycle_counters.models import *
-from typing import List
+from etl_pipelines.bicycle_counters.validation import validate_records
+from typing import List, Tuple, AsyncIterator
 from dotenv import load_dotenv
+import pandas as pd
 import os
 
 load_dotenv()
@@ -9,15 +11,22 @@ load_dotenv()
 class BicycleCountersClient(CityOfTorontoClient):
     PACKAGE_ID = "ff7e7369-cbba-4545-9e26-e5a5ef6a123c"
     DB_PATH=os.getenv('DB_PATH')
+    FIFTEEN_MIN_RESOURCES = [
+        "cycling_permanent_counts_15min_1994_2024.json",
+        "cycling_permanent_counts_15min_2024_2025.json",
+        "cycling_permanent_counts_15min_2025_2026.json"
+    ]
+    DAILY_COUNTS_RESOURCE = "cycling_permanent_counts_daily.json"
 
     async def get_counter_locations_raw(self) -> List[CounterLocation]:
         resource_name = "cycling_permanent_counts_locations_geojson"
-        data = await self.get_resource_data(self.PACKAGE_ID, resource_name)
+        # Shared with get_counter_locations, so a run downloads it once
+        data = await self.get_resource_data(self.PACKAGE_ID, resource_name, shared=True)
         return data
     
     async def get_counter_locations(self) -> List[CounterLocation]:
         resource_name = "cycling_permanent_counts_locations_geojson"
-        data = await self.get_resource_data(self.PACKAGE_ID, resource_name)
+        data = await self.get_resource_data(self.PACKAGE_ID, resource_name, shared=True)
 
         if not data or "features" not in data:
             return []
@@ -28,10 +37,9 @@ class BicycleCountersClient(CityOfTorontoClient):
         ]
     
     async def get_daily_counts(self) -> List[DailyCount]:
-        resource_name = "cycling_permanent_counts_daily.json"
         data = await self.get_resource_data(
             self.PACKAGE_ID, 
-            resource_name,
+            self.DAILY_COUNTS_RESOURCE,
             json_content_type="application/octet-stream"
         )
         
@@ -39,18 +47,57 @@ class BicycleCountersClient(CityOfTorontoClient):
             return []
 
         return [DailyCount.model_validate(record) for record in data]
+
+    async def get_daily_counts_frame(self) -> pd.DataFrame:
+        """
+        Returns the daily counts as a DataFrame with the DailyCount fields as
+        columns, validated column by column instead of record by record.
+        """
+        data = await self.get_resource_data(
+            self.PACKAGE_ID,
+            self.DAILY_COUNTS_RESOURCE,
+            json_content_type="application/octet-stream"
+        )
+        return validate_records(data or [], DailyCount)
     
     async def get_15m_counts(self) -> List[FifteenMinCount]:
-        all_data = []
-        for resource_name in [
-            "cycling_permanent_counts_15min_1994_2024.json",
-            "cycling_permanent_counts_15min_2024_2025.json",
-            "cycling_permanent_counts_15min_2025_2026.json"
-        ]:
-            data = await self.get_resource_data(self.PACKAGE_ID, resource_name)
-            all_data.extend(data)
-        
-        if not data:
+        # The yearly files are downloaded concurrently
+        results = await self.get_resources_data(self.PACKAGE_ID, self.FIFTEEN_MIN_RESOURCES)
+        all_data = [record for data in results if data for record in data]
+
+        if not all_data:
             return []
         
-        return [FifteenMinCount.model_validate(record) for record in data]
\ No newline at end of file
+        return [FifteenMinCount.model_validate(record) for record in all_data]
+
+    async def get_15m_counts_frame(self) -> pd.DataFrame:
+        """
+        Returns the 15-minute counts as a DataFrame with the FifteenMinCount
+        fields as columns, validated column by column instead of record by record.
+        """
+        results = await self.get_resources_data(self.PACKAGE_ID, self.FIFTEEN_MIN_RESOURCES)
+        return validate_records([record for data in results if data for record in data], FifteenMinCount)
+
+    async def iter_15m_count_batches(
+        self,
+        batch_size: int = 100_000,
+        resource_names: List[str] = None
+    ) -> AsyncIterator[Tuple[str, pd.DataFrame]]:
+        """
+        Streams the 15-minute counts of every resource (or only the given
+        ones) as (resource_name, DataFrame) batches of at most batch_size rows,
+        with the FifteenMinCount fields as columns (record_id, location_dir_id,
+        datetime_bin, bin_volume).
+
+        The yearly files are downloaded concurrently, so batches of different
+        files are interleaved. Memory stays bounded by a few batches however
+        many years are published.
+        """
+        resource_names = resource_names or self.FIFTEEN_MIN_RESOURCES
+        async for resource_name, records in self.iter_resources_batches(self.PACKAGE_ID, resource_names, batch_size):
+            yield resource_name, self.fifteen_min_counts_frame(records)
+
+    @staticmethod
+    def fifteen_min_counts_frame(records: List[dict]) -> pd.DataFrame:
+        """Validates raw 15-minute count records into typed FifteenMinCount columns."""
+        return validate_records(records, FifteenMinCount)
@@ -1,13 +1,27 @@
 from etl_pipelines.bicycle_counters.client import BicycleCountersClient
 from modules.parquet_loader import ParquetLoader
+from modules.arrow_loader import ArrowLoader
 from modules.json_loader import JsonLoader
+from modules.numpy_loader import NumpyLoader
+from modules.etl_state import EtlState
+from modules.sqlite_loader import SqliteLoader
 from etl_pipelines.bicycle_counters.models import (DailyCount, CounterLocation)
+from etl_pipelines.bicycle_counters.aggregations import (
+    build_time_of_day_profile,
+    build_daily_volume_index,
+    build_daily_chart,
+    build_location_group_stats,
+    combine_location_group_stats,
+    build_location_groups,
+    aggregate_by_location_group,
+)
 import os
-import sqlite3
 import json
+import hashlib
+import asyncio
+import numpy as np
 import pandas as pd
 from typing import List, Dict, Any
-import geopandas as gpd
 from dotenv import load_dotenv
 from pathlib import Path
 
@@ -15,14 +29,215 @@ dotenv_path = Path(__file__).parent / ".env"
 load_dotenv(dotenv_path=dotenv_path)
 
 BASE_DIR = Path(__file__).resolve().parent
-DATA_DIR = Path(os.getenv("DATA_DIR", str(BASE_DIR / "data"))).resolve()
+# Every file is written and read through these paths; by default the
+# directory the API serves (api/data)
+DATA_DIR = Path(os.getenv("DATA_DIR", str(BASE_DIR.parents[1] / "data"))).resolve()
+COUNTER_LOCATIONS_FILE = DATA_DIR / "counter_locations.geojson"
+COUNTER_GROUPS_FILE = DATA_DIR / "counter_groups.geojson"
+LOCATION_GROUPS_FILE = DATA_DIR / "location_groups.npz"
 COUNTS_DAILY_FILE = DATA_DIR / "counts_daily.parquet"
-
-class BicycleCountersLoader(BicycleCountersClient, ParquetLoader, JsonLoader):
+COUNTS_DAILY_ARROW_FILE = DATA_DIR / "counts_daily.arrow"
+COUNTS_DAILY_BY_LOCATION_NAME_FILE = DATA_DIR / "counts_daily_by_location_name.parquet"
+COUNTS_DAILY_BY_LOCATION_NAME_ARROW_FILE = DATA_DIR / "counts_daily_by_location_name.arrow"
+COUNTS_DAILY_CHART_FILE = DATA_DIR / "counts_daily_chart.npz"
+COUNTS_DAILY_VOLUME_INDEX_FILE = DATA_DIR / "counts_daily_volume_index.npz"
+COUNTS_15M_FILE = DATA_DIR / "counts_15m.parquet"
+COUNTS_15M_ARROW_FILE = DATA_DIR / "counts_15m.arrow"
+COUNTS_15M_PARTITIONED_DIR = DATA_DIR / "counts_15m_partitioned"
+COUNTS_15M_PROFILE_FILE = DATA_DIR / "counts_15m_profile.npz"
+COUNTS_15M_BY_LOCATION_NAME_FILE = DATA_DIR / "counts_15m_by_location_name.parquet"
+COUNTS_15M_BY_LOCATION_NAME_ARROW_FILE = DATA_DIR / "counts_15m_by_location_name.arrow"
+COUNTS_15M_BY_LOCATION_NAME_PARTITIONED_DIR = DATA_DIR / "counts_15m_by_location_name_partitioned"
+COUNTS_15M_BY_LOCATION_NAME_PROFILE_FILE = DATA_DIR / "counts_15m_by_location_name_profile.npz"
+ETL_STATE_FILE = DATA_DIR / "etl_state.json"
+
+LOCATION_GROUP_STATS_TABLES = {
+    'overall': '''
+        create table IF NOT EXISTS location_group_stats_overall (
+            location_name text primary key,
+            location_dir_ids text,
+            first_active text,
+            last_active text,
+            days_bw_first_last integer,
+            days_active integer,
+            prct_active_days real,
+            total_vol integer,
+            avg_daily_vol real
+        )
+    ''',
+    'yearly': '''
+        create table IF NOT EXISTS location_group_stats_yearly (
+            location_name text,
+            year text,
+            location_dir_ids text,
+            first_active text,
+            last_active text,
+            days_bw_first_last integer,
+            days_active integer,
+            prct_active_days real,
+            total_vol integer,
+            avg_daily_vol real,
+            primary key (location_name, year)
+        )
+    ''',
+    'monthly': '''
+        create table IF NOT EXISTS location_group_stats_monthly (
+            location_name text,
+            year text,
+            month text,
+            location_dir_ids text,
+            first_active text,
+            last_active text,
+            days_bw_first_last integer,
+            days_active integer,
+            prct_active_days real,
+            total_vol integer,
+            avg_daily_vol real,
+            primary key (location_name, year, month)
+        )
+    ''',
+    'weekly': '''
+        create table IF NOT EXISTS location_group_stats_weekly (
+            location_name text,
+            year text,
+            month text,
+            week text,
+            location_dir_ids text,
+            first_active text,
+            last_active text,
+            days_bw_first_last integer,
+            days_active integer,
+            prct_active_days real,
+            total_vol integer,
+            avg_daily_vol real,
+            primary key (location_name, year, month, week)
+        )
+    ''',
+}
+
+class BicycleCountersLoader(BicycleCountersClient, ParquetLoader, ArrowLoader, JsonLoader, NumpyLoader, SqliteLoader):
+
+    def __init__(self, incremental: bool = False, bulk_load: bool = False, **client_options):
+        """
+        :param incremental: If True, resources unchanged since the last run
+                            (per ETag/Last-Modified) are skipped, only rows from
+                            each changed resource's high-water mark on are
+                            upserted into the Parquet files, and only the files
+                            derived from changed data are rebuilt. Outputs that
+                            don't exist yet are built in full.
+        :param bulk_load: If True, the SQLite writers fully reload their tables
+                          in bulk load mode (see SqliteLoader.bulk_load).
+        :param client_options: Passed to CityOfTorontoClient (e.g., max_concurrency).
+        """
+        super().__init__(**client_options)
+        # Rebuilds this loader in worker processes (see run_loader_step)
+        self.options = dict(incremental=incremental, bulk_load=bulk_load, **client_options)
+        self.incremental = incremental
+        self.bulk_load = bulk_load
+        self.etl_state = EtlState(ETL_STATE_FILE)
+        # Datasets rewritten during this run, mapped to the earliest timestamp
+        # that changed (None when the whole dataset was rebuilt)
+        self.changed_since = {}
+
+    async def run_step_in_executor(self, executor, step_name: str) -> None:
+        """
+        Runs a CPU-bound step that only reads and writes local files (e.g.,
+        'counts_daily_chart_to_npz') in executor, typically a
+        ProcessPoolExecutor, with a fresh loader sharing this run's settings.
+        The datasets it changed are merged back into changed_since.
+
+        With executor=None the step runs in this process instead.
+        """
+        if executor is None:
+            await getattr(self, step_name)()
+            return
+
+        loop = asyncio.get_running_loop()
+        changed_since = await loop.run_in_executor(
+            executor, run_loader_step, step_name, self.options, dict(self.changed_since)
+        )
+        self.changed_since.update(changed_since)
+
+    async def _changed_resources(self, resource_names: List[str], since_last_run: bool) -> Dict[str, dict]:
+        """
+        Returns the current HTTP validators of the given resources, keeping
+        only those that changed since the last run if since_last_run is True.
+        """
+        validators = await self.gather_bounded(*(
+            self.get_changed_resource_validators(
+                self.PACKAGE_ID,
+                resource_name,
+                self.etl_state.get(resource_name) if since_last_run else None
+            )
+            for resource_name in resource_names
+        ))
+        return {name: v for name, v in zip(resource_names, validators) if v is not None}
+
+    def _since_high_water_mark(self, resource_name: str, df: pd.DataFrame, time_col: str) -> pd.DataFrame:
+        """
+        Keeps the rows from the day of the resource's high-water mark on. The
+        last loaded day is read again since it may have been incomplete.
+        """
+        high_water_mark = self.etl_state.get(resource_name).get('high_water_mark')
+        if not high_water_mark:
+            return df
+        return df[df[time_col] >= pd.Timestamp(high_water_mark).normalize()]
+
+    def _record_resources(self, validators: Dict[str, dict], high_water_marks: Dict[str, pd.Timestamp]):
+        """Saves the validators and high-water marks of the resources loaded in this run."""
+        for resource_name, resource_validators in validators.items():
+            previous = self.etl_state.get(resource_name).get('high_water_mark')
+            high_water_mark = high_water_marks.get(resource_name)
+            if previous and (high_water_mark is None or pd.Timestamp(previous) > high_water_mark):
+                high_water_mark = pd.Timestamp(previous)
+            self.etl_state.update(
+                resource_name,
+                **resource_validators,
+                high_water_mark=high_water_mark.isoformat() if high_water_mark is not None else None
+            )
+        self.etl_state.save()
+
+    def _needs_rebuild(self, *sources: str) -> bool:
+        """Whether a derived file must be rebuilt: always, unless incremental and no source changed."""
+        return not self.incremental or any(source in self.changed_since for source in sources)
+
+    def _rebuild_cutoff(self, output_path: str, *sources: str):
+        """
+        Returns the earliest timestamp from which output_path must be
+        recomputed, or None if it must be rebuilt in full.
+        """
+        if not self.incremental or not os.path.exists(output_path):
+            return None
+        cutoffs = [self.changed_since[source] for source in sources if source in self.changed_since]
+        if not cutoffs or any(cutoff is None for cutoff in cutoffs):
+            return None
+        return min(cutoffs)
+
+    @staticmethod
+    def _read_parquet_since(parquet_path, columns: List[str], time_col: str, cutoff) -> pd.DataFrame:
+        """Reads the rows with time_col >= cutoff (all rows if cutoff is None)."""
+        if cutoff is None:
+            return pd.read_parquet(parquet_path, columns=columns)
+        df = pd.read_parquet(parquet_path, columns=columns, filters=[(time_col, '>=', cutoff)])
+        # Some engines only skip whole row groups
+        return df[df[time_col] >= cutoff]
+
+    @staticmethod
+    def _file_digest(file_path: str):
+        if not os.path.exists(file_path):
+            return None
+        with open(file_path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+
+    @staticmethod
+    def _location_groups() -> Dict[str, np.ndarray]:
+        """Loads the location group dimension written by counter_groups_to_geojson."""
+        with np.load(LOCATION_GROUPS_FILE) as npz:
+            return dict(npz)
 
     async def counter_locations_to_geojson(self) -> None:        
         results = await self.get_counter_locations_raw()
-        file_path = "./data/counter_locations.geojson"
+        file_path = COUNTER_LOCATIONS_FILE
         self.save_to_json(results, file_path, overwrite=True)
 
     async def counter_groups_to_geojson(self) -> None:
@@ -130,114 +345,252 @@ class BicycleCountersLoader(BicycleCountersClient, ParquetLoader, JsonLoader):
 
         final_geojson_data = create_geojson_collection(list_of_records)
         
+        digest_before = self._file_digest(COUNTER_GROUPS_FILE)
         self.save_to_json(
             data=final_geojson_data, 
-            json_path='./data/counter_groups.geojson', 
+            json_path=COUNTER_GROUPS_FILE, 
             overwrite=True
         )
+        if self._file_digest(COUNTER_GROUPS_FILE) != digest_before:
+            # Regrouped locations change the by-location-name files' whole history
+            self.changed_since['counter_groups'] = None
+
+        if self._needs_rebuild('counter_groups') or not os.path.exists(LOCATION_GROUPS_FILE):
+            location_groups = build_location_groups(final_geojson_data['features'])
+            self.arrays_to_npz(location_groups, LOCATION_GROUPS_FILE, overwrite=True)
 
         print("GeoJSON file generated and saved successfully.")
 
     async def counts_15m_to_parquet(self) -> None:        
-        results = await self.get_15m_counts()
-        df = pd.DataFrame([r.__dict__ for r in results])
-        self.df_to_parquet(df, "./data/counts_15m.parquet", overwrite=True)
+        parquet_path = COUNTS_15M_FILE
+        incremental = self.incremental and os.path.exists(parquet_path)
+
+        validators = await self._changed_resources(self.FIFTEEN_MIN_RESOURCES, since_last_run=incremental)
+        if incremental and not validators:
+            print("15-minute counts are unchanged since the last run. Skipping.")
+            return
+
+        high_water_marks = {}
+
+        async def batches():
+            async for resource_name, df in self.iter_15m_count_batches(
+                resource_names=list(validators) if incremental else None
+            ):
+                if incremental:
+                    df = self._since_high_water_mark(resource_name, df, 'datetime_bin')
+                if len(df):
+                    latest = df['datetime_bin'].max()
+                    high_water_marks[resource_name] = max(high_water_marks.get(resource_name, latest), latest)
+                yield df
+
+        if incremental:
+            # Only the rows since the high-water marks are held in memory
+            frames = [df async for df in batches()]
+            new_df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+            if self.upsert_parquet(new_df, parquet_path, 'datetime_bin', ['location_dir_id', 'datetime_bin']):
+                self.changed_since['counts_15m'] = new_df['datetime_bin'].min()
+        else:
+            # Streamed batch by batch into row groups, so memory stays flat
+            await self.batches_to_parquet(batches(), parquet_path, overwrite=True)
+            self.changed_since['counts_15m'] = None
+
+        self._record_resources(validators, high_water_marks)
 
     async def counts_15m_by_location_name_to_parquet(self) -> None: 
-        names_df = gpd.read_file("./data/counter_groups.geojson")
-        names_df['coordinates'] = names_df['geometry'].apply(
-            lambda geo: str (list(list(geo.coords)[0]))
-        )
-        names_df = names_df[['name', 'location_dir_ids', 'coordinates']]
-        names_df = names_df.explode('location_dir_ids')
-        names_df.rename(columns={'location_dir_ids': 'location_dir_id'}, inplace=True)
-        names_df['location_dir_id'] = names_df['location_dir_id'].astype('int64')
-
-        counts_response = await self.get_15m_counts()
-        counts_df = pd.DataFrame([r.__dict__ for r in counts_response])
-        counts_df['location_dir_id'] = counts_df['location_dir_id'].astype('int64')
-
-        merged_df = pd.merge(
-            counts_df,
-            names_df,
-            on='location_dir_id',
-            how='left'
+        parquet_path = COUNTS_15M_BY_LOCATION_NAME_FILE
+        if not self._needs_rebuild('counts_15m', 'counter_groups'):
+            print(f"{parquet_path} is up to date. Skipping.")
+            return
+        cutoff = self._rebuild_cutoff(parquet_path, 'counts_15m', 'counter_groups')
+
+        # Reuse the counts written by counts_15m_to_parquet instead of downloading them again
+        counts_df = self._read_parquet_since(
+            COUNTS_15M_FILE, ['location_dir_id', 'datetime_bin', 'bin_volume'], 'datetime_bin', cutoff
         )
 
         GROUP_COLS = ['name', 'coordinates', 'datetime_bin']
-        aggregated_df = merged_df.groupby(GROUP_COLS).agg(
-            location_dir_ids=('location_dir_id', list),
-            total_bin_volume=('bin_volume', 'sum')
-        ).reset_index() # Use reset_index() to turn the GroupBy keys back into columns
-        # Convert the list of location_dir_ids to a JSON string for Parquet/storage
-        aggregated_df['location_dir_ids'] = aggregated_df['location_dir_ids'].astype(str)
+        aggregated_df = aggregate_by_location_group(self._location_groups(), counts_df, 'datetime_bin', 'bin_volume')
+        aggregated_df = aggregated_df.rename(columns={'bin_volume': 'total_bin_volume'})
         final_df = aggregated_df[['name', 'coordinates', 'datetime_bin', 'total_bin_volume', 'location_dir_ids']]
         
-        self.df_to_parquet(final_df, "./data/counts_15m_by_location_name.parquet", overwrite=True)
+        if cutoff is None:
+            self.df_to_parquet(final_df, parquet_path, overwrite=True)
+        else:
+            # Only the time bins from the cutoff on were recomputed
+            self.upsert_parquet(final_df, parquet_path, 'datetime_bin', GROUP_COLS)
+        self.changed_since['counts_15m_by_location_name'] = cutoff
+
+    async def counts_15m_profile_to_npz(self) -> None:
+        if not self._needs_rebuild('counts_15m'):
+            print("15-minute profile is up to date. Skipping.")
+            return
+
+        df = pd.read_parquet(COUNTS_15M_FILE)
+        profile = build_time_of_day_profile(
+            df,
+            time_col='datetime_bin',
+            key_cols=['location_dir_id'],
+            value_col='bin_volume'
+        )
+        self.arrays_to_npz(profile, COUNTS_15M_PROFILE_FILE, overwrite=True)
+
+    async def counts_15m_by_location_name_profile_to_npz(self) -> None:
+        if not self._needs_rebuild('counts_15m_by_location_name'):
+            print("15-minute by location name profile is up to date. Skipping.")
+            return
+
+        df = pd.read_parquet(COUNTS_15M_BY_LOCATION_NAME_FILE)
+        profile = build_time_of_day_profile(
+            df,
+            time_col='datetime_bin',
+            key_cols=['name', 'location_dir_ids', 'coordinates'],
+            value_col='total_bin_volume'
+        )
+        self.arrays_to_npz(profile, COUNTS_15M_BY_LOCATION_NAME_PROFILE_FILE, overwrite=True)
+
+    def _parquet_to_partitioned(self, source_name: str, parquet_path, dataset_dir: str, time_col: str):
+        """
+        Rebuilds the month-partitioned copy of a Parquet file, or in
+        incremental runs only the months from the source's earliest change on.
+        """
+        if not self._needs_rebuild(source_name):
+            print(f"{dataset_dir} is up to date. Skipping.")
+            return
+
+        cutoff = self._rebuild_cutoff(dataset_dir, source_name)
+        if cutoff is None:
+            df = pd.read_parquet(parquet_path)
+            self.df_to_partitioned_parquet(df, dataset_dir, time_col)
+        else:
+            month_start = cutoff.to_period('M').to_timestamp()
+            df = self._read_parquet_since(parquet_path, None, time_col, month_start)
+            self.df_to_partitioned_parquet(df, dataset_dir, time_col, replace_partitions=True)
+
+    async def counts_15m_to_partitioned_parquet(self) -> None:
+        self._parquet_to_partitioned(
+            'counts_15m', COUNTS_15M_FILE, COUNTS_15M_PARTITIONED_DIR, 'datetime_bin'
+        )
+
+    async def counts_15m_by_location_name_to_partitioned_parquet(self) -> None:
+        self._parquet_to_partitioned(
+            'counts_15m_by_location_name',
+            COUNTS_15M_BY_LOCATION_NAME_FILE,
+            COUNTS_15M_BY_LOCATION_NAME_PARTITIONED_DIR,
+            'datetime_bin'
+        )
+
+    def _parquet_to_arrow(self, source_name: str, parquet_path, arrow_path: str, time_col: str):
+        """
+        Rewrites the memory-mappable Arrow copy of a Parquet file (see
+        ArrowLoader.df_to_arrow) when its source changed or it is missing.
+        """
+        if not self._needs_rebuild(source_name) and os.path.exists(arrow_path):
+            print(f"{arrow_path} is up to date. Skipping.")
+            return
+        self.df_to_arrow(pd.read_parquet(parquet_path), arrow_path, time_col, overwrite=True)
+
+    async def counts_daily_to_arrow(self) -> None:
+        self._parquet_to_arrow('counts_daily', COUNTS_DAILY_FILE, COUNTS_DAILY_ARROW_FILE, 'dt')
+
+    async def counts_daily_by_location_name_to_arrow(self) -> None:
+        self._parquet_to_arrow(
+            'counts_daily_by_location_name',
+            COUNTS_DAILY_BY_LOCATION_NAME_FILE,
+            COUNTS_DAILY_BY_LOCATION_NAME_ARROW_FILE,
+            'dt'
+        )
+
+    async def counts_15m_to_arrow(self) -> None:
+        self._parquet_to_arrow('counts_15m', COUNTS_15M_FILE, COUNTS_15M_ARROW_FILE, 'datetime_bin')
+
+    async def counts_15m_by_location_name_to_arrow(self) -> None:
+        self._parquet_to_arrow(
+            'counts_15m_by_location_name',
+            COUNTS_15M_BY_LOCATION_NAME_FILE,
+            COUNTS_15M_BY_LOCATION_NAME_ARROW_FILE,
+            'datetime_bin'
+        )
 
     async def counts_daily_to_parquet(self) -> None:        
-        results = await self.get_daily_counts()
-        data_dicts = [r.model_dump() for r in results]
-        df = pd.DataFrame(data_dicts)
-        df['dt'] = pd.to_datetime(df['dt'])
-        self.df_to_parquet(df, "./data/counts_daily.parquet", overwrite=True)
+        parquet_path = COUNTS_DAILY_FILE
+        incremental = self.incremental and os.path.exists(parquet_path)
+
+        validators = await self._changed_resources([self.DAILY_COUNTS_RESOURCE], since_last_run=incremental)
+        if incremental and not validators:
+            print("Daily counts are unchanged since the last run. Skipping.")
+            return
+
+        df = await self.get_daily_counts_frame()
+
+        if incremental:
+            df = self._since_high_water_mark(self.DAILY_COUNTS_RESOURCE, df, 'dt')
+            if not self.upsert_parquet(df, parquet_path, 'dt', ['location_dir_id', 'dt']):
+                self._record_resources(validators, {})
+                return
+            self.changed_since['counts_daily'] = df['dt'].min()
+        else:
+            self.df_to_parquet(df, parquet_path, overwrite=True)
+            self.changed_since['counts_daily'] = None
+
+        self._record_resources(
+            validators,
+            {self.DAILY_COUNTS_RESOURCE: df['dt'].max()} if len(df) else {}
+        )
 
-    async def counts_daily_by_location_name_to_parquet(self) -> None: 
-        names_df = gpd.read_file("./data/counter_groups.geojson")
-        names_df['coordinates'] = names_df['geometry'].apply(
-            lambda geo: str (list(list(geo.coords)[0]))
+        if incremental:
+            # The index covers the whole history
+            df = pd.read_parquet(parquet_path, columns=['location_dir_id', 'dt', 'daily_volume'])
+
+        volume_index = build_daily_volume_index(
+            df,
+            time_col='dt',
+            key_col='location_dir_id',
+            value_col='daily_volume'
         )
-        names_df = names_df[['name', 'location_dir_ids', 'coordinates']]
-        names_df = names_df.explode('location_dir_ids')
-        names_df.rename(columns={'location_dir_ids': 'location_dir_id'}, inplace=True)
-        names_df['location_dir_id'] = names_df['location_dir_id'].astype('int64')
-
-        counts_response = await self.get_daily_counts()
-        counts_df = pd.DataFrame([r.model_dump() for r in counts_response])
-        counts_df['location_dir_id'] = counts_df['location_dir_id'].astype('int64')
-
-        merged_df = pd.merge(
-            counts_df,
-            names_df,
-            on='location_dir_id',
-            how='left'
+        self.arrays_to_npz(volume_index, COUNTS_DAILY_VOLUME_INDEX_FILE, overwrite=True)
+
+    async def counts_daily_by_location_name_to_parquet(self) -> None: 
+        parquet_path = COUNTS_DAILY_BY_LOCATION_NAME_FILE
+        if not self._needs_rebuild('counts_daily', 'counter_groups'):
+            print(f"{parquet_path} is up to date. Skipping.")
+            return
+        cutoff = self._rebuild_cutoff(parquet_path, 'counts_daily', 'counter_groups')
+
+        # Reuse the counts written by counts_daily_to_parquet instead of downloading them again
+        counts_df = self._read_parquet_since(
+            COUNTS_DAILY_FILE, ['location_dir_id', 'dt', 'daily_volume'], 'dt', cutoff
         )
 
         GROUP_COLS = ['name', 'coordinates', 'dt']
-        aggregated_df = merged_df.groupby(GROUP_COLS).agg(
-            location_dir_ids=('location_dir_id', list),
-            daily_volume=('daily_volume', 'sum')
-        ).reset_index() # Use reset_index() to turn the GroupBy keys back into columns
-        # Convert the list of location_dir_ids to a JSON string for Parquet/storage
-        aggregated_df['location_dir_ids'] = aggregated_df['location_dir_ids'].astype(str)
+        aggregated_df = aggregate_by_location_group(self._location_groups(), counts_df, 'dt', 'daily_volume')
         aggregated_df['dt'] = pd.to_datetime(aggregated_df['dt'])
         final_df = aggregated_df[['name', 'coordinates', 'dt', 'daily_volume', 'location_dir_ids']]
         
-        self.df_to_parquet(final_df, "./data/counts_daily_by_location_name.parquet", overwrite=True)
-
-    async def counts_daily_chart_to_parquet(self) -> None:       
-        df = pd.read_parquet(COUNTS_DAILY_FILE)
+        if cutoff is None:
+            self.df_to_parquet(final_df, parquet_path, overwrite=True)
+        else:
+            # Only the days from the cutoff on were recomputed
+            self.upsert_parquet(final_df, parquet_path, 'dt', GROUP_COLS)
+        self.changed_since['counts_daily_by_location_name'] = cutoff
+
+    async def counts_daily_chart_to_npz(self) -> None:
+        if not self._needs_rebuild('counts_daily'):
+            print("Daily chart is up to date. Skipping.")
+            return
+
+        df = pd.read_parquet(COUNTS_DAILY_FILE, columns=['location_name', 'dt', 'daily_volume'])
         df['location_name'] = df['location_name'].str.replace(' (retired)', '', regex=False)
-        df['dt'] = pd.to_datetime(df['dt'])
-        
-        df_pivot = (
-            df.groupby(['dt', 'location_name'])['daily_volume']
-            .sum()
-            .unstack(level='location_name')
+
+        chart = build_daily_chart(
+            df,
+            time_col='dt',
+            key_col='location_name',
+            value_col='daily_volume'
         )
-        
-        all_dates = pd.date_range(start=df_pivot.index.min(), end=df_pivot.index.max(), freq='D')
-        df_pivot = df_pivot.reindex(all_dates)
-        df_pivot = df_pivot.sort_index(axis=1)
-        df_pivot.index = df_pivot.index.strftime('%Y-%m-%d')
-        df_pivot.index.name = 'date'
-        
-        self.df_to_parquet(df_pivot, "./data/counts_daily_chart.parquet", overwrite=True)
+        self.arrays_to_npz(chart, COUNTS_DAILY_CHART_FILE, overwrite=True)
 
     async def load_counter_locations_into_sqlite(self):
-        os.makedirs(os.path.dirname(self.DB_PATH), exist_ok=True)
-
-        with sqlite3.connect(self.DB_PATH) as conn:
+        with self.sqlite_connection() as conn:
             cursor = conn.cursor()
 
             cursor.execute('''
@@ -260,9 +613,6 @@ class BicycleCountersLoader(BicycleCountersClient, ParquetLoader, JsonLoader):
                 )
             ''')
 
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_location_dir_id ON bicycle_counters(location_dir_id)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_direction ON bicycle_counters(direction)")
-
             insert_sql = '''
                 INSERT OR REPLACE INTO bicycle_counters (
                     id, bin_size, centreline_id, date_decommissioned, direction,
@@ -293,15 +643,17 @@ class BicycleCountersLoader(BicycleCountersClient, ParquetLoader, JsonLoader):
                 for loc in await self.get_counter_locations()
             ]
 
-            cursor.executemany(insert_sql, rows)
+            with self.loading_table(conn, 'bicycle_counters', [
+                ('idx_location_dir_id', 'location_dir_id'),
+                ('idx_direction', 'direction'),
+            ]):
+                self.insert_batch(conn, insert_sql, rows)
             print(f"Inserted/Updated {len(rows)} counter location records.")
 
         return len(rows)
     
     def load_location_groups_into_sqlite(self) -> int:
-        os.makedirs(os.path.dirname(self.DB_PATH), exist_ok=True)
-
-        with sqlite3.connect(self.DB_PATH) as conn:
+        with self.sqlite_connection() as conn:
             cursor = conn.cursor()
 
             cursor.execute('''
@@ -322,18 +674,16 @@ class BicycleCountersLoader(BicycleCountersClient, ParquetLoader, JsonLoader):
                 order by REPLACE(location_name, ' (retired)', '')
             """
 
-            cursor.execute(insert_sql)
+            with self.loading_table(conn, 'location_groups'):
+                cursor.execute(insert_sql)
             print(f"Inserted/updated location_groups records.")
     
     async def load_daily_counts_into_sqlite(self) -> int:
-        # 1. Ensure database directory exists
-        os.makedirs(os.path.dirname(self.DB_PATH), exist_ok=True)
-
-        # 2. Connect to the database
-        with sqlite3.connect(self.DB_PATH) as conn:
+        # 1. Connect to the database (creating its directory)
+        with self.sqlite_connection() as conn:
             cursor = conn.cursor()
 
-            # 3. Create the table
+            # 2. Create the table
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS daily_bicycle_counts (
                     record_id INTEGER PRIMARY KEY,
@@ -347,12 +697,7 @@ class BicycleCountersLoader(BicycleCountersClient, ParquetLoader, JsonLoader):
                 )
             ''')
 
-            # 4. Create indexes for common lookups
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_daily_location_dir_id ON daily_bicycle_counts(location_dir_id)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_daily_dt ON daily_bicycle_counts(dt)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_daily_direction ON daily_bicycle_counts(direction)")
-
-            # 5. Define the INSERT statement
+            # 3. Define the INSERT statement
             insert_sql = '''
                 INSERT OR REPLACE INTO daily_bicycle_counts (
                     record_id, location_dir_id, location_name, direction,
@@ -360,39 +705,38 @@ class BicycleCountersLoader(BicycleCountersClient, ParquetLoader, JsonLoader):
                 ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
             '''
 
-            # 6. Prepare the data rows
+            # 4. Prepare the data rows
             # The date object (dt) must be converted back to an ISO string for SQLite storage.
-            daily_counts = await self.get_daily_counts()
+            daily_counts = await self.get_daily_counts_frame()
             
-            rows = [
-                (
-                    count.record_id,
-                    count.location_dir_id,
-                    count.location_name,
-                    count.direction,
-                    count.linear_name_full,
-                    count.side_street,
-                    count.dt.isoformat(),  # Convert datetime.date back to string for storage
-                    count.daily_volume,
-                )
-                for count in daily_counts
-            ]
-
-            # 7. Execute the bulk insert
-            cursor.executemany(insert_sql, rows)
+            rows = list(zip(
+                daily_counts['record_id'].tolist(),
+                daily_counts['location_dir_id'].tolist(),
+                daily_counts['location_name'].tolist(),
+                daily_counts['direction'].tolist(),
+                daily_counts['linear_name_full'].tolist(),
+                daily_counts['side_street'].tolist(),
+                daily_counts['dt'].dt.strftime('%Y-%m-%dT%H:%M:%S').tolist(),  # Convert back to an ISO string for storage
+                daily_counts['daily_volume'].tolist(),
+            ))
+
+            # 5. Insert the rows, then create the indexes for common lookups
+            with self.loading_table(conn, 'daily_bicycle_counts', [
+                ('idx_daily_location_dir_id', 'location_dir_id'),
+                ('idx_daily_dt', 'dt'),
+                ('idx_daily_direction', 'direction'),
+            ]):
+                self.insert_batch(conn, insert_sql, rows)
             print(f"Inserted/Updated {len(rows)} daily bicycle count records.")
 
         return len(rows)
     
     async def load_15m_counts_into_sqlite(self) -> int:
-        # 1. Ensure database directory exists
-        os.makedirs(os.path.dirname(self.DB_PATH), exist_ok=True)
-
-        # 2. Connect to the database
-        with sqlite3.connect(self.DB_PATH) as conn:
+        # 1. Connect to the database (creating its directory)
+        with self.sqlite_connection() as conn:
             cursor = conn.cursor()
 
-            # 3. Create the table
+            # 2. Create the table
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS fifteen_min_bicycle_counts (
                     record_id INTEGER,
@@ -403,41 +747,40 @@ class BicycleCountersLoader(BicycleCountersClient, ParquetLoader, JsonLoader):
                 )
             ''')
 
-            # 4. Create indexes for common lookups
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_15m_location_dir_id ON fifteen_min_bicycle_counts(location_dir_id)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_15m_datetime_bin ON fifteen_min_bicycle_counts(datetime_bin)")
-
-            # 5. Define the INSERT statement
+            # 3. Define the INSERT statement
             insert_sql = '''
                 INSERT OR REPLACE INTO fifteen_min_bicycle_counts (
                     record_id, location_dir_id, datetime_bin, bin_volume
                 ) VALUES (?, ?, ?, ?)
             '''
 
-            # 6. Prepare the data rows
-            # The datetime object (datetime_bin) must be converted back to an ISO string for SQLite storage.
-            counts_15m = await self.get_15m_counts()
-            
-            rows = [
-                (
-                    count.record_id,
-                    count.location_dir_id,
-                    count.datetime_bin.isoformat(sep=' '),  # Convert datetime.datetime back to string for storage
-                    count.bin_volume,
-                )
-                for count in counts_15m
-            ]
-
-            # 7. Execute the bulk insert
-            cursor.executemany(insert_sql, rows)
-            print(f"Inserted/Updated {len(rows)} fifteen-minute bicycle count records.")
-
-        return len(rows)
+            # 4. Stream the counts and insert them batch by batch, then create
+            # the indexes for common lookups
+            # datetime_bin is converted back to an ISO string for SQLite storage.
+            inserted = 0
+            with self.loading_table(conn, 'fifteen_min_bicycle_counts', [
+                ('idx_15m_location_dir_id', 'location_dir_id'),
+                ('idx_15m_datetime_bin', 'datetime_bin'),
+            ]):
+                async for _, batch in self.iter_15m_count_batches():
+                    # Inserting in primary key order keeps the B-tree writes local
+                    batch = batch.sort_values(['location_dir_id', 'datetime_bin'])
+                    datetime_bins = pd.Series(np.datetime_as_string(batch['datetime_bin'].to_numpy(), unit='s'))
+                    rows = zip(
+                        batch['record_id'].tolist(),
+                        batch['location_dir_id'].tolist(),
+                        datetime_bins.str.replace('T', ' ', regex=False).tolist(),
+                        batch['bin_volume'].tolist(),
+                    )
+                    self.insert_batch(conn, insert_sql, rows)
+                    inserted += len(batch)
+
+            print(f"Inserted/Updated {inserted} fifteen-minute bicycle count records.")
+
+        return inserted
     
     def load_fifteen_min_counts_by_year_and_month_into_sqlite(self) -> int:
-        os.makedirs(os.path.dirname(self.DB_PATH), exist_ok=True)
-
-        with sqlite3.connect(self.DB_PATH) as conn:
+        with self.sqlite_connection() as conn:
             cursor = conn.cursor()
 
             cursor.execute('''
@@ -451,8 +794,6 @@ class BicycleCountersLoader(BicycleCountersClient, ParquetLoader, JsonLoader):
                 )
             ''')
 
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_15m_ym_location_dir_id ON fifteen_min_counts_by_year_and_month(location_dir_id)")
-
             insert_sql = '''
                 INSERT OR REPLACE INTO fifteen_min_counts_by_year_and_month (
                     location_dir_id, year, month, time, avg_vol
@@ -469,13 +810,14 @@ class BicycleCountersLoader(BicycleCountersClient, ParquetLoader, JsonLoader):
                 order by location_dir_id, year, month, time
             '''
 
-            cursor.execute(insert_sql)
+            with self.loading_table(conn, 'fifteen_min_counts_by_year_and_month', [
+                ('idx_15m_ym_location_dir_id', 'location_dir_id'),
+            ]):
+                cursor.execute(insert_sql)
             print(f"Inserted/Updated fifteen_min_counts_by_year_and_month records.")
     
     def load_annual_counts_into_sqlite(self) -> int:
-        os.makedirs(os.path.dirname(self.DB_PATH), exist_ok=True)
-
-        with sqlite3.connect(self.DB_PATH) as conn:
+        with self.sqlite_connection() as conn:
             cursor = conn.cursor()
 
             cursor.execute('''
@@ -488,10 +830,6 @@ class BicycleCountersLoader(BicycleCountersClient, ParquetLoader, JsonLoader):
                 )
             ''')
 
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_annual_location_dir_id ON annual_bicycle_counts(location_dir_id)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_annual_year ON annual_bicycle_counts(year)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_annual_volume ON annual_bicycle_counts(volume)")
-
             insert_sql = '''
                 INSERT OR REPLACE INTO annual_bicycle_counts (
                     year, location_dir_id, location_name, volume
@@ -502,13 +840,16 @@ class BicycleCountersLoader(BicycleCountersClient, ParquetLoader, JsonLoader):
                 order by location_name, cast(location_dir_id as integer), "year" 
             '''
 
-            cursor.execute(insert_sql)
+            with self.loading_table(conn, 'annual_bicycle_counts', [
+                ('idx_annual_location_dir_id', 'location_dir_id'),
+                ('idx_annual_year', 'year'),
+                ('idx_annual_volume', 'volume'),
+            ]):
+                cursor.execute(insert_sql)
             print(f"Inserted/Updated annual bicycle count records.")
 
     def load_monthly_counts_into_sqlite(self) -> int:
-        os.makedirs(os.path.dirname(self.DB_PATH), exist_ok=True)
-
-        with sqlite3.connect(self.DB_PATH) as conn:
+        with self.sqlite_connection() as conn:
             cursor = conn.cursor()
 
             cursor.execute('''
@@ -521,11 +862,6 @@ class BicycleCountersLoader(BicycleCountersClient, ParquetLoader, JsonLoader):
                 )
             ''')
 
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_monthly_location_dir_id ON monthly_bicycle_counts(location_dir_id)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_monthly_year ON monthly_bicycle_counts(year)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_monthly_month ON monthly_bicycle_counts(month)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_monthly_volume ON monthly_bicycle_counts(volume)")
-
             insert_sql = """
                 INSERT OR REPLACE INTO monthly_bicycle_counts (
                     year, month, location_dir_id, volume
@@ -537,13 +873,17 @@ class BicycleCountersLoader(BicycleCountersClient, ParquetLoader, JsonLoader):
                 order by cast(location_dir_id as integer), year, month
             """
 
-            cursor.execute(insert_sql)
+            with self.loading_table(conn, 'monthly_bicycle_counts', [
+                ('idx_monthly_location_dir_id', 'location_dir_id'),
+                ('idx_monthly_year', 'year'),
+                ('idx_monthly_month', 'month'),
+                ('idx_monthly_volume', 'volume'),
+            ]):
+                cursor.execute(insert_sql)
             print(f"Inserted/Updated monthly bicycle count records.")
 
     def load_hourly_counts_into_sqlite(self) -> int:
-        os.makedirs(os.path.dirname(self.DB_PATH), exist_ok=True)
-
-        with sqlite3.connect(self.DB_PATH) as conn:
+        with self.sqlite_connection() as conn:
             cursor = conn.cursor()
 
             cursor.execute('''
@@ -556,11 +896,6 @@ class BicycleCountersLoader(BicycleCountersClient, ParquetLoader, JsonLoader):
                 )
             ''')
 
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_hourly_location_dir_id ON hourly_bicycle_counts(location_dir_id)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_hourly_date ON hourly_bicycle_counts(date)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_hourly_hour ON hourly_bicycle_counts(hour)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_hourly_volume ON hourly_bicycle_counts(volume)")
-
             insert_sql = """
                 INSERT OR REPLACE INTO hourly_bicycle_counts (
                     date, hour, location_dir_id, volume
@@ -574,194 +909,310 @@ class BicycleCountersLoader(BicycleCountersClient, ParquetLoader, JsonLoader):
                 order by cast(location_dir_id as integer), date, hour
             """
 
-            cursor.execute(insert_sql)
+            with self.loading_table(conn, 'hourly_bicycle_counts', [
+                ('idx_hourly_location_dir_id', 'location_dir_id'),
+                ('idx_hourly_date', 'date'),
+                ('idx_hourly_hour', 'hour'),
+                ('idx_hourly_volume', 'volume'),
+            ]):
+                cursor.execute(insert_sql)
             print(f"Inserted/Updated hourly bicycle count records.")
 
-    def load_location_group_stats_overall_into_sqlite(self) -> int:
-        os.makedirs(os.path.dirname(self.DB_PATH), exist_ok=True)
-
-        with sqlite3.connect(self.DB_PATH) as conn:
+    def load_location_group_stats_into_sqlite(self) -> None:
+        """
+        Builds the location_group_stats_overall/yearly/monthly/weekly tables
+        from daily_bicycle_counts, reading it once for every granularity (see
+        build_location_group_stats). The overall stats are combined from the
+        yearly ones.
+
+        In incremental runs (outside bulk load mode) only the years from the
+        earliest daily count changed this run on are read and recomputed;
+        the stats of earlier periods are kept.
+        """
+        if not self._needs_rebuild('counts_daily'):
+            print("Daily counts are unchanged. Skipping location_group_stats tables.")
+            return
+
+        with self.sqlite_connection() as conn:
             cursor = conn.cursor()
 
-            cursor.execute('''
-                create table IF NOT EXISTS location_group_stats_overall (
-                    location_name text primary key,
-                    location_dir_ids text,
-                    first_active text,
-                    last_active text,
-                    days_bw_first_last integer,
-                    days_active integer,
-                    prct_active_days real,
-                    total_vol integer,
-                    avg_daily_vol real
+            for create_sql in LOCATION_GROUP_STATS_TABLES.values():
+                cursor.execute(create_sql)
+
+            since_year = None
+            cutoff = self.changed_since.get('counts_daily')
+            tables_built = cursor.execute("select count(*) from location_group_stats_yearly").fetchone()[0] > 0
+            if self.incremental and not self.bulk_load and cutoff is not None and tables_built:
+                since_year = f"{cutoff.year:04d}"
+
+            query = "select record_id, location_name, location_dir_id, dt, daily_volume from daily_bicycle_counts"
+            params = ()
+            if since_year is not None:
+                # dt is indexed, so this is a range scan
+                query += " where dt >= ?"
+                params = (f"{since_year}-01-01",)
+            df = pd.read_sql_query(query, conn, params=params)
+            df['dt'] = pd.to_datetime(df['dt'], format='ISO8601')
+            print(f"Aggregating {len(df)} daily count records into location_group_stats tables...")
+
+            stats = build_location_group_stats(df)
+
+            yearly = stats['yearly']
+            if since_year is not None:
+                kept_years = pd.read_sql_query(
+                    "select * from location_group_stats_yearly where year < ?", conn, params=(since_year,)
                 )
+                yearly = pd.concat([kept_years, yearly], ignore_index=True)
+            # Overall location_dir_ids list the counters by their first record
+            # of all time, which the years read above may not include
+            counters = pd.read_sql_query(
+                "select location_name, location_dir_id, min(record_id) record_id "
+                "from daily_bicycle_counts group by location_name, location_dir_id",
+                conn
+            )
+            stats['overall'] = combine_location_group_stats(yearly, counters)
+
+            for granularity, frame in stats.items():
+                table_name = f"location_group_stats_{granularity}"
+                with self.loading_table(conn, table_name):
+                    if since_year is not None and granularity != 'overall':
+                        cursor.execute(f"delete from {table_name} where year >= ?", (since_year,))
+                    elif not self.bulk_load:
+                        cursor.execute(f"delete from {table_name}")
+
+                    columns = list(frame.columns)
+                    insert_sql = f"""
+                        INSERT OR REPLACE INTO {table_name} ({', '.join(columns)})
+                        VALUES ({', '.join('?' for _ in columns)})
+                    """
+                    self.insert_batch(conn, insert_sql, zip(*(frame[col].tolist() for col in columns)))
+                print(f"Inserted/updated {len(frame)} {table_name} records.")
+
+    # do seasonal, weekly, counts 
+    # group retired and current counters in the same spot--create grouping table with location ids
+
+    # Integer schema: the *_epoch tables hold the same counts with integer
+    # location_dir_ids and times (days or seconds since 1970-01-01, of the
+    # published local time), and calendar columns computed on insert. The
+    # aggregates are built from covering indexes, in index order, without
+    # per-row date parsing. The calendar columns are plain columns rather
+    # than generated ones, since SQLite doesn't treat an index holding a
+    # generated column as covering and would look up every row in the table.
+    # Every builder fills its table in full, so a table whose schema differs
+    # from the one below (built by an earlier version) is dropped and rebuilt.
+
+    async def load_daily_counts_into_epoch_sqlite(self) -> int:
+        with self.sqlite_connection() as conn:
+            self.create_table(conn, 'daily_bicycle_counts_epoch', '''
+                CREATE TABLE IF NOT EXISTS daily_bicycle_counts_epoch (
+                    location_dir_id INTEGER NOT NULL,
+                    dt INTEGER NOT NULL,       -- Days since 1970-01-01
+                    record_id INTEGER,
+                    location_name TEXT,
+                    direction TEXT,
+                    linear_name_full TEXT,
+                    side_street TEXT,
+                    daily_volume INTEGER,
+                    year INTEGER NOT NULL,
+                    month INTEGER NOT NULL,
+                    PRIMARY KEY (location_dir_id, dt)
+                ) WITHOUT ROWID
             ''')
 
-            insert_sql = """
-                INSERT OR REPLACE INTO location_group_stats_overall (
-                    location_name, location_dir_ids, first_active, last_active, days_bw_first_last,
-                    days_active, prct_active_days, total_vol, avg_daily_vol
-                ) 
-                select 
-                    REPLACE(TRIM(dbc.location_name), ' (retired)', '') location_name,
-                    JSON_GROUP_ARRAY(distinct cast(dbc.location_dir_id as integer)) location_dir_ids,
-                    MIN(dbc.dt) as first_active,
-                    MAX(dbc.dt) as last_active,
-                    JULIANDAY(max(dbc.dt)) - JULIANDAY(min(dbc.dt)) + 1 as days_bw_first_last,
-                    count(distinct dt) as days_active,	
-                    count(distinct dt)/(JULIANDAY(max(dbc.dt)) - JULIANDAY(min(dbc.dt)) + 1) as prct_active_days,
-                    sum(daily_volume) total_vol,
-                    sum(daily_volume)/count(distinct dt) avg_daily_vol
-                from daily_bicycle_counts dbc 
-                GROUP BY REPLACE(TRIM(dbc.location_name), ' (retired)', '')
-                order by avg_daily_vol desc
-            """
+            insert_sql = '''
+                INSERT OR REPLACE INTO daily_bicycle_counts_epoch (
+                    location_dir_id, dt, record_id, location_name, direction,
+                    linear_name_full, side_street, daily_volume, year, month
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            '''
+
+            daily_counts = await self.get_daily_counts_frame()
+            days = daily_counts['dt'].to_numpy(dtype='datetime64[D]')
+            year, month = self._calendar_columns(days)
+            rows = list(zip(
+                daily_counts['location_dir_id'].astype('int64').tolist(),
+                days.astype('int64').tolist(),
+                daily_counts['record_id'].tolist(),
+                daily_counts['location_name'].tolist(),
+                daily_counts['direction'].tolist(),
+                daily_counts['linear_name_full'].tolist(),
+                daily_counts['side_street'].tolist(),
+                daily_counts['daily_volume'].tolist(),
+                year.tolist(),
+                month.tolist(),
+            ))
+
+            with self.loading_table(conn, 'daily_bicycle_counts_epoch', [
+                ('idx_daily_epoch_dt', 'dt'),
+                # Covers the monthly and annual aggregates
+                ('idx_daily_epoch_year_month', 'location_dir_id, year, month, daily_volume'),
+            ]):
+                self.insert_batch(conn, insert_sql, rows)
+            print(f"Inserted/Updated {len(rows)} daily bicycle count records (epoch schema).")
+
+        return len(rows)
 
-            cursor.execute(insert_sql)
-            print(f"Inserted/updated location_group_stats_overall records.")
+    async def load_15m_counts_into_epoch_sqlite(self) -> int:
+        with self.sqlite_connection() as conn:
+            self.create_table(conn, 'fifteen_min_bicycle_counts_epoch', '''
+                CREATE TABLE IF NOT EXISTS fifteen_min_bicycle_counts_epoch (
+                    location_dir_id INTEGER NOT NULL,
+                    datetime_bin INTEGER NOT NULL,     -- Seconds since 1970-01-01
+                    record_id INTEGER,
+                    bin_volume INTEGER,
+                    hour INTEGER NOT NULL,         -- Hours since 1970-01-01
+                    time_of_day INTEGER NOT NULL,  -- Seconds since midnight
+                    year INTEGER NOT NULL,
+                    month INTEGER NOT NULL,
+                    PRIMARY KEY (location_dir_id, datetime_bin)
+                ) WITHOUT ROWID
+            ''')
 
-    def load_location_group_stats_yearly_into_sqlite(self) -> int:
-        os.makedirs(os.path.dirname(self.DB_PATH), exist_ok=True)
+            insert_sql = '''
+                INSERT OR REPLACE INTO fifteen_min_bicycle_counts_epoch (
+                    location_dir_id, datetime_bin, record_id, bin_volume,
+                    hour, time_of_day, year, month
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            '''
 
-        with sqlite3.connect(self.DB_PATH) as conn:
+            inserted = 0
+            with self.loading_table(conn, 'fifteen_min_bicycle_counts_epoch', [
+                ('idx_15m_epoch_datetime_bin', 'datetime_bin'),
+                # Cover the hourly and year/month/time of day aggregates
+                ('idx_15m_epoch_hour', 'location_dir_id, hour, bin_volume'),
+                ('idx_15m_epoch_year_month', 'location_dir_id, year, month, time_of_day, bin_volume'),
+            ]):
+                async for _, batch in self.iter_15m_count_batches():
+                    location_dir_ids = batch['location_dir_id'].astype('int64').to_numpy()
+                    seconds = batch['datetime_bin'].to_numpy(dtype='datetime64[s]')
+                    datetime_bins = seconds.astype('int64')
+                    year, month = self._calendar_columns(seconds)
+                    # Inserting in primary key order keeps the B-tree writes local
+                    order = np.lexsort((datetime_bins, location_dir_ids))
+                    rows = zip(
+                        location_dir_ids[order].tolist(),
+                        datetime_bins[order].tolist(),
+                        batch['record_id'].to_numpy()[order].tolist(),
+                        batch['bin_volume'].to_numpy()[order].tolist(),
+                        (datetime_bins[order] // 3600).tolist(),
+                        (datetime_bins[order] % 86400).tolist(),
+                        year[order].tolist(),
+                        month[order].tolist(),
+                    )
+                    self.insert_batch(conn, insert_sql, rows)
+                    inserted += len(batch)
+
+            print(f"Inserted/Updated {inserted} fifteen-minute bicycle count records (epoch schema).")
+
+        return inserted
+
+    @staticmethod
+    def _calendar_columns(times: np.ndarray):
+        """Returns the (year, month) integer columns of a datetime64 array."""
+        months = times.astype('datetime64[M]').astype('int64')
+        return months // 12 + 1970, months % 12 + 1
+
+    def load_hourly_counts_into_epoch_sqlite(self) -> None:
+        with self.sqlite_connection() as conn:
             cursor = conn.cursor()
 
-            cursor.execute('''
-                create table IF NOT EXISTS location_group_stats_yearly (
-                    location_name text,
-                    year text,
-                    location_dir_ids text,
-                    first_active text,
-                    last_active text,
-                    days_bw_first_last integer,
-                    days_active integer,
-                    prct_active_days real,
-                    total_vol integer,
-                    avg_daily_vol real,
-                    primary key (location_name, year)
-                )
+            self.create_table(conn, 'hourly_bicycle_counts_epoch', '''
+                CREATE TABLE IF NOT EXISTS hourly_bicycle_counts_epoch (
+                    location_dir_id INTEGER NOT NULL,
+                    hour INTEGER NOT NULL,     -- Hours since 1970-01-01
+                    volume INTEGER,
+                    dt INTEGER NOT NULL,       -- Days since 1970-01-01
+                    hour_of_day INTEGER NOT NULL,
+                    PRIMARY KEY (location_dir_id, hour)
+                ) WITHOUT ROWID
             ''')
 
-            insert_sql = """
-                INSERT OR REPLACE INTO location_group_stats_yearly (
-                    location_name, year, location_dir_ids, first_active, last_active, days_bw_first_last,
-                    days_active, prct_active_days, total_vol, avg_daily_vol
-                ) 
-                select 
-                    REPLACE(TRIM(dbc.location_name), ' (retired)', '') location_name,
-                    STRFTIME('%Y', dt) year,
-                    JSON_GROUP_ARRAY(distinct cast(dbc.location_dir_id as integer)) location_dir_ids,
-                    MIN(dbc.dt) as first_active,
-                    MAX(dbc.dt) as last_active,
-                    JULIANDAY(max(dbc.dt)) - JULIANDAY(min(dbc.dt)) + 1 as days_bw_first_last,
-                    count(distinct dt) as days_active,	
-                    count(distinct dt)/(JULIANDAY(max(dbc.dt)) - JULIANDAY(min(dbc.dt)) + 1) as prct_active_days,
-                    sum(daily_volume) total_vol,
-                    sum(daily_volume)/count(distinct dt) avg_daily_vol
-                from daily_bicycle_counts dbc 
-                GROUP BY REPLACE(TRIM(dbc.location_name), ' (retired)', ''), year
-                order by location_name, year
-            """
+            # Scans idx_15m_epoch_hour in order: no table lookups or sorting
+            insert_sql = '''
+                INSERT OR REPLACE INTO hourly_bicycle_counts_epoch (
+                    location_dir_id, hour, volume, dt, hour_of_day
+                )
+                select location_dir_id, hour, sum(bin_volume) volume, hour / 24 dt, hour % 24 hour_of_day
+                from fifteen_min_bicycle_counts_epoch
+                group by location_dir_id, hour
+            '''
 
-            cursor.execute(insert_sql)
-            print(f"Inserted/updated location_group_stats_yearly records.")
-    
-    def load_location_group_stats_monthly_into_sqlite(self) -> int:
-        os.makedirs(os.path.dirname(self.DB_PATH), exist_ok=True)
+            with self.loading_table(conn, 'hourly_bicycle_counts_epoch', [
+                ('idx_hourly_epoch_dt', 'dt'),
+            ]):
+                cursor.execute(insert_sql)
+            print(f"Inserted/Updated hourly bicycle count records (epoch schema).")
 
-        with sqlite3.connect(self.DB_PATH) as conn:
+    def load_monthly_counts_into_epoch_sqlite(self) -> None:
+        with self.sqlite_connection() as conn:
             cursor = conn.cursor()
 
-            cursor.execute('''
-                create table IF NOT EXISTS location_group_stats_monthly (
-                    location_name text,
-                    year text,
-                    month text,
-                    location_dir_ids text,
-                    first_active text,
-                    last_active text,
-                    days_bw_first_last integer,
-                    days_active integer,
-                    prct_active_days real,
-                    total_vol integer,
-                    avg_daily_vol real,
-                    primary key (location_name, year, month)
-                )
+            self.create_table(conn, 'monthly_bicycle_counts_epoch', '''
+                CREATE TABLE IF NOT EXISTS monthly_bicycle_counts_epoch (
+                    location_dir_id INTEGER NOT NULL,
+                    year INTEGER NOT NULL,
+                    month INTEGER NOT NULL,
+                    volume INTEGER,
+                    PRIMARY KEY (location_dir_id, year, month)
+                ) WITHOUT ROWID
             ''')
 
-            insert_sql = """
-                INSERT OR REPLACE INTO location_group_stats_monthly (
-                    location_name, year, month, location_dir_ids, first_active, last_active, days_bw_first_last,
-                    days_active, prct_active_days, total_vol, avg_daily_vol
-                ) 
-                select 
-                    REPLACE(TRIM(dbc.location_name), ' (retired)', '') location_name,
-                    STRFTIME('%Y', dt) year,
-                    STRFTIME('%m', dt) month,
-                    JSON_GROUP_ARRAY(distinct cast(dbc.location_dir_id as integer)) location_dir_ids,
-                    MIN(dbc.dt) as first_active,
-                    MAX(dbc.dt) as last_active,
-                    JULIANDAY(max(dbc.dt)) - JULIANDAY(min(dbc.dt)) + 1 as days_bw_first_last,
-                    count(distinct dt) as days_active,	
-                    count(distinct dt)/(JULIANDAY(max(dbc.dt)) - JULIANDAY(min(dbc.dt)) + 1) as prct_active_days,
-                    sum(daily_volume) total_vol,
-                    sum(daily_volume)/count(distinct dt) avg_daily_vol
-                from daily_bicycle_counts dbc 
-                GROUP BY REPLACE(TRIM(dbc.location_name), ' (retired)', ''), year, month
-                order by location_name, year, month
-            """
-
-            cursor.execute(insert_sql)
-            print(f"Inserted/updated location_group_stats_monthly records.")
+            # Scans idx_daily_epoch_year_month in order: no table lookups or sorting
+            insert_sql = '''
+                INSERT OR REPLACE INTO monthly_bicycle_counts_epoch (
+                    location_dir_id, year, month, volume
+                )
+                select location_dir_id, year, month, sum(daily_volume) volume
+                from daily_bicycle_counts_epoch
+                group by location_dir_id, year, month
+            '''
 
-    def load_location_group_stats_weekly_into_sqlite(self) -> int:
-        os.makedirs(os.path.dirname(self.DB_PATH), exist_ok=True)
+            with self.loading_table(conn, 'monthly_bicycle_counts_epoch', [
+                ('idx_monthly_epoch_year_month', 'year, month'),
+            ]):
+                cursor.execute(insert_sql)
+            print(f"Inserted/Updated monthly bicycle count records (epoch schema).")
 
-        with sqlite3.connect(self.DB_PATH) as conn:
+    def load_fifteen_min_counts_by_year_and_month_into_epoch_sqlite(self) -> None:
+        with self.sqlite_connection() as conn:
             cursor = conn.cursor()
 
-            cursor.execute('''
-                create table IF NOT EXISTS location_group_stats_weekly (
-                    location_name text,
-                    year text,
-                    month text,
-                    week text, 
-                    location_dir_ids text,
-                    first_active text,
-                    last_active text,
-                    days_bw_first_last integer,
-                    days_active integer,
-                    prct_active_days real,
-                    total_vol integer,
-                    avg_daily_vol real,
-                    primary key (location_name, year, month, week)
-                )
+            self.create_table(conn, 'fifteen_min_counts_by_year_and_month_epoch', '''
+                CREATE TABLE IF NOT EXISTS fifteen_min_counts_by_year_and_month_epoch (
+                    location_dir_id INTEGER NOT NULL,
+                    year INTEGER NOT NULL,
+                    month INTEGER NOT NULL,
+                    time_of_day INTEGER NOT NULL,  -- Seconds since midnight
+                    avg_vol REAL,
+                    PRIMARY KEY (location_dir_id, year, month, time_of_day)
+                ) WITHOUT ROWID
             ''')
 
-            insert_sql = """
-                INSERT OR REPLACE INTO location_group_stats_weekly (
-                    location_name, year, month, week, location_dir_ids, first_active, last_active, days_bw_first_last,
-                    days_active, prct_active_days, total_vol, avg_daily_vol
-                ) 
-                select 
-                    REPLACE(TRIM(dbc.location_name), ' (retired)', '') location_name,
-                    STRFTIME('%Y', dt) year,
-                    STRFTIME('%m', dt) month,
-                    STRFTIME('%W', dt) week,
-                    JSON_GROUP_ARRAY(distinct cast(dbc.location_dir_id as integer)) location_dir_ids,
-                    MIN(dbc.dt) as first_active,
-                    MAX(dbc.dt) as last_active,
-                    JULIANDAY(max(dbc.dt)) - JULIANDAY(min(dbc.dt)) + 1 as days_bw_first_last,
-                    count(distinct dt) as days_active,	
-                    count(distinct dt)/(JULIANDAY(max(dbc.dt)) - JULIANDAY(min(dbc.dt)) + 1) as prct_active_days,
-                    sum(daily_volume) total_vol,
-                    sum(daily_volume)/count(distinct dt) avg_daily_vol
-                from daily_bicycle_counts dbc 
-                GROUP BY REPLACE(TRIM(dbc.location_name), ' (retired)', ''), year, month, week
-                order by location_name, year, month, week
-            """
+            # Scans idx_15m_epoch_year_month in order: no table lookups or sorting
+            insert_sql = '''
+                INSERT OR REPLACE INTO fifteen_min_counts_by_year_and_month_epoch (
+                    location_dir_id, year, month, time_of_day, avg_vol
+                )
+                select location_dir_id, year, month, time_of_day, avg(bin_volume) avg_vol
+                from fifteen_min_bicycle_counts_epoch
+                where year >= 2023
+                group by location_dir_id, year, month, time_of_day
+            '''
 
-            cursor.execute(insert_sql)
-            print(f"Inserted/updated location_group_stats_weekly records.")
-    # do seasonal, weekly, counts 
-    # group retired and current counters in the same spot--create grouping table with location ids
+            with self.loading_table(conn, 'fifteen_min_counts_by_year_and_month_epoch'):
+                cursor.execute(insert_sql)
+            print(f"Inserted/Updated fifteen_min_counts_by_year_and_month records (epoch schema).")
+
+
+def run_loader_step(step_name: str, options: dict, changed_since: dict) -> dict:
+    """
+    Runs one BicycleCountersLoader step in a fresh loader, for use in a
+    worker process (see BicycleCountersLoader.run_step_in_executor).
+
+    :param options: The keyword arguments the run's loader was built with.
+    :return: The loader's changed_since after the step.
+    """
+    loader = BicycleCountersLoader(**options)
+    loader.changed_since = changed_since
+    asyncio.run(getattr(loader, step_name)())
+    return loader.changed_since
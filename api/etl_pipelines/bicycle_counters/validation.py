@@ -0,0 +1,130 @@
+from datetime import datetime
+from typing import List, Type, Union, get_args, get_origin
+from pydantic import BaseModel
+import numpy as np
+import pandas as pd
+
+# Strings pydantic accepts for int fields: an integer, optionally with a zero
+# fractional part and surrounding whitespace
+INT_STRING = r'\s*[+-]?\d+(?:\.0*)?\s*'
+MAX_REPORTED_ROWS = 5
+
+
+class InvalidRecordsError(ValueError):
+    """
+    Raised by validate_records with every invalid value found in a batch.
+
+    :param errors: One row per invalid value, with the columns row (the
+                   record's position), field, input and message.
+    """
+
+    def __init__(self, model: Type[BaseModel], total: int, errors: pd.DataFrame):
+        self.errors = errors
+        rows = errors['row'].nunique()
+
+        lines = [f"{rows} of {total} {model.__name__} records are invalid:"]
+        for (field, message), group in errors.groupby(['field', 'message'], sort=False):
+            examples = ', '.join(
+                f"row {row}: {value!r}"
+                for row, value in group[['row', 'input']].head(MAX_REPORTED_ROWS).itertuples(index=False)
+            )
+            lines.append(f"  {field}: {message} ({len(group)} rows, e.g. {examples})")
+        super().__init__('\n'.join(lines))
+
+
+def validate_records(records: List[dict], model: Type[BaseModel]) -> pd.DataFrame:
+    """
+    Validates raw API records against a flat pydantic model column by column,
+    without building a model instance per record, and returns them as a
+    DataFrame with one typed column per model field (as model_dump would).
+
+    The model's rules are applied with vectorized checks: fields are read
+    from their alias or, with populate_by_name, their name; fields that are
+    not Optional must be present and not null; int fields accept integers,
+    integral floats, booleans and integer strings; str fields only accept
+    strings; datetime fields accept ISO 8601 strings. Extra keys are ignored.
+
+    :param records: The raw records (e.g., the JSON array of a resource).
+    :param model: The pydantic model describing a record (e.g., FifteenMinCount).
+    :raises InvalidRecordsError: Listing every invalid value, if any.
+    """
+    raw = pd.DataFrame.from_records(records) if records else pd.DataFrame()
+    populate_by_name = model.model_config.get('populate_by_name', False)
+
+    columns = {}
+    errors = []
+    for name, field in model.model_fields.items():
+        key = field.alias or name
+        values = raw[key] if key in raw else None
+        if populate_by_name and key != name and name in raw:
+            values = raw[name] if values is None else values.where(values.notna(), raw[name])
+        if values is None:
+            values = pd.Series(None, index=raw.index, dtype=object)
+
+        field_type, optional = _unwrap_optional(field.annotation)
+        missing = values.isna().to_numpy()
+        if not optional:
+            errors.append(_errors(name, values, missing, "Field required"))
+
+        column, invalid = _coerce(values, field_type, optional)
+        errors.append(_errors(name, values, invalid & ~missing, f"Input should be a valid {field_type.__name__}"))
+        columns[name] = column
+
+    errors = pd.concat(errors, ignore_index=True).sort_values('row', kind='stable')
+    if len(errors):
+        raise InvalidRecordsError(model, len(raw), errors.reset_index(drop=True))
+    return pd.DataFrame(columns, index=raw.index)
+
+
+def _unwrap_optional(annotation):
+    """Returns (type, optional) for X or Optional[X]."""
+    if get_origin(annotation) is Union:
+        args = [arg for arg in get_args(annotation) if arg is not type(None)]
+        if len(args) == 1:
+            return args[0], True
+    return annotation, False
+
+
+def _coerce(values: pd.Series, field_type: type, optional: bool):
+    """Converts a raw column to field_type, returning (column, invalid mask)."""
+    if field_type is str:
+        # infer_dtype scans the column in C, the per-value check only runs on mixed columns
+        if pd.api.types.infer_dtype(values, skipna=True) in ('string', 'empty'):
+            invalid = np.zeros(len(values), dtype=bool)
+        else:
+            invalid = ~values.map(lambda value: isinstance(value, str) or value is None).to_numpy(dtype=bool)
+        return values.astype(object).where(values.notna(), None), invalid
+
+    if field_type is int:
+        if pd.api.types.is_integer_dtype(values.dtype):
+            return values.astype('int64'), np.zeros(len(values), dtype=bool)
+
+        is_string = values.map(lambda value: isinstance(value, str)).to_numpy(dtype=bool)
+        bad_string = is_string.copy()
+        bad_string[is_string] = ~values[is_string].str.fullmatch(INT_STRING).to_numpy(dtype=bool)
+
+        numbers = pd.to_numeric(values.mask(bad_string), errors='coerce')
+        invalid = bad_string | (numbers.notna() & (numbers % 1 != 0)).to_numpy() | (numbers.isna() & values.notna()).to_numpy()
+        numbers = numbers.mask(invalid)
+        # Without nulls the column is plain int64, as model_dump would give
+        return numbers.astype('Int64' if optional or numbers.isna().any() else 'int64'), invalid
+
+    if field_type is float:
+        numbers = pd.to_numeric(values, errors='coerce')
+        return numbers.astype('float64'), (numbers.isna() & values.notna()).to_numpy()
+
+    if field_type is datetime:
+        timestamps = pd.to_datetime(values, format='ISO8601', errors='coerce')
+        return timestamps, (timestamps.isna() & values.notna()).to_numpy()
+
+    raise TypeError(f"validate_records does not support fields of type {field_type!r}.")
+
+
+def _errors(field: str, values: pd.Series, mask: np.ndarray, message: str) -> pd.DataFrame:
+    rows = np.flatnonzero(mask)
+    return pd.DataFrame({
+        'row': rows,
+        'field': field,
+        'input': values.iloc[rows].to_numpy(dtype=object),
+        'message': message,
+    })
@@ -1,10 +1,110 @@
 import aiohttp
+import asyncio
+import random
+from contextlib import asynccontextmanager
+from etl_pipelines.toronto_open_data.json_stream import iter_json_array_batches
 
 class CityOfTorontoClient:
+    """
+    Client for the City of Toronto Open Data (CKAN) API.
+
+    Used as an async context manager, the client runs in pooled mode: every
+    request shares one aiohttp session (and its connection pool), and package
+    metadata is fetched once per run instead of once per resource:
+
+        async with BicycleCountersClient() as client:
+            await client.get_daily_counts()
+
+    Outside of it, each call opens its own session as before. Transient
+    failures (connection errors, timeouts, 429 and 5xx responses) are retried
+    with exponential backoff in both modes.
+    """
     BASE_URL = "https://ckan0.cf.opendata.inter.prod-toronto.ca/api/3/action"
+    RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+    def __init__(self, max_concurrency: int = 4, max_retries: int = 3, backoff: float = 1.0):
+        """
+        Args:
+            max_concurrency (int): Maximum number of resources downloaded at once.
+            max_retries (int): How many times a failed request is retried.
+            backoff (float): Delay before the first retry in seconds, doubled on every attempt.
+        """
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._shared_session = None
+        self._package_cache = None
+        self._resource_cache = None
+
+    async def __aenter__(self):
+        connector = aiohttp.TCPConnector(limit=self.max_concurrency * 2)
+        self._shared_session = aiohttp.ClientSession(connector=connector)
+        self._package_cache = {}
+        self._resource_cache = {}
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self._shared_session.close()
+        self._shared_session = None
+        self._package_cache = None
+        self._resource_cache = None
+
+    @asynccontextmanager
+    async def _session(self):
+        """Yields the pooled session in pooled mode, otherwise a new one."""
+        if self._shared_session is not None:
+            yield self._shared_session
+        else:
+            async with aiohttp.ClientSession() as session:
+                yield session
+
+    def _should_retry(self, error: Exception, attempt: int) -> bool:
+        if attempt >= self.max_retries:
+            return False
+        if isinstance(error, aiohttp.ClientResponseError):
+            return error.status in self.RETRY_STATUSES
+        return isinstance(error, (aiohttp.ClientError, asyncio.TimeoutError))
+
+    async def _wait_before_retry(self, description: str, error: Exception, attempt: int):
+        # Exponential backoff with jitter, so concurrent downloads don't retry in lockstep
+        delay = self.backoff * 2 ** attempt * random.uniform(0.5, 1.5)
+        print(f"{description} failed ({error}); retry {attempt + 1}/{self.max_retries} in {delay:.1f}s")
+        await asyncio.sleep(delay)
+
+    async def _with_retries(self, description: str, request):
+        """Awaits request() (a coroutine function), retrying transient failures."""
+        attempt = 0
+        while True:
+            try:
+                return await request()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if not self._should_retry(e, attempt):
+                    raise
+                await self._wait_before_retry(description, e, attempt)
+                attempt += 1
+
+    async def _get_json(self, url: str, params: dict = None, json_content_type: str = None):
+        """GETs a URL and decodes its JSON body, retrying transient failures."""
+        async def request():
+            async with self._session() as session:
+                async with session.get(url, params=params) as response:
+                    response.raise_for_status()
+                    return await response.json(content_type=json_content_type)
+
+        return await self._with_retries(f"GET {url}", request)
+
+    async def gather_bounded(self, *aws):
+        """
+        Runs awaitables concurrently like asyncio.gather, but at most
+        max_concurrency at a time.
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def run(aw):
+            async with semaphore:
+                return await aw
 
-    def __init__(self):
-        pass
+        return await asyncio.gather(*(run(aw) for aw in aws))
 
     async def get(self, session: aiohttp.ClientSession, endpoint: str, params: dict = {}):
         """
@@ -16,25 +116,45 @@ class CityOfTorontoClient:
             params (dict): A dictionary of query parameters to include in the request.
         """
         url = self.BASE_URL + endpoint
-        try:
+
+        async def request():
             async with session.get(url, params=params) as response:
                 response.raise_for_status()
                 return await response.json()
-        except aiohttp.ClientError as e:
+
+        try:
+            return await self._with_retries(f"GET {url}", request)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
             print(f"Error during request: {e}")
             return None
         
     async def get_package_metadata(self, package_id: str):
         """
-        Fetches metadata for a specific package by its ID.
+        Fetches metadata for a specific package by its ID. In pooled mode it
+        is fetched once per run, even by concurrent callers.
 
         Args:
             package_id (str): The unique identifier of the package.
         """
+        if self._package_cache is None:
+            return await self._fetch_package_metadata(package_id)
+
+        task = self._package_cache.get(package_id)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch_package_metadata(package_id))
+            self._package_cache[package_id] = task
+
+        package_data = await task
+        if package_data is None:
+            # Don't remember failures; the next caller tries again
+            self._package_cache.pop(package_id, None)
+        return package_data
+
+    async def _fetch_package_metadata(self, package_id: str):
         endpoint = "/package_show"
         params = {"id": package_id}
-        
-        async with aiohttp.ClientSession() as session:
+
+        async with self._session() as session:
             return await self.get(session, endpoint, params)
         
     async def get_resource_metadata(self, package_id: str, resource_name: str):
@@ -66,23 +186,186 @@ class CityOfTorontoClient:
             return resource_metadata.get("url")
         return None
     
-    async def get_resource_data(self, package_id: str, resource_name: str, json_content_type: str = None):
+    async def get_changed_resource_validators(self, package_id: str, resource_name: str, previous: dict = None):
+        """
+        Checks whether a resource changed since it was last downloaded, using a
+        conditional HEAD request (If-None-Match / If-Modified-Since) and the
+        resource's CKAN last_modified date.
+
+        Args:
+            package_id (str): The unique identifier of the package.
+            resource_name (str): The name of the resource.
+            previous (dict): The validators returned for the last download, if any.
+
+        Returns:
+            None if the resource is unchanged (or missing), otherwise its
+            current validators: {'etag', 'last_modified', 'ckan_last_modified'}.
+            Resources without any validator always count as changed.
+        """
+        previous = previous or {}
+        resource_metadata = await self.get_resource_metadata(package_id, resource_name)
+        if not resource_metadata:
+            print(f"Resource not found: {resource_name}")
+            return None
+
+        resource_url = resource_metadata.get("url")
+        headers = {}
+        if previous.get('etag'):
+            headers['If-None-Match'] = previous['etag']
+        if previous.get('last_modified'):
+            headers['If-Modified-Since'] = previous['last_modified']
+
+        async def request():
+            async with self._session() as session:
+                async with session.head(resource_url, headers=headers, allow_redirects=True) as response:
+                    if response.status != 304:
+                        response.raise_for_status()
+                    return response.status, response.headers.get('ETag'), response.headers.get('Last-Modified')
+
+        try:
+            status, etag, last_modified = await self._with_retries(f"HEAD {resource_url}", request)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            # Some servers don't support HEAD; fall back to the CKAN metadata
+            print(f"Could not check {resource_name} for changes: {e}")
+            status, etag, last_modified = None, None, None
+
+        if status == 304:
+            return None
+
+        current = {
+            'etag': etag,
+            'last_modified': last_modified,
+            'ckan_last_modified': resource_metadata.get('last_modified'),
+        }
+        known = [key for key, value in current.items() if value]
+        if known and all(current[key] == previous.get(key) for key in known):
+            return None
+        return current
+
+    async def get_resource_data(self, package_id: str, resource_name: str, json_content_type: str = None, shared: bool = False):
         """
         Fetches the actual data from a specific resource within a package.
 
         Args:
             package_id (str): The unique identifier of the package.
             resource_name (str): The name of the resource.
+            shared (bool): In pooled mode, download the resource once per run
+                and give every caller the same data, which must then be
+                treated as read-only.
         """
+        if not shared or self._resource_cache is None:
+            return await self._fetch_resource_data(package_id, resource_name, json_content_type)
+
+        key = (package_id, resource_name, json_content_type)
+        task = self._resource_cache.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch_resource_data(package_id, resource_name, json_content_type))
+            self._resource_cache[key] = task
+
+        data = await task
+        if data is None:
+            self._resource_cache.pop(key, None)
+        return data
+
+    async def _fetch_resource_data(self, package_id: str, resource_name: str, json_content_type: str = None):
         resource_url = await self.get_resource_url(package_id, resource_name)
         if resource_url:
-            async with aiohttp.ClientSession() as session:
-                try:
+            try:
+                return await self._get_json(resource_url, json_content_type=json_content_type)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                print(f"Error fetching resource data: {e}")
+                return None
+        return None
+
+    async def get_resources_data(self, package_id: str, resource_names: list, json_content_type: str = None) -> list:
+        """
+        Fetches several resources of a package concurrently (at most
+        max_concurrency at a time), in the order of resource_names.
+
+        Args:
+            package_id (str): The unique identifier of the package.
+            resource_names (list): The names of the resources.
+        """
+        return await self.gather_bounded(*(
+            self.get_resource_data(package_id, resource_name, json_content_type)
+            for resource_name in resource_names
+        ))
+
+    async def iter_resource_batches(self, package_id: str, resource_name: str, batch_size: int = 100_000):
+        """
+        Streams a resource whose content is a JSON array, yielding its records
+        in lists of at most batch_size while the body is still downloading.
+
+        Unlike get_resource_data, the body is never held in memory as a whole.
+        A download that fails part-way raises instead of ending the stream
+        early, so callers never mistake a truncated resource for a complete one.
+
+        Args:
+            package_id (str): The unique identifier of the package.
+            resource_name (str): The name of the resource.
+            batch_size (int): The maximum number of records per batch.
+        """
+        resource_url = await self.get_resource_url(package_id, resource_name)
+        if not resource_url:
+            print(f"Resource not found: {resource_name}")
+            return
+
+        attempt = 0
+        streamed = False
+        while True:
+            try:
+                async with self._session() as session:
                     async with session.get(resource_url) as response:
                         response.raise_for_status()
-                        return await response.json(content_type=json_content_type)
-                except aiohttp.ClientError as e:
-                    print(f"Error fetching resource data: {e}")
-                    return None
-        return None
+                        async for batch in iter_json_array_batches(response.content, batch_size):
+                            streamed = True
+                            yield batch
+                return
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                # Batches already handed out can't be taken back, so only retry before the first one
+                if streamed or not self._should_retry(e, attempt):
+                    print(f"Error streaming resource data: {e}")
+                    raise
+                await self._wait_before_retry(f"GET {resource_url}", e, attempt)
+                attempt += 1
 
+    async def iter_resources_batches(self, package_id: str, resource_names: list, batch_size: int = 100_000):
+        """
+        Streams several JSON array resources concurrently (at most
+        max_concurrency at a time), yielding (resource_name, records) batches
+        as they arrive.
+
+        Batches of different resources are interleaved; within a resource they
+        keep their order. At most max_concurrency batches wait to be consumed,
+        so memory stays bounded.
+
+        Args:
+            package_id (str): The unique identifier of the package.
+            resource_names (list): The names of the resources.
+            batch_size (int): The maximum number of records per batch.
+        """
+        queue = asyncio.Queue(maxsize=self.max_concurrency)
+        finished = object()
+
+        async def produce(resource_name):
+            async for batch in self.iter_resource_batches(package_id, resource_name, batch_size):
+                await queue.put((resource_name, batch))
+
+        async def produce_all():
+            try:
+                await self.gather_bounded(*(produce(name) for name in resource_names))
+                await queue.put(finished)
+            except Exception as e:
+                await queue.put(e)
+
+        producer = asyncio.ensure_future(produce_all())
+        try:
+            while True:
+                item = await queue.get()
+                if item is finished:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            producer.cancel()
@@ -0,0 +1,125 @@
+import codecs
+import json
+import re
+from typing import AsyncIterator, List
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+CHUNK_SIZE = 1024 * 1024
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+NUMBER_TAIL = re.compile(r'[0-9.eE+-]*')
+
+
+class JsonArrayParser():
+    """
+    Incremental parser for a document whose top level is a JSON array.
+
+    Bytes are fed in arbitrary chunks and every complete element is returned
+    as soon as it has been received, so only the current partial element is
+    kept in memory.
+    """
+
+    # Parser states: what the next non-whitespace character may be
+    START = 'start'    # '['
+    FIRST = 'first'    # an element or ']'
+    VALUE = 'value'    # an element (after ',')
+    NEXT = 'next'      # ',' or ']'
+    DONE = 'done'      # nothing
+
+    def __init__(self):
+        self._decoder = json.JSONDecoder()
+        self._text_decoder = codecs.getincrementaldecoder('utf-8')()
+        self._buffer = ''
+        self._state = self.START
+
+    def feed(self, chunk: bytes, final: bool = False) -> List:
+        """
+        Parses the next chunk of the document and returns the array elements
+        it completed.
+
+        Args:
+            chunk (bytes): The next bytes of the document.
+            final (bool): True once the whole document has been fed.
+
+        Raises:
+            ValueError: If the document is not a well-formed JSON array.
+        """
+        buf = self._buffer + self._text_decoder.decode(chunk, final)
+        items = []
+        pos = 0
+
+        while True:
+            pos = WHITESPACE.match(buf, pos).end()
+            if pos == len(buf):
+                break
+            char = buf[pos]
+
+            if self._state == self.START and char == '[':
+                self._state = self.FIRST
+                pos += 1
+            elif self._state in (self.FIRST, self.NEXT) and char == ']':
+                self._state = self.DONE
+                pos += 1
+            elif self._state == self.NEXT and char == ',':
+                self._state = self.VALUE
+                pos += 1
+            elif self._state in (self.FIRST, self.VALUE):
+                try:
+                    item, end = self._decoder.raw_decode(buf, pos)
+                except json.JSONDecodeError:
+                    if final:
+                        raise ValueError(f"Malformed JSON array element at: {buf[pos:pos + 20]!r}")
+                    break
+                # A number at the end of the buffer may continue in the next
+                # chunk, even past what parsed (e.g., '3.' or '1e')
+                is_number = isinstance(item, (int, float)) and not isinstance(item, bool)
+                if is_number and not final and NUMBER_TAIL.match(buf, end).end() == len(buf):
+                    break
+                items.append(item)
+                self._state = self.NEXT
+                pos = end
+            else:
+                raise ValueError(f"Unexpected {char!r} in JSON array at: {buf[pos:pos + 20]!r}")
+
+        self._buffer = buf[pos:]
+
+        if final and self._state != self.DONE:
+            raise ValueError("The JSON array is truncated.")
+        return items
+
+
+async def iter_json_array_batches(stream, batch_size: int) -> AsyncIterator[List]:
+    """
+    Parses a JSON array from an async byte stream (e.g., aiohttp's
+    response.content), yielding its elements in lists of at most batch_size.
+
+    Uses ijson when it is installed, otherwise JsonArrayParser.
+
+    Args:
+        stream: An object with an async read(n) method.
+        batch_size (int): The maximum number of elements per batch.
+    """
+    batch = []
+
+    if ijson is not None:
+        async for item in ijson.items(stream, 'item', use_float=True):
+            batch.append(item)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    else:
+        parser = JsonArrayParser()
+        while True:
+            chunk = await stream.read(CHUNK_SIZE)
+            batch.extend(parser.feed(chunk, final=not chunk))
+            while len(batch) >= batch_size:
+                yield batch[:batch_size]
+                batch = batch[batch_size:]
+            if not chunk:
+                break
+
+    if batch:
+        yield batch
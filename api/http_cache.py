@@ -0,0 +1,134 @@
+import hashlib
+import os
+from pathlib import Path
+from flask import Blueprint, current_app, g, request
+
+DEFAULT_MAX_AGE = 3600                       # browsers: 1 hour
+DEFAULT_SHARED_MAX_AGE = 86400               # CDN edges: 1 day
+DEFAULT_STALE_WHILE_REVALIDATE = 7 * 86400   # serve stale while refetching: 1 week
+
+
+# path -> ((mtime_ns, size), SHA-256 of the content) as of the last hash
+_digests = {}
+
+
+def file_digest(path: str) -> str:
+    """
+    Returns the SHA-256 of a file's content. The digest is cached and only
+    recomputed when the file's mtime or size changes, so a file is read once
+    per ETL run rather than once per request. Missing files are 'missing'.
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return 'missing'
+
+    stat_key = (stat.st_mtime_ns, stat.st_size)
+    cached = _digests.get(path)
+    if cached is not None and cached[0] == stat_key:
+        return cached[1]
+
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            sha.update(chunk)
+    digest = sha.hexdigest()
+    _digests[path] = (stat_key, digest)
+    return digest
+
+
+def file_version(file_path: Path) -> str:
+    """
+    Returns a file's version, the digest of its content (see file_digest),
+    so every instance serving the same data agrees on it whatever the files'
+    mtimes. Missing files are 'missing'.
+
+    A SQLite database in WAL mode can take writes in its -wal file while the
+    database file itself stays untouched until a checkpoint, so the -wal
+    file's content is part of the version too.
+    """
+    return '/'.join(file_digest(path) for path in (str(file_path), f"{file_path}-wal"))
+
+
+def data_version(file_paths) -> str:
+    """Returns a digest that changes whenever the content of any of the files does."""
+    sha = hashlib.sha256()
+    for file_path in file_paths:
+        sha.update(file_version(file_path).encode())
+    return sha.hexdigest()
+
+
+class HttpCache():
+    """
+    Blueprint middleware adding HTTP validators and cache headers to routes
+    whose output only depends on their data files and query string.
+
+    Routes opt in with @http_cache.track(<data files>). Their strong ETag is
+    derived from the version (content digest, see file_version) of those
+    files plus the request path and normalized query string, so it is
+    identical across the workers and instances serving the same files and
+    only changes when the ETL changes the data. A matching If-None-Match is answered
+    with 304 before the route runs.
+
+    Cache lifetimes come from the app config:
+    HTTP_CACHE_MAX_AGE, HTTP_CACHE_SHARED_MAX_AGE and
+    HTTP_CACHE_STALE_WHILE_REVALIDATE (seconds).
+    """
+
+    def track(self, *file_paths):
+        """Decorator declaring the data files a route's output is derived from."""
+        def decorator(view):
+            view.data_files = tuple(Path(p) for p in file_paths)
+            return view
+        return decorator
+
+    def init_blueprint(self, blueprint: Blueprint):
+        blueprint.before_request(self._answer_not_modified)
+        blueprint.after_request(self._add_cache_headers)
+
+    def _tracked_files(self):
+        view = current_app.view_functions.get(request.endpoint)
+        return getattr(view, 'data_files', None)
+
+    def _etag(self, file_paths) -> str:
+        query = sorted(request.args.items(multi=True))
+        sha = hashlib.sha256()
+        sha.update(request.path.encode())
+        sha.update(repr(query).encode())
+        sha.update(data_version(file_paths).encode())
+        return sha.hexdigest()
+
+    def _cache_control(self) -> str:
+        config = current_app.config
+        max_age = config.get('HTTP_CACHE_MAX_AGE', DEFAULT_MAX_AGE)
+        shared_max_age = config.get('HTTP_CACHE_SHARED_MAX_AGE', DEFAULT_SHARED_MAX_AGE)
+        stale = config.get('HTTP_CACHE_STALE_WHILE_REVALIDATE', DEFAULT_STALE_WHILE_REVALIDATE)
+        return f"public, max-age={max_age}, s-maxage={shared_max_age}, stale-while-revalidate={stale}"
+
+    def _answer_not_modified(self):
+        if request.method not in ('GET', 'HEAD'):
+            return None
+
+        file_paths = self._tracked_files()
+        if file_paths is None:
+            return None
+
+        etag = g.http_cache_etag = self._etag(file_paths)
+        if request.if_none_match.contains_weak(etag):
+            response = current_app.response_class(status=304)
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = self._cache_control()
+            return response
+        return None
+
+    def _add_cache_headers(self, response):
+        etag = g.get('http_cache_etag')
+        if etag is None or response.status_code != 200:
+            return response
+
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = self._cache_control()
+        return response
+
+
+http_cache = HttpCache()
@@ -0,0 +1,57 @@
+import os
+import pandas as pd
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+ARROW_AVAILABLE = pa is not None
+
+class ArrowLoader():
+
+    def __init__(self):
+        pass
+
+    def df_to_arrow(self, df: pd.DataFrame, arrow_path: str, time_col: str, overwrite: bool=False):
+        """
+        Saves a DataFrame as an uncompressed Arrow IPC (Feather v2) file the
+        API can memory-map: rows are sorted by time_col as DataFrame.sort_index()
+        sorts them, text columns are dictionary-encoded and every column is one
+        contiguous chunk, so readers map the columns without copying or sorting
+        them.
+
+        The file is written next to arrow_path and moved into place once
+        complete, so processes that have the old file mapped keep reading it.
+        Requires pyarrow; without it the file is skipped.
+
+        :param df: The rows to save.
+        :param arrow_path: The full file path, including the .arrow extension.
+        :param time_col: The timestamp column to sort the rows by.
+        :param overwrite: If True, overwrite the file if it exists.
+        """
+        if not ARROW_AVAILABLE:
+            print(f"pyarrow is not installed. Skipping {arrow_path}.")
+            return
+        if os.path.exists(arrow_path) and not overwrite:
+            print(f"Arrow file already exists at {arrow_path}. Skipping save.")
+            return
+
+        print(f"Saving DataFrame to {arrow_path}...")
+        df = df.set_index(time_col, drop=False).sort_index().reset_index(drop=True)
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        for i, field in enumerate(table.schema):
+            if pa.types.is_string(field.type) or pa.types.is_large_string(field.type):
+                table = table.set_column(i, field.name, table.column(i).dictionary_encode())
+        table = table.combine_chunks()
+
+        tmp_path = f"{arrow_path}.tmp"
+        try:
+            with pa.OSFile(tmp_path, 'wb') as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table, max_chunksize=max(len(table), 1))
+            os.replace(tmp_path, arrow_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        print(f"Saved to {arrow_path}")
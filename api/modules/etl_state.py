@@ -0,0 +1,38 @@
+import os
+import json
+
+class EtlState():
+    """
+    Per-resource bookkeeping for incremental ETL runs, persisted as JSON.
+
+    For every resource it keeps the HTTP validators seen on its last download
+    (ETag, Last-Modified, CKAN last_modified) and its high-water mark, the
+    latest timestamp loaded from it.
+    """
+
+    def __init__(self, state_path: str):
+        self.state_path = state_path
+        self._resources = {}
+
+        if os.path.exists(state_path):
+            with open(state_path, 'r', encoding='utf-8') as f:
+                self._resources = json.load(f).get('resources', {})
+
+    def get(self, resource_name: str) -> dict:
+        """Returns a copy of the recorded state of a resource ({} if none)."""
+        return dict(self._resources.get(resource_name, {}))
+
+    def update(self, resource_name: str, **fields):
+        """Merges fields into the recorded state of a resource."""
+        self._resources.setdefault(resource_name, {}).update(fields)
+
+    def save(self):
+        """Writes the state file atomically."""
+        directory = os.path.dirname(self.state_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'resources': self._resources}, f, indent=4, sort_keys=True)
+        os.replace(tmp_path, self.state_path)
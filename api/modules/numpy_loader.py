@@ -0,0 +1,34 @@
+import os
+import numpy as np
+
+class NumpyLoader():
+
+    def __init__(self):
+        pass
+
+    def arrays_to_npz(self, arrays: dict, npz_path: str, overwrite: bool=False):
+        """
+        Saves a dictionary of NumPy arrays to an uncompressed .npz archive.
+
+        The archive is written next to npz_path and moved into place once
+        complete, so processes that have the old archive memory-mapped keep
+        reading it.
+
+        :param arrays: Mapping of array name to array.
+        :param npz_path: The full file path, including the .npz extension.
+        :param overwrite: If True, overwrite the file if it exists.
+        """
+        if os.path.exists(npz_path) and not overwrite:
+            print(f"NPZ file already exists at {npz_path}. Skipping save.")
+            return
+
+        print(f"Saving arrays to {npz_path}...")
+        tmp_path = f"{npz_path}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                np.savez(f, **arrays)
+            os.replace(tmp_path, npz_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        print(f"Saved to {npz_path}")
@@ -1,5 +1,11 @@
 import os
+import shutil
+import numpy as np
 import pandas as pd
+import fastparquet
+from typing import AsyncIterable, List
+
+DEFAULT_ROW_GROUP_SIZE = 100_000
 
 class ParquetLoader():
 
@@ -10,7 +16,161 @@ class ParquetLoader():
         if os.path.exists(parquet_path) and not overwrite:
             print(f"Parquet file already exists at {parquet_path}. Skipping save.")
             return
-        
+
         print(f"Saving DataFrame to {parquet_path}...")
         df.to_parquet(parquet_path, index=True)
-        print(f"Saved to {parquet_path}")
\ No newline at end of file
+        print(f"Saved to {parquet_path}")
+
+    async def batches_to_parquet(self, batches: AsyncIterable[pd.DataFrame], parquet_path: str, overwrite: bool=False) -> int:
+        """
+        Streams DataFrames with the same columns into a Parquet file, one row
+        group per batch, so only one batch is held in memory at a time.
+
+        The file is written next to parquet_path and moved into place once
+        complete, so readers never see a partial file.
+
+        :param batches: Async iterable of DataFrames.
+        :param parquet_path: The full file path, including the .parquet extension.
+        :param overwrite: If True, overwrite the file if it exists.
+        :return: The number of rows written.
+        """
+        if os.path.exists(parquet_path) and not overwrite:
+            print(f"Parquet file already exists at {parquet_path}. Skipping save.")
+            return 0
+
+        print(f"Streaming DataFrames to {parquet_path}...")
+        tmp_path = f"{parquet_path}.tmp"
+        rows = 0
+        try:
+            async for df in batches:
+                if df.empty:
+                    continue
+                fastparquet.write(tmp_path, df, write_index=False, append=rows > 0)
+                rows += len(df)
+                print(f"  wrote {rows} rows")
+
+            if rows == 0:
+                print(f"No rows to save to {parquet_path}.")
+                return 0
+            os.replace(tmp_path, parquet_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        print(f"Saved {rows} rows to {parquet_path}")
+        return rows
+
+    def upsert_parquet(self, df: pd.DataFrame, parquet_path: str, time_col: str, key_cols: List[str]) -> int:
+        """
+        Merges rows into a Parquet file by key: rows of the file with the same
+        key as a row of df are dropped, and df is appended as new row groups.
+        The file is rewritten one row group at a time next to parquet_path and
+        moved into place once complete.
+
+        Only row groups reaching df's earliest time_col value are checked for
+        replaced keys; older ones are copied as they are.
+
+        :param df: The new rows, with the file's columns.
+        :param parquet_path: The full file path, including the .parquet extension.
+        :param time_col: The timestamp column, which must be part of the key.
+        :param key_cols: The columns identifying a row (e.g., ['location_dir_id', 'dt']).
+        :return: The number of rows upserted.
+        """
+        if time_col not in key_cols:
+            raise ValueError(f"The key columns {key_cols} must include the time column '{time_col}'.")
+        if df.empty:
+            print(f"No new rows for {parquet_path}.")
+            return 0
+        if not os.path.exists(parquet_path):
+            fastparquet.write(parquet_path, df, write_index=False)
+            return len(df)
+
+        print(f"Upserting {len(df)} rows into {parquet_path}...")
+        columns = list(df.columns)
+        cutoff = df[time_col].min()
+        new_keys = pd.MultiIndex.from_frame(df[key_cols])
+
+        tmp_path = f"{parquet_path}.tmp"
+        written = 0
+        try:
+            for chunk in fastparquet.ParquetFile(parquet_path).iter_row_groups(columns=columns, index=False):
+                if len(chunk) and chunk[time_col].max() >= cutoff:
+                    chunk = chunk[~pd.MultiIndex.from_frame(chunk[key_cols]).isin(new_keys)]
+                if len(chunk):
+                    fastparquet.write(tmp_path, chunk[columns], write_index=False, append=written > 0)
+                    written += len(chunk)
+
+            fastparquet.write(tmp_path, df, write_index=False, append=written > 0)
+            os.replace(tmp_path, parquet_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        print(f"Upserted {len(df)} rows into {parquet_path}")
+        return len(df)
+
+    def df_to_partitioned_parquet(
+        self,
+        df: pd.DataFrame,
+        dataset_dir: str,
+        time_col: str,
+        row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+        replace_partitions: bool = False
+    ):
+        """
+        Writes a DataFrame as a month-partitioned Parquet dataset
+        (dataset_dir/year=YYYY/month=MM/part-0.parquet). Rows are sorted by
+        time_col as DataFrame.sort_index() sorts them and written in row groups
+        of row_group_size rows with min/max statistics, so readers can skip
+        partitions and row groups by date.
+
+        :param df: The rows to write.
+        :param dataset_dir: The dataset's root directory.
+        :param time_col: The timestamp column to partition and sort by.
+        :param row_group_size: The number of rows per row group.
+        :param replace_partitions: If True, only the months present in df are
+                                   rewritten (one file at a time) and the rest
+                                   of the dataset is kept. Otherwise the whole
+                                   dataset is built next to dataset_dir and
+                                   swapped in.
+        """
+        df = df.set_index(time_col, drop=False).sort_index().reset_index(drop=True)
+        months = df[time_col].to_numpy(dtype='datetime64[ns]').astype('datetime64[M]')
+        unique_months = np.unique(months)
+        # Rows are sorted, so every month is a contiguous run of rows
+        starts = np.searchsorted(months, unique_months, side='left')
+        ends = np.searchsorted(months, unique_months, side='right')
+
+        root = dataset_dir if replace_partitions else f"{dataset_dir}.tmp"
+        if not replace_partitions and os.path.exists(root):
+            shutil.rmtree(root)
+
+        print(f"Saving {len(unique_months)} monthly partitions to {dataset_dir}...")
+        for month, start, end in zip(unique_months, starts, ends):
+            year, month_number = str(month).split('-')
+            partition_dir = os.path.join(root, f"year={year}", f"month={month_number}")
+            os.makedirs(partition_dir, exist_ok=True)
+
+            part_path = os.path.join(partition_dir, "part-0.parquet")
+            tmp_path = f"{part_path}.tmp"
+            fastparquet.write(
+                tmp_path,
+                df.iloc[start:end],
+                row_group_offsets=row_group_size,
+                stats=True,
+                write_index=False
+            )
+            os.replace(tmp_path, part_path)
+
+        if replace_partitions:
+            # Bump the dataset's mtime so readers see it is current
+            os.utime(dataset_dir)
+        else:
+            old_dir = f"{dataset_dir}.old"
+            if os.path.exists(dataset_dir):
+                os.replace(dataset_dir, old_dir)
+            os.replace(root, dataset_dir)
+            if os.path.exists(old_dir):
+                shutil.rmtree(old_dir)
+
+        print(f"Saved to {dataset_dir}")
@@ -1,13 +1,28 @@
 import sqlite3
 import pandas as pd
+from contextlib import contextmanager
+from typing import Iterable, List, Tuple
 from dotenv import load_dotenv
 import os
 
 load_dotenv()
 
+# Connection settings for bulk loads: the database may be left corrupt by a
+# crash mid-load, which a reload then fixes. WAL mode persists in the file,
+# so sqlite_connection switches back to a rollback journal afterwards
+BULK_LOAD_PRAGMAS = [
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=OFF",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-262144",  # 256 MiB
+]
+
 class SqliteLoader():
 
     DB_PATH=os.getenv('DB_PATH')
+    # If True, the writers replace their tables' contents with WAL, synchronous=OFF,
+    # a commit per batch and secondary indexes built after the data is in
+    bulk_load = False
 
     def __init__(self):
         pass
@@ -22,3 +37,88 @@ class SqliteLoader():
         conn.close()
         return df
 
+    @contextmanager
+    def sqlite_connection(self):
+        """
+        Opens a connection to DB_PATH (creating its directory) whose
+        transaction is committed on success and rolled back on error. In bulk
+        load mode the connection uses BULK_LOAD_PRAGMAS, and when it closes
+        the WAL is checkpointed into the database and the database is put
+        back in rollback journal mode, so readers such as the API don't need
+        to create -wal and -shm files next to it (e.g., on a read-only deploy).
+        """
+        os.makedirs(os.path.dirname(self.DB_PATH), exist_ok=True)
+
+        conn = sqlite3.connect(self.DB_PATH)
+        try:
+            if self.bulk_load:
+                for pragma in BULK_LOAD_PRAGMAS:
+                    conn.execute(pragma)
+            with conn:
+                yield conn
+            if self.bulk_load:
+                conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        finally:
+            if self.bulk_load:
+                conn.execute("PRAGMA journal_mode=DELETE")
+            conn.close()
+
+    def create_table(self, conn: sqlite3.Connection, table_name: str, create_sql: str) -> None:
+        """
+        Runs a CREATE TABLE IF NOT EXISTS statement for table_name. A table of
+        that name created by a different statement (e.g., by an earlier version
+        of the schema) is dropped first, along with its indexes and rows, so
+        this is only for tables whose writers fill them in full.
+        """
+        def normalized(sql: str) -> str:
+            return ' '.join(sql.split()).replace('CREATE TABLE IF NOT EXISTS ', 'CREATE TABLE ', 1)
+
+        existing = conn.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table_name,)
+        ).fetchone()
+        if existing is not None and normalized(existing[0]) != normalized(create_sql):
+            print(f"Schema of {table_name} changed, dropping it")
+            conn.execute(f"DROP TABLE {table_name}")
+        conn.execute(create_sql)
+
+    @contextmanager
+    def loading_table(self, conn: sqlite3.Connection, table_name: str, indexes: List[Tuple[str, str]] = ()):
+        """
+        Wraps the statements filling a table.
+
+        Normally the secondary indexes are created first and the statements
+        upsert into the table. In bulk load mode the table is emptied and its
+        indexes dropped first; they are built once the data is in, and the
+        table is analyzed for the query planner.
+
+        :param conn: A connection from sqlite_connection.
+        :param table_name: The table being filled.
+        :param indexes: (index name, indexed columns) pairs, e.g.
+                        [('idx_daily_dt', 'dt')].
+        """
+        def create_indexes():
+            for index_name, columns in indexes:
+                conn.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON {table_name}({columns})")
+
+        if not self.bulk_load:
+            create_indexes()
+            yield
+            return
+
+        for index_name, _ in indexes:
+            conn.execute(f"DROP INDEX IF EXISTS {index_name}")
+        conn.execute(f"DELETE FROM {table_name}")
+        yield
+        print(f"Indexing and analyzing {table_name}...")
+        create_indexes()
+        conn.execute(f"ANALYZE {table_name}")
+        conn.commit()
+
+    def insert_batch(self, conn: sqlite3.Connection, insert_sql: str, rows: Iterable[tuple]):
+        """
+        Inserts a batch of rows. In bulk load mode each batch is committed, so
+        the WAL stays about one batch large however big the load is.
+        """
+        conn.executemany(insert_sql, rows)
+        if self.bulk_load:
+            conn.commit()
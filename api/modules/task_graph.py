@@ -0,0 +1,75 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Iterable
+
+class TaskGraph():
+    """
+    A small dependency graph of pipeline steps, run as concurrently as their
+    dependencies allow.
+
+    Each step is a coroutine function; it starts as soon as every step it
+    depends on has finished. CPU-bound work should be handed to an executor
+    inside the step (e.g., loop.run_in_executor with a ProcessPoolExecutor)
+    so it doesn't block the other steps. Return values are kept in `results`
+    so later steps can share them, and wall times in `timings`.
+    """
+
+    def __init__(self):
+        self._steps = {}
+        self.results = {}
+        self.timings = {}
+
+    def add(self, name: str, step: Callable[[], Awaitable], depends_on: Iterable[str] = ()):
+        """
+        Adds a step. Its dependencies must have been added before it.
+
+        :param name: A unique step name.
+        :param step: A coroutine function called without arguments.
+        :param depends_on: The names of the steps that must finish first.
+        """
+        depends_on = tuple(depends_on)
+        if name in self._steps:
+            raise ValueError(f"Step '{name}' was already added.")
+        for dependency in depends_on:
+            if dependency not in self._steps:
+                raise ValueError(f"Step '{name}' depends on unknown step '{dependency}'.")
+        self._steps[name] = (step, depends_on)
+
+    async def run(self) -> dict:
+        """
+        Runs every step and returns their results. If a step fails, the steps
+        still running are cancelled and the error is raised.
+        """
+        tasks = {}
+
+        async def run_step(name):
+            step, depends_on = self._steps[name]
+            await asyncio.gather(*(tasks[dependency] for dependency in depends_on))
+
+            print(f"▶️ {name}")
+            started = time.perf_counter()
+            self.results[name] = await step()
+            self.timings[name] = time.perf_counter() - started
+            print(f"✅ {name} finished in {self.timings[name]:.2f}s")
+            return self.results[name]
+
+        # Dependencies are added first, so insertion order is a topological order
+        for name in self._steps:
+            tasks[name] = asyncio.ensure_future(run_step(name))
+
+        started = time.perf_counter()
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            raise
+
+        self.print_timings(time.perf_counter() - started)
+        return self.results
+
+    def print_timings(self, total: float):
+        print("Step timings:")
+        for name, seconds in sorted(self.timings.items(), key=lambda item: -item[1]):
+            print(f"  {name:<50} {seconds:8.2f}s")
+        print(f"  {'total (wall clock)':<50} {total:8.2f}s")
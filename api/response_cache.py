@@ -0,0 +1,118 @@
+import functools
+import threading
+from collections import OrderedDict
+import pandas as pd
+from flask import current_app, request
+from .http_cache import data_version
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DATE_ARGS = ('start', 'end')
+
+
+class ResponseCache():
+    """
+    Process-wide LRU cache of fully serialized response bodies.
+
+    Entries are keyed by endpoint and normalized query string and tagged with
+    the version of the route's data files (see HttpCache.track), so a new ETL
+    run invalidates them. The total size of cached bodies is bounded by the
+    RESPONSE_CACHE_MAX_BYTES config value (0 disables caching); the least
+    recently used entries are evicted first.
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _normalize_args() -> tuple:
+        """Returns the query string as sorted pairs, with dates in ISO format."""
+        args = []
+        for key, value in request.args.items(multi=True):
+            if key in DATE_ARGS:
+                try:
+                    value = pd.to_datetime(value).isoformat()
+                except (ValueError, TypeError):
+                    pass
+            args.append((key, value))
+        return tuple(sorted(args))
+
+    def _get(self, key, version):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[0] != version:
+                self._drop(key)
+                self.invalidations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def _put(self, key, version, body: bytes, mimetype: str):
+        max_bytes = current_app.config.get('RESPONSE_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES)
+        if len(body) > max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (version, body, mimetype)
+            self._size += len(body)
+            while self._size > max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _drop(self, key):
+        _, body, _ = self._entries.pop(key)
+        self._size -= len(body)
+
+    def cached(self, view):
+        """Decorator caching a route's successful responses."""
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            key = (request.endpoint, self._normalize_args())
+            version = data_version(getattr(wrapper, 'data_files', ()))
+
+            entry = self._get(key, version)
+            if entry is not None:
+                _, body, mimetype = entry
+                return current_app.response_class(body, mimetype=mimetype), 200
+
+            response = current_app.make_response(view(*args, **kwargs))
+            if response.status_code == 200:
+                self._put(key, version, response.get_data(), response.mimetype)
+            return response
+
+        return wrapper
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self) -> dict:
+        """Returns the cache counters for monitoring."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "size_bytes": self._size,
+                "max_bytes": current_app.config.get('RESPONSE_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else None,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+response_cache = ResponseCache()
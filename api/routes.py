@@ -1,9 +1,31 @@
-from flask import Blueprint, jsonify, request, current_app
-import json
+from flask import Blueprint, Response, current_app, jsonify, request
 import pandas as pd
 import numpy as np
 from .db import get_db
+from .datasets import (
+    datasets,
+    TimeSeriesTable,
+    PartitionedTimeSeries,
+    TimeOfDayProfile,
+    DailyVolumeIndex,
+    LocationGroups,
+    DailyChart,
+    FeatureCollection,
+    PARTITIONED_READS_AVAILABLE,
+    has_current_arrow_copy,
+)
+from .http_cache import http_cache
+from .response_cache import response_cache
+from .serializers import (
+    encode_records,
+    encode_grouped_records,
+    encode_columnar,
+    encode_arrow_stream,
+    json_response,
+    ARROW_AVAILABLE,
+)
 import sqlite3
+import json
 import os
 from dotenv import load_dotenv
 from pathlib import Path
@@ -17,19 +39,84 @@ COUNTER_LOCATIONS_FILE = DATA_DIR / "counter_locations.geojson"
 COUNTER_GROUPS_FILE = DATA_DIR / "counter_groups.geojson"
 COUNTS_15M_FILE = DATA_DIR / "counts_15m.parquet"
 COUNTS_15M_BY_LOCATION_NAME_FILE = DATA_DIR / "counts_15m_by_location_name.parquet"
+COUNTS_15M_PARTITIONED_DIR = DATA_DIR / "counts_15m_partitioned"
+COUNTS_15M_BY_LOCATION_NAME_PARTITIONED_DIR = DATA_DIR / "counts_15m_by_location_name_partitioned"
+COUNTS_15M_PROFILE_FILE = DATA_DIR / "counts_15m_profile.npz"
+COUNTS_15M_BY_LOCATION_NAME_PROFILE_FILE = DATA_DIR / "counts_15m_by_location_name_profile.npz"
 COUNTS_DAILY_FILE = DATA_DIR / "counts_daily.parquet"
 COUNTS_DAILY_BY_LOCATION_NAME_FILE = DATA_DIR / "counts_daily_by_location_name.parquet"
-COUNTS_DAILY_CHART_FILE = DATA_DIR / "counts_daily_chart.parquet"
+COUNTS_DAILY_CHART_FILE = DATA_DIR / "counts_daily_chart.npz"
+COUNTS_DAILY_VOLUME_INDEX_FILE = DATA_DIR / "counts_daily_volume_index.npz"
+LOCATION_GROUPS_FILE = DATA_DIR / "location_groups.npz"
+COUNTS_DAILY_ARROW_FILE = DATA_DIR / "counts_daily.arrow"
+COUNTS_DAILY_BY_LOCATION_NAME_ARROW_FILE = DATA_DIR / "counts_daily_by_location_name.arrow"
+COUNTS_15M_ARROW_FILE = DATA_DIR / "counts_15m.arrow"
+COUNTS_15M_BY_LOCATION_NAME_ARROW_FILE = DATA_DIR / "counts_15m_by_location_name.arrow"
 DB_PATH = os.path.join(os.path.dirname(__file__), os.getenv('DB_PATH'))
-
+MAX_BATCH_QUERIES = 50
+
+datasets.register('counter_locations', COUNTER_LOCATIONS_FILE, loader=FeatureCollection.from_file)
+datasets.register('counter_groups', COUNTER_GROUPS_FILE, loader=FeatureCollection.from_file)
+datasets.register(
+    'counts_daily', COUNTS_DAILY_FILE,
+    loader=TimeSeriesTable.loader('dt', COUNTS_DAILY_ARROW_FILE), depends_on=[COUNTS_DAILY_ARROW_FILE]
+)
+datasets.register(
+    'counts_daily_by_location_name', COUNTS_DAILY_BY_LOCATION_NAME_FILE,
+    loader=LocationGroups.table_loader(LOCATION_GROUPS_FILE, 'dt', COUNTS_DAILY_BY_LOCATION_NAME_ARROW_FILE),
+    depends_on=[LOCATION_GROUPS_FILE, COUNTS_DAILY_BY_LOCATION_NAME_ARROW_FILE]
+)
+# The full 15-minute tables are only preloaded when named explicitly (see
+# create_app), so routes keep reading ranges from the partitioned or mapped copies
+datasets.register(
+    'counts_15m', COUNTS_15M_FILE,
+    loader=TimeSeriesTable.loader('datetime_bin', COUNTS_15M_ARROW_FILE), depends_on=[COUNTS_15M_ARROW_FILE],
+    preload=False
+)
+datasets.register(
+    'counts_15m_by_location_name', COUNTS_15M_BY_LOCATION_NAME_FILE,
+    loader=LocationGroups.table_loader(LOCATION_GROUPS_FILE, 'datetime_bin', COUNTS_15M_BY_LOCATION_NAME_ARROW_FILE),
+    depends_on=[LOCATION_GROUPS_FILE, COUNTS_15M_BY_LOCATION_NAME_ARROW_FILE],
+    preload=False
+)
+# Datasets with a memory-mappable Arrow copy, which is cheaper to open than reading from the partitioned copy
+ARROW_COPIES = {
+    'counts_15m': (COUNTS_15M_FILE, COUNTS_15M_ARROW_FILE),
+    'counts_15m_by_location_name': (COUNTS_15M_BY_LOCATION_NAME_FILE, COUNTS_15M_BY_LOCATION_NAME_ARROW_FILE),
+}
+datasets.register('counts_15m_partitioned', COUNTS_15M_PARTITIONED_DIR, loader=PartitionedTimeSeries.opener('datetime_bin'))
+datasets.register('counts_15m_by_location_name_partitioned', COUNTS_15M_BY_LOCATION_NAME_PARTITIONED_DIR, loader=PartitionedTimeSeries.opener('datetime_bin'))
+datasets.register('counts_daily_chart', COUNTS_DAILY_CHART_FILE, loader=DailyChart.from_npz)
+datasets.register('counts_daily_volume_index', COUNTS_DAILY_VOLUME_INDEX_FILE, loader=DailyVolumeIndex.from_npz)
+datasets.register('counts_15m_profile', COUNTS_15M_PROFILE_FILE, loader=TimeOfDayProfile.from_npz)
+datasets.register('counts_15m_by_location_name_profile', COUNTS_15M_BY_LOCATION_NAME_PROFILE_FILE, loader=TimeOfDayProfile.from_npz)
 
 # Create a Blueprint for API version 1
 api_bp = Blueprint('api', __name__, url_prefix='/api/v1')
+http_cache.init_blueprint(api_bp)
 
 @api_bp.route('/hi', methods=['GET'])
 def hi():
     return jsonify({"status": "ok", "message": "hello from toronto-bike-traffic API"}), 200
 
+@api_bp.route('/cache-stats', methods=['GET'])
+def get_cache_stats():
+    """Endpoint to return the response cache's hit/miss counters for monitoring."""
+    return jsonify(response_cache.stats()), 200
+
+@api_bp.route('/ready', methods=['GET'])
+def get_readiness():
+    """
+    Readiness check: 503 while datasets are still being preloaded at startup,
+    200 once the worker is warm. Also returns how long each dataset took to load.
+    """
+    ready = datasets.ready.is_set()
+    body = {
+        "ready": ready,
+        "load_times": {name: round(seconds, 4) for name, seconds in datasets.load_times.items()}
+    }
+    return jsonify(body), 200 if ready else 503
+
 def get_table(table_name):
     """Helper function to fetch all records from a specified table."""
     # Validate table name to prevent SQL injection
@@ -51,83 +138,85 @@ def get_table(table_name):
         return jsonify({"error": f"Database error: {e}."}), 500
 
 @api_bp.route('/bicycle-counters')
+@http_cache.track(DB_PATH)
 def get_bicycle_counters():
     """Endpoint to return data from the primary bicycle counters table."""
     return get_table('bicycle_counters')
 
 @api_bp.route('/daily-counts')
+@http_cache.track(DB_PATH)
 def get_daily_counts():
     """Endpoint to return data from the daily count records."""
     return get_table('daily_bicycle_counts')
 
 @api_bp.route('/monthly-counts')
+@http_cache.track(DB_PATH)
 def get_monthly_counts():
     """Endpoint to return data from the monthly count records."""
     return get_table('monthly_bicycle_counts')
 
 @api_bp.route('/annual-counts')
+@http_cache.track(DB_PATH)
 def get_yearly_counts():
     """Endpoint to return data from the yearly count records."""
     return get_table('annual_bicycle_counts')
 
-def load_data_from_cache(
-    file_path_config_key: str, 
-    cache_attribute_name: str, 
-    is_required: bool = True
-) -> dict:
+def time_series_slice(dataset_name: str, start, end, key_col: str = None, keys: list = None) -> TimeSeriesTable:
     """
-    Loads data from a file path specified in Flask config, caches it in 
-    the current_app instance, and returns a copy of the cached data.
-
-    :param file_path_config_key: The key in current_app.config that holds the file path.
-    :param cache_attribute_name: The attribute name to use for caching on current_app 
-                                 (e.g., 'location_geojson_cache').
-    :param is_required: If True, raises FileNotFoundError if the file is missing.
-    :return: A copy of the loaded data (dictionary or list).
+    Returns the rows of a time-series dataset with start <= time <= end,
+    optionally only those whose key_col value is one of keys.
+
+    A table already in memory, or with an up-to-date Arrow copy to map, is
+    sliced directly. Otherwise, when pyarrow is installed and the ETL wrote
+    an up-to-date partitioned copy ('<dataset_name>_partitioned'), only the
+    partitions and row groups covering the range are read instead of loading
+    the whole file. Within a dataset snapshot (e.g., a batch request), a
+    range inside one already read is sliced from that read.
+
+    :param dataset_name: The registered dataset name (e.g., 'counts_15m').
+    :param start: Inclusive lower bound.
+    :param end: Inclusive upper bound.
+    :param key_col: The column keys filters on (e.g., 'location_dir_id').
+    :param keys: The key values to keep (default: all rows).
     """
-    
-    # Check if the data is already cached
-    if not hasattr(current_app, cache_attribute_name):
-        
-        file_path = current_app.config.get(file_path_config_key)
-        
-        if not file_path:
-            raise RuntimeError(f"Configuration key '{file_path_config_key}' is not set in Flask config.")
+    table = datasets.loaded(dataset_name)
+    if table is None and dataset_name in ARROW_COPIES and has_current_arrow_copy(*ARROW_COPIES[dataset_name]):
+        table = datasets.get(dataset_name)
+    if table is None and PARTITIONED_READS_AVAILABLE and f'{dataset_name}_partitioned' in datasets:
+        partitioned = datasets.get_derived(f'{dataset_name}_partitioned', dataset_name)
+        if partitioned is not None:
+            scratch = datasets.snapshot_scratch()
+            key_filter = None if keys is None else tuple(sorted(keys))
+            reads = scratch.setdefault(('range_reads', dataset_name, key_col, key_filter), []) if scratch is not None else []
+            for (read_start, read_end), read in reads:
+                if read_start <= start and end <= read_end:
+                    return read.slice(start, end)
+            table = partitioned.slice(start, end, key_col, keys)
+            reads.append(((start, end), table))
+            return table
+    if table is None:
+        table = datasets.get(dataset_name)
+    return table.slice(start, end, key_col, keys)
+
+def load_feature_collection(dataset_name: str) -> FeatureCollection:
+    """
+    Returns a pre-encoded GeoJSON FeatureCollection from the dataset registry,
+    which loads it once per worker and reloads it when the file changes.
 
-        try:
-            # 1. Attempt to open and load the file
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                
-            # 2. Cache the data on the current_app instance
-            setattr(current_app, cache_attribute_name, data)
-            print(f"✅ Data loaded and cached successfully from: {file_path}")
-
-        except FileNotFoundError:
-            if is_required:
-                raise FileNotFoundError(f"Data file not found at {file_path}")
-            else:
-                # If not required, set cache to empty and return
-                empty_data = {"type": "FeatureCollection", "features": []}
-                setattr(current_app, cache_attribute_name, empty_data)
-                return empty_data.copy()
-            
-        except json.JSONDecodeError:
-            raise ValueError(f"Error decoding JSON data from {file_path}. File might be corrupted.")
-    
-    # Return a copy of the cached data to prevent accidental modification
-    return getattr(current_app, cache_attribute_name).copy()
+    :param dataset_name: The registered dataset name (e.g., 'counter_locations').
+    :raises FileNotFoundError: If the file is missing.
+    :raises ValueError: If the file is not valid JSON.
+    """
+    try:
+        return datasets.get(dataset_name)
+    except FileNotFoundError as e:
+        raise FileNotFoundError(f"Data file not found at {e.filename}")
 
 @api_bp.route('/counter-locations', methods=['GET'])
+@http_cache.track(*datasets.files('counter_locations'))
 def get_counter_locations():
-    
-    current_app.config['COUNTER_LOCATIONS_FILE'] = COUNTER_LOCATIONS_FILE
-
     try:
-        full_geojson = load_data_from_cache(
-            file_path_config_key='COUNTER_LOCATIONS_FILE',
-            cache_attribute_name='location_geojson_cache'
-        )
+        feature_collection = load_feature_collection('counter_locations')
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -139,38 +228,20 @@ def get_counter_locations():
         except ValueError:
             return jsonify({"error": "Invalid location_dir_id format. Must be an integer-like string."}), 400
 
-        filtered_features = [
-            feature
-            for feature in full_geojson.get('features', [])
-            if str(feature.get('id')) == target_id_str
-        ]
+        return json_response(feature_collection.filtered_body(target_id_str)), 200
 
-        result_geojson = {
-            "type": "FeatureCollection",
-            "features": filtered_features
-        }
-    else:
-        result_geojson = full_geojson
-    
-    if not result_geojson.get('features'):
-        result_geojson['features'] = []
-        
-    return jsonify(result_geojson), 200
+    return json_response(feature_collection.body), 200
 
 @api_bp.route('/counter-groups', methods=['GET'])
+@http_cache.track(*datasets.files('counter_groups'))
 def get_counter_groups():
     """
-    Reads the pre-aggregated counter group data from the JSON file, 
-    using application-level caching to prevent file I/O on subsequent requests.
-    Returns the data as a JSON response.
+    Returns the pre-aggregated counter group data, served from the encoded
+    copy kept by the dataset registry so no file I/O or JSON encoding happens
+    on subsequent requests.
     """
-    current_app.config['COUNTER_GROUPS_FILE'] = COUNTER_GROUPS_FILE
-    
     try:
-        counter_groups_data = load_data_from_cache(
-            file_path_config_key='COUNTER_GROUPS_FILE',
-            cache_attribute_name='counter_groups_cache' 
-        )
+        counter_groups = load_feature_collection('counter_groups')
     except FileNotFoundError:
         return jsonify({
             "error": f"Aggregated data file not found at {COUNTER_GROUPS_FILE}. Please run the counter aggregation job first."
@@ -178,9 +249,59 @@ def get_counter_groups():
     except Exception as e:
         return jsonify({"error": f"Failed to load counter groups data: {e}"}), 500
 
-    return jsonify(counter_groups_data), 200
+    return json_response(counter_groups.body), 200
+
+def location_filter(param: str):
+    """
+    Returns the values of an optional, repeatable location filter query
+    parameter of the date-range endpoints (e.g., ?location_dir_id=1&location_dir_id=2),
+    or None when it is absent and every location is returned.
+
+    Filtered queries of in-memory tables only read the selected locations'
+    rows, through the table's key index.
+    """
+    return request.args.getlist(param) or None
+
+def date_range_response(labels, codes, locations: dict, value_name: str, values):
+    """
+    Builds the response of a date-range endpoint in the format named by the
+    optional 'format' query parameter.
+
+    - json (default): {time_key: [records]}, or [] when there is no data.
+    - columnar: each location once, then per time key an array of values
+      parallel to the locations (see encode_columnar).
+    - arrow: an Arrow IPC stream of (key, location fields, value) rows;
+      only available when pyarrow is installed.
+
+    :param labels: The time keys, in chronological order.
+    :param codes: For every row, the position of its time key in labels.
+    :param locations: Mapping of location field name to a column array.
+    :param value_name: The name of the value field (e.g., 'daily_volume').
+    :param values: The value of every row.
+    """
+    response_format = request.args.get('format', 'json')
+
+    if response_format == 'json':
+        if not len(codes):
+            return jsonify([]), 200
+        body = encode_grouped_records(labels, codes, {**locations, value_name: values})
+        return json_response(body), 200
+
+    if response_format == 'columnar':
+        body = encode_columnar(labels, codes, locations, value_name, values)
+        return json_response(body), 200
+
+    if response_format == 'arrow':
+        if not ARROW_AVAILABLE:
+            return jsonify({"error": "format=arrow is not available on this server (pyarrow is not installed)."}), 501
+        body = encode_arrow_stream(labels, codes, locations, value_name, values)
+        return Response(body, mimetype='application/vnd.apache.arrow.stream'), 200
+
+    return jsonify({"error": f"Invalid format: {response_format}. Use json, columnar or arrow."}), 400
 
 @api_bp.route('/daily-counts-in-date-range')
+@http_cache.track(*datasets.files('counts_daily'))
+@response_cache.cached
 def get_daily_counts_in_date_range():
     start_date = request.args.get('start')  # Format: YYYY-MM-DD
     end_date = request.args.get('end')      # Format: YYYY-MM-DD
@@ -194,25 +315,22 @@ def get_daily_counts_in_date_range():
     except Exception:
         return jsonify({"error": "Invalid date format. Use YYYY-MM-DD."}), 400
     
-    df = pd.read_parquet(COUNTS_DAILY_FILE)
-    df = df.set_index('dt')
-    df = df.sort_index()
-    
-    filtered_df = df.loc[start_dt:end_dt]
-    filtered_df = filtered_df.reset_index(names=['dt'])
+    location_dir_ids = location_filter('location_dir_id')
+    table = datasets.get('counts_daily').slice(start_dt, end_dt, 'location_dir_id', location_dir_ids)
 
-    if filtered_df.empty:
-        return jsonify([]), 200
-    
-    result_df = filtered_df[["dt", "location_dir_id", "daily_volume"]].copy()
-    result_df['dt'] = result_df['dt'].dt.strftime('%a, %d %b %Y %H:%M:%S GMT')
-    grouped_data = result_df.groupby('dt').apply(
-        lambda x: x[['daily_volume', 'location_dir_id']].to_dict(orient='records')
-    ).to_dict()
+    codes, days = pd.factorize(table.times)
+    labels = pd.DatetimeIndex(days).strftime('%a, %d %b %Y %H:%M:%S GMT')
 
-    return jsonify(grouped_data), 200
+    return date_range_response(
+        labels, codes,
+        locations={'location_dir_id': table.columns['location_dir_id']},
+        value_name='daily_volume',
+        values=table.columns['daily_volume'],
+    )
 
 @api_bp.route('/daily-counts-by-location-name-in-date-range')
+@http_cache.track(*datasets.files('counts_daily_by_location_name'))
+@response_cache.cached
 def get_daily_counts_by_location_name_in_date_range():
     start_date = request.args.get('start')  # Format: YYYY-MM-DD
     end_date = request.args.get('end')      # Format: YYYY-MM-DD
@@ -226,50 +344,68 @@ def get_daily_counts_by_location_name_in_date_range():
     except Exception:
         return jsonify({"error": "Invalid date format. Use YYYY-MM-DD."}), 400
     
-    df = pd.read_parquet(COUNTS_DAILY_BY_LOCATION_NAME_FILE)
-    df = df.set_index('dt')
-    df = df.sort_index()
-    
-    filtered_df = df.loc[start_dt:end_dt]
-    filtered_df = filtered_df.reset_index(names=['dt'])
-
-    if filtered_df.empty:
-        return jsonify([]), 200
-    
-    result_df = filtered_df[['name', 'coordinates', "dt", "location_dir_ids", "daily_volume"]].copy()
-    result_df['dt'] = result_df['dt'].dt.strftime('%a, %d %b %Y %H:%M:%S GMT')
-    grouped_data = result_df.groupby('dt').apply(
-        lambda x: x[['name', 'daily_volume', 'location_dir_ids', 'coordinates']].to_dict(orient='records')
-    ).to_dict()
-
-    return jsonify(grouped_data), 200
+    names = location_filter('name')
+    table = datasets.get('counts_daily_by_location_name').slice(start_dt, end_dt, 'name', names)
+
+    codes, days = pd.factorize(table.times)
+    labels = pd.DatetimeIndex(days).strftime('%a, %d %b %Y %H:%M:%S GMT')
+
+    return date_range_response(
+        labels, codes,
+        locations={
+            'name': table.columns['name'],
+            'location_dir_ids': table.columns['location_dir_ids'],
+            'coordinates': table.columns['coordinates'],
+        },
+        value_name='daily_volume',
+        values=table.columns['daily_volume'],
+    )
 
 @api_bp.route('/daily-counts-chart')
+@http_cache.track(*datasets.files('counts_daily_chart'))
+@response_cache.cached
 def get_daily_counts_chart():
-    def get_chart_data_cached():
-        cache_key = "_daily_chart_json_cache"
-        # 1. Check if the "Ready-to-Serve" JSON is already in memory
-        if not hasattr(current_app, cache_key):
-            file_path = COUNTS_DAILY_CHART_FILE
-            print(f"🚀 Cache Miss: Processing Parquet from {file_path}...")
-            # 2. Load and Transform
-            df = pd.read_parquet(file_path)
-            # reset_index() moves 'date' from the index into a column.
-            # to_dict(orient='records') converts NaNs to JSON 'null' automatically.
-            clean_data = df.replace({np.nan: None}).reset_index().to_dict(orient='records')
-            processed_data = {
-                "availableLocations": df.columns.tolist(),
-                "data": clean_data
-            }
-            # Store the processed object in Flask's memory
-            setattr(current_app, cache_key, processed_data)
-            
-        return getattr(current_app, cache_key)
-
-    data = get_chart_data_cached()
-    return jsonify(data)
+    """
+    Returns the daily chart payload, {"availableLocations": [...], "data":
+    [records]}, assembled from the sparse chart the dataset registry holds
+    in memory.
+
+    Optional query parameters narrow it down:
+    - start, end: the first and last day (YYYY-MM-DD), inclusive.
+    - locations: a location to include; repeat it for several (default: all).
+    - resolution: day (default); week or month for each location's mean
+      daily volume per week or month; or a number of points (at least 3)
+      to downsample the days to, keeping the shape of the total volume.
+
+    Without parameters every location on every day is returned.
+    """
+    chart = datasets.get('counts_daily_chart')
+    if not request.args:
+        return json_response(chart.body()), 200
+
+    start_date = request.args.get('start')
+    end_date = request.args.get('end')
+    try:
+        start_dt = pd.to_datetime(start_date) if start_date else None
+        end_dt = pd.to_datetime(end_date) if end_date else None
+    except Exception:
+        return jsonify({"error": "Invalid date format. Use YYYY-MM-DD."}), 400
+
+    resolution = request.args.get('resolution', 'day')
+    if resolution not in DailyChart.RESOLUTIONS and not (resolution.isdigit() and int(resolution) >= 3):
+        return jsonify({"error": f"Invalid resolution: {resolution}. Use day, week, month or a number of points (at least 3)."}), 400
+
+    locations = request.args.getlist('locations') or None
+    try:
+        body = chart.encode(start_dt, end_dt, locations, resolution)
+    except KeyError as e:
+        return jsonify({"error": e.args[0]}), 400
+
+    return json_response(body), 200
 
 @api_bp.route('/fifteen-min-counts-in-date-range')
+@http_cache.track(*datasets.files('counts_15m', 'counts_15m_profile'))
+@response_cache.cached
 def get_fifteen_min_counts_in_date_range():
     start_date = request.args.get('start')  # Format: YYYY-MM-DD
     end_date = request.args.get('end')      # Format: YYYY-MM-DD
@@ -283,31 +419,36 @@ def get_fifteen_min_counts_in_date_range():
     except Exception:
         return jsonify({"error": "Invalid date format. Use YYYY-MM-DD."}), 400
     
-    df = pd.read_parquet(COUNTS_15M_FILE)
-    df = df.set_index('datetime_bin')
-    df = df.sort_index()
-    
-    filtered_df = df.loc[start_dt:end_dt]
-    filtered_df = filtered_df.reset_index(names=['datetime_bin'])
+    location_dir_ids = location_filter('location_dir_id')
+    profile = datasets.get_derived('counts_15m_profile', 'counts_15m')
 
-    if filtered_df.empty:
-        return jsonify([]), 200
-    
-    filtered_df["time_bin"] = filtered_df["datetime_bin"].dt.strftime("%H:%M:%S")
-    
-    agg_df = (
-        filtered_df
-        .groupby(["location_dir_id", "time_bin"], as_index=False)
-        .agg(avg_bin_volume=("bin_volume", "mean"))
-    )
+    if profile is not None:
+        agg_df = profile.average(start_dt, end_dt, value_name='avg_bin_volume')
+        if location_dir_ids is not None:
+            agg_df = agg_df[agg_df['location_dir_id'].isin(location_dir_ids)]
+    else:
+        # No precomputed profile: average the raw 15-minute rows in the range
+        table = time_series_slice('counts_15m', start_dt, end_dt, 'location_dir_id', location_dir_ids)
+        filtered_df = table.to_frame(["datetime_bin", "location_dir_id", "bin_volume"])
+        filtered_df["time_bin"] = filtered_df["datetime_bin"].dt.strftime("%H:%M:%S")
+        agg_df = (
+            filtered_df
+            .groupby(["location_dir_id", "time_bin"], as_index=False)
+            .agg(avg_bin_volume=("bin_volume", "mean"))
+        )
 
-    grouped_data = agg_df.groupby('time_bin').apply(
-        lambda x: x[['location_dir_id', 'avg_bin_volume']].to_dict(orient='records')
-    ).to_dict()
+    codes, labels = pd.factorize(agg_df['time_bin'], sort=True)
 
-    return jsonify(grouped_data), 200
+    return date_range_response(
+        labels, codes,
+        locations={'location_dir_id': agg_df['location_dir_id'].to_numpy()},
+        value_name='avg_bin_volume',
+        values=agg_df['avg_bin_volume'].to_numpy(),
+    )
 
 @api_bp.route('/fifteen-min-counts-by-location-name-in-date-range')
+@http_cache.track(*datasets.files('counts_15m_by_location_name', 'counts_15m_by_location_name_profile'))
+@response_cache.cached
 def get_fifteen_min_counts_by_location_name_in_date_range():
     start_date = request.args.get('start')  # Format: YYYY-MM-DD
     end_date = request.args.get('end')      # Format: YYYY-MM-DD
@@ -321,31 +462,40 @@ def get_fifteen_min_counts_by_location_name_in_date_range():
     except Exception:
         return jsonify({"error": "Invalid date format. Use YYYY-MM-DD."}), 400
     
-    df = pd.read_parquet(COUNTS_15M_BY_LOCATION_NAME_FILE)
-    df = df.set_index('datetime_bin')
-    df = df.sort_index()
-    
-    filtered_df = df.loc[start_dt:end_dt]
-    filtered_df = filtered_df.reset_index(names=['datetime_bin'])
-
-    if filtered_df.empty:
-        return jsonify([]), 200
-    
-    filtered_df["time_bin"] = filtered_df["datetime_bin"].dt.strftime("%H:%M:%S")
-    
-    agg_df = (
-        filtered_df
-        .groupby(["name", "time_bin", "location_dir_ids", "coordinates"], as_index=False)
-        .agg(avg_bin_volume=("total_bin_volume", "mean"))
-    )
+    names = location_filter('name')
+    profile = datasets.get_derived('counts_15m_by_location_name_profile', 'counts_15m_by_location_name')
 
-    grouped_data = agg_df.groupby('time_bin').apply(
-        lambda x: x[['name', 'avg_bin_volume', "location_dir_ids", "coordinates"]].to_dict(orient='records')
-    ).to_dict()
+    if profile is not None:
+        agg_df = profile.average(start_dt, end_dt, value_name='avg_bin_volume')
+        if names is not None:
+            agg_df = agg_df[agg_df['name'].isin(names)]
+    else:
+        # No precomputed profile: average the raw 15-minute rows in the range
+        table = time_series_slice('counts_15m_by_location_name', start_dt, end_dt, 'name', names)
+        filtered_df = table.to_frame(["datetime_bin", "name", "location_dir_ids", "coordinates", "total_bin_volume"])
+        filtered_df["time_bin"] = filtered_df["datetime_bin"].dt.strftime("%H:%M:%S")
+        agg_df = (
+            filtered_df
+            .groupby(["name", "time_bin", "location_dir_ids", "coordinates"], as_index=False)
+            .agg(avg_bin_volume=("total_bin_volume", "mean"))
+        )
 
-    return jsonify(grouped_data), 200
+    codes, labels = pd.factorize(agg_df['time_bin'], sort=True)
+
+    return date_range_response(
+        labels, codes,
+        locations={
+            'name': agg_df['name'].to_numpy(),
+            'location_dir_ids': agg_df['location_dir_ids'].to_numpy(),
+            'coordinates': agg_df['coordinates'].to_numpy(),
+        },
+        value_name='avg_bin_volume',
+        values=agg_df['avg_bin_volume'].to_numpy(),
+    )
 
 @api_bp.route('/avg-daily-vol-for-date-range', methods=['GET'])
+@http_cache.track(*datasets.files('counts_daily', 'counts_daily_volume_index'))
+@response_cache.cached
 def get_avg_daily_vol_for_date_range():
     start_date = request.args.get('start')  # Format: YYYY-MM-DD
     end_date = request.args.get('end')      # Format: YYYY-MM-DD
@@ -359,23 +509,123 @@ def get_avg_daily_vol_for_date_range():
     except Exception:
         return jsonify({"error": "Invalid date format. Use YYYY-MM-DD."}), 400
     
-    df = pd.read_parquet(COUNTS_DAILY_FILE)
-    
-    mask = (df["dt"] >= start_dt) & (df["dt"] <= end_dt)
-    filtered_df = df.loc[mask]
-
-    if filtered_df.empty:
-        return jsonify([]), 200
-    
+    location_dir_ids = location_filter('location_dir_id')
+    volume_index = None
     if start_dt < end_dt:
-        agg_df = (
-            filtered_df
-            .groupby(["location_dir_id"], as_index=False)
-            .agg(avg_daily_volume=("daily_volume", "mean"))
-        )
-        result_df = agg_df[["location_dir_id", "avg_daily_volume"]]
+        volume_index = datasets.get_derived('counts_daily_volume_index', 'counts_daily')
+
+    if volume_index is not None:
+        result_df = volume_index.average(start_dt, end_dt, value_name='avg_daily_volume')
+        if location_dir_ids is not None:
+            result_df = result_df[result_df['location_dir_id'].isin(location_dir_ids)]
     else:
-        result_df = filtered_df[["location_dir_id", "daily_volume"]].copy()
-        result_df.rename(columns={"daily_volume": "avg_daily_volume"}, inplace=True)
+        table = datasets.get('counts_daily').slice(start_dt, end_dt, 'location_dir_id', location_dir_ids)
+        # In the file's (record_id) order, as a plain filter of the file returns them
+        filtered_df = table.to_frame(["record_id", "location_dir_id", "daily_volume"]).sort_values('record_id', kind='stable')
+
+        if start_dt < end_dt:
+            agg_df = (
+                filtered_df
+                .groupby(["location_dir_id"], as_index=False)
+                .agg(avg_daily_volume=("daily_volume", "mean"))
+            )
+            result_df = agg_df[["location_dir_id", "avg_daily_volume"]]
+        else:
+            result_df = filtered_df[["location_dir_id", "daily_volume"]].copy()
+            result_df.rename(columns={"daily_volume": "avg_daily_volume"}, inplace=True)
+
+    if result_df.empty:
+        return jsonify([]), 200
 
-    return jsonify(result_df.to_dict(orient="records")), 200
\ No newline at end of file
+    body = encode_records({
+        'location_dir_id': result_df['location_dir_id'].to_numpy(),
+        'avg_daily_volume': result_df['avg_daily_volume'].to_numpy(),
+    })
+
+    return json_response(body), 200
+
+def run_sub_query(path: str, params: dict) -> tuple:
+    """
+    Runs a GET route of this blueprint in-process, without the HTTP cache
+    headers, and returns its (status code, JSON body).
+
+    :param path: The route's path below the blueprint (e.g., '/counter-groups').
+    :param params: The query parameters; a list value repeats the parameter.
+    """
+    with current_app.test_request_context(api_bp.url_prefix + path, method='GET', query_string=params):
+        if request.routing_exception is not None or request.blueprint != api_bp.name or request.endpoint == 'api.post_batch':
+            return 404, json.dumps({"error": f"Unknown endpoint: {path}"}, separators=(',', ':'))
+        try:
+            response = current_app.make_response(current_app.dispatch_request())
+        except Exception as e:
+            return 500, json.dumps({"error": f"Query failed: {e}"}, separators=(',', ':'))
+
+    if not response.is_json:
+        return 400, json.dumps({"error": f"Batch queries must return JSON, {path} returned {response.mimetype}."}, separators=(',', ':'))
+    return response.status_code, response.get_data(as_text=True).rstrip('\n')
+
+def _range_width(params: dict) -> pd.Timedelta:
+    """
+    The length of a query's start/end range, or zero if it has none or it
+    can't be parsed. Of a repeated parameter, the first value is used, as
+    request.args.get does.
+    """
+    def first(value):
+        return value[0] if isinstance(value, list) and value else value
+
+    try:
+        width = pd.to_datetime(first(params['end'])) - pd.to_datetime(first(params['start']))
+    except Exception:
+        return pd.Timedelta(0)
+    return width if isinstance(width, pd.Timedelta) and not pd.isna(width) else pd.Timedelta(0)
+
+@api_bp.route('/batch', methods=['POST'])
+def post_batch():
+    """
+    Runs several GET queries of this API in one round trip.
+
+    The request body lists them in order:
+
+        {"queries": [{"path": "/daily-counts-in-date-range",
+                      "params": {"start": "2024-01-01", "end": "2024-01-31"}},
+                     {"path": "/counter-groups"}]}
+
+    The response holds one result per query, in the same order:
+
+        {"results": [{"body": [...], "status": 200}, {"body": {...}, "status": 200}]}
+
+    All queries are answered from one snapshot of the datasets. Identical
+    queries run once. Wider date ranges run first, so narrower ones that fall
+    inside them can reuse their range reads, and every query can hit the
+    response cache. At most MAX_BATCH_QUERIES queries are accepted.
+    """
+    payload = request.get_json(silent=True)
+    queries = payload.get('queries') if isinstance(payload, dict) else None
+    if not isinstance(queries, list):
+        return jsonify({"error": 'Expected a JSON body like {"queries": [{"path": ..., "params": {...}}]}.'}), 400
+    if len(queries) > MAX_BATCH_QUERIES:
+        return jsonify({"error": f"Too many queries: {len(queries)}. The limit is {MAX_BATCH_QUERIES}."}), 400
+
+    keys = []
+    unique = {}
+    for i, query in enumerate(queries):
+        path = query.get('path') if isinstance(query, dict) else None
+        params = query.get('params', {}) if isinstance(query, dict) else None
+        # Query strings and fragments go in params; werkzeug can't build a request from a path holding them
+        if (not isinstance(path, str) or not path.startswith('/') or '?' in path or '#' in path
+                or not isinstance(params, dict)):
+            return jsonify({"error": f"Invalid query at position {i}: expected a path starting with / and a params object."}), 400
+        params = {name: [str(v) for v in value] if isinstance(value, list) else str(value) for name, value in params.items()}
+        key = (path, tuple(sorted((name, tuple(value) if isinstance(value, list) else value) for name, value in params.items())))
+        keys.append(key)
+        unique.setdefault(key, params)
+
+    results = {}
+    with datasets.snapshot():
+        for key in sorted(unique, key=lambda key: _range_width(unique[key]), reverse=True):
+            results[key] = run_sub_query(key[0], unique[key])
+
+    body = '{"results":[' + ','.join(
+        '{"body":' + results[key][1] + ',"status":' + str(results[key][0]) + '}' for key in keys
+    ) + ']}'
+    return json_response(body), 200
@@ -1,21 +1,60 @@
 from etl_pipelines.bicycle_counters.client import *
 from etl_pipelines.bicycle_counters.loader import *
+from modules.task_graph import TaskGraph
+from concurrent.futures import ProcessPoolExecutor
+import argparse
 import asyncio
+import multiprocessing
+import os
 
-async def main():
-    print("Starting ETL process")
+async def main(incremental: bool = False, workers: int = None):
+    print(f"Starting {'incremental ' if incremental else ''}ETL process")
 
-    bcl = BicycleCountersLoader()
+    # A full run reloads the SQLite tables in bulk, an incremental one upserts
+    bcl = BicycleCountersLoader(incremental=incremental, bulk_load=not incremental)
 
-    async def data_files_used_in_app():
+    async def data_files_used_in_app(executor):
         print("Perparing data files used in app")
-        await bcl.counter_groups_to_geojson()
-        await bcl.counter_locations_to_geojson()
-        await bcl.counts_daily_to_parquet()
-        await bcl.counts_daily_by_location_name_to_parquet()
-        await bcl.counts_daily_chart_to_parquet()
-        await bcl.counts_15m_to_parquet()
-        await bcl.counts_15m_by_location_name_to_parquet()
+
+        def download(step_name):
+            return getattr(bcl, step_name)
+
+        def transform(step_name):
+            # CPU-bound steps that only read the files written by their
+            # dependencies, run in the process pool
+            return lambda: bcl.run_step_in_executor(executor, step_name)
+
+        graph = TaskGraph()
+        graph.add('counter_groups', download('counter_groups_to_geojson'))
+        graph.add('counter_locations', download('counter_locations_to_geojson'))
+        graph.add('counts_daily', download('counts_daily_to_parquet'))
+        graph.add('counts_15m', download('counts_15m_to_parquet'))
+        graph.add('counts_daily_by_location_name', transform('counts_daily_by_location_name_to_parquet'),
+                  depends_on=['counts_daily', 'counter_groups'])
+        graph.add('counts_daily_chart', transform('counts_daily_chart_to_npz'),
+                  depends_on=['counts_daily'])
+        graph.add('counts_15m_by_location_name', transform('counts_15m_by_location_name_to_parquet'),
+                  depends_on=['counts_15m', 'counter_groups'])
+        graph.add('counts_daily_arrow', transform('counts_daily_to_arrow'),
+                  depends_on=['counts_daily'])
+        graph.add('counts_daily_by_location_name_arrow', transform('counts_daily_by_location_name_to_arrow'),
+                  depends_on=['counts_daily_by_location_name'])
+        # The steps derived from a 15-minute file each read all of it, so they
+        # run one after another to hold one copy of the file at a time
+        graph.add('counts_15m_partitioned', transform('counts_15m_to_partitioned_parquet'),
+                  depends_on=['counts_15m'])
+        graph.add('counts_15m_arrow', transform('counts_15m_to_arrow'),
+                  depends_on=['counts_15m_partitioned'])
+        graph.add('counts_15m_profile', transform('counts_15m_profile_to_npz'),
+                  depends_on=['counts_15m_arrow'])
+        graph.add('counts_15m_by_location_name_partitioned', transform('counts_15m_by_location_name_to_partitioned_parquet'),
+                  depends_on=['counts_15m_by_location_name'])
+        graph.add('counts_15m_by_location_name_arrow', transform('counts_15m_by_location_name_to_arrow'),
+                  depends_on=['counts_15m_by_location_name_partitioned'])
+        graph.add('counts_15m_by_location_name_profile', transform('counts_15m_by_location_name_profile_to_npz'),
+                  depends_on=['counts_15m_by_location_name_arrow'])
+        await graph.run()
+
         print("Finished perparing data files used in app")
 
     async def data_files_not_used_in_app():
@@ -27,17 +66,50 @@ async def main():
         bcl.load_annual_counts_into_sqlite()
         bcl.load_monthly_counts_into_sqlite()
         bcl.load_hourly_counts_into_sqlite()
-        bcl.load_location_group_stats_overall_into_sqlite()
-        bcl.load_location_group_stats_yearly_into_sqlite()
-        bcl.load_location_group_stats_monthly_into_sqlite()
-        bcl.load_location_group_stats_weekly_into_sqlite()
+        bcl.load_location_group_stats_into_sqlite()
         bcl.load_fifteen_min_counts_by_year_and_month_into_sqlite()
         print("Finished perparing data files not used in app")
 
-    await data_files_used_in_app()
-    # await data_files_not_used_in_app()
+    async def epoch_sqlite_tables():
+        print("Perparing SQLite tables with the integer (epoch) schema")
+        await bcl.load_daily_counts_into_epoch_sqlite()
+        await bcl.load_15m_counts_into_epoch_sqlite()
+        bcl.load_hourly_counts_into_epoch_sqlite()
+        bcl.load_monthly_counts_into_epoch_sqlite()
+        bcl.load_fifteen_min_counts_by_year_and_month_into_epoch_sqlite()
+        print("Finished perparing SQLite tables with the integer (epoch) schema")
+
+    workers = os.cpu_count() if workers is None else workers
+    # Spawned workers don't inherit the event loop or the pooled session
+    executor = (
+        ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+        if workers > 0 else None
+    )
+
+    # One pooled session and package metadata lookup for the whole run
+    try:
+        async with bcl:
+            await data_files_used_in_app(executor)
+            # await data_files_not_used_in_app()
+            # await epoch_sqlite_tables()
+    finally:
+        if executor is not None:
+            executor.shutdown()
 
     print('Finished ETL process')
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Build the data files used by the API.")
+    parser.add_argument(
+        '--incremental',
+        action='store_true',
+        help="Only fetch resources that changed since the last run and append their new rows."
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=None,
+        help="Processes for the CPU-bound steps (default: the number of CPUs; 0 runs them in this process)."
+    )
+    args = parser.parse_args()
+    asyncio.run(main(incremental=args.incremental, workers=args.workers))
\ No newline at end of file
@@ -0,0 +1,238 @@
+import json
+import numpy as np
+import pandas as pd
+from flask import current_app
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+ARROW_AVAILABLE = pa is not None
+
+
+class CodedColumn():
+    """
+    A text column held as integer codes into its distinct values (e.g., the
+    location group names of the by-location-name datasets).
+
+    Slices share the codes' memory like a NumPy slice would, np.asarray()
+    decodes the column, and _encode_column encodes each value only once.
+    """
+
+    def __init__(self, codes: np.ndarray, values: np.ndarray):
+        self.codes = codes
+        self.values = values
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __getitem__(self, key) -> 'CodedColumn':
+        return CodedColumn(self.codes[key], self.values)
+
+    def __array__(self, dtype=None, copy=None) -> np.ndarray:
+        decoded = self.values[self.codes]
+        return decoded if dtype is None else decoded.astype(dtype)
+
+
+def _encode_column(values: np.ndarray, nan_as_null: bool = False) -> np.ndarray:
+    """
+    Encodes every value of a column as a JSON fragment, formatted exactly as
+    json.dumps would format it.
+
+    :param nan_as_null: If True, NaNs are encoded as null (as json.dumps
+                        formats None) instead of NaN.
+    :return: An object array of JSON strings, one per value.
+    """
+    if isinstance(values, CodedColumn):
+        encoded_values = np.array([json.dumps(value) for value in values.values.tolist()], dtype=object)
+        return encoded_values[values.codes]
+
+    values = np.asarray(values)
+
+    if values.dtype.kind in 'iub':
+        # orjson only differs from json.dumps on floats and non-ASCII text
+        if orjson is not None:
+            encoded = orjson.dumps(values, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+        else:
+            encoded = json.dumps(values.tolist(), separators=(',', ':'))
+        return np.array(encoded[1:-1].split(',') if len(values) else [], dtype=object)
+
+    if values.dtype.kind == 'f':
+        encoded = json.dumps(values.tolist(), separators=(',', ':'))
+        encoded = np.array(encoded[1:-1].split(',') if len(values) else [], dtype=object)
+        if nan_as_null:
+            encoded[np.isnan(values)] = 'null'
+        return encoded
+
+    # Text columns (names, coordinates, ids) repeat a handful of values, so
+    # encode each distinct value once
+    codes, uniques = pd.factorize(values, use_na_sentinel=False)
+    encoded_uniques = np.array([json.dumps(value) for value in uniques], dtype=object)
+    return encoded_uniques[codes]
+
+
+def _encode_records(columns: dict, nan_as_null: bool = False) -> np.ndarray:
+    """
+    Encodes the rows of a set of parallel columns as JSON objects with sorted
+    keys.
+
+    :param columns: Mapping of record field name to a column array.
+    :param nan_as_null: If True, NaNs are encoded as null.
+    :return: An object array of JSON strings, one per row.
+    """
+    records = None
+    for i, name in enumerate(sorted(columns)):
+        prefix = ('{' if i == 0 else ',') + json.dumps(name) + ':'
+        fragment = prefix + _encode_column(columns[name], nan_as_null)
+        records = fragment if records is None else records + fragment
+    return records + '}'
+
+
+def encode_records(columns: dict, nan_as_null: bool = False) -> str:
+    """
+    Encodes parallel columns as a JSON list of records, byte-for-byte what
+    jsonify(df.to_dict(orient='records')) returns.
+
+    :param columns: Mapping of record field name to a column array.
+    :param nan_as_null: If True, NaNs are encoded as null, as jsonify
+                        returns for df.replace({np.nan: None}).
+    """
+    return '[' + ','.join(_encode_records(columns, nan_as_null).tolist()) + ']'
+
+
+def encode_grouped_records(labels, codes: np.ndarray, columns: dict) -> str:
+    """
+    Encodes parallel columns as a JSON object mapping each group label to the
+    list of its records, byte-for-byte what jsonify returns for the equivalent
+    groupby(...).apply(to_dict(orient='records')).to_dict().
+
+    Groups are ordered by label and records keep their row order.
+
+    :param labels: The group labels (JSON object keys).
+    :param codes: For every row, the position of its group in labels.
+    :param columns: Mapping of record field name to a column array.
+    """
+    labels = [str(label) for label in labels]
+    records = _encode_records(columns)
+
+    # Rank each label in sorted order, then bring rows of the same group together
+    label_order = sorted(range(len(labels)), key=labels.__getitem__)
+    rank = np.empty(len(labels), dtype=np.int64)
+    rank[label_order] = np.arange(len(labels))
+
+    order = np.argsort(rank[codes], kind='stable')
+    records = records[order].tolist()
+    ends = np.cumsum(np.bincount(codes, minlength=len(labels))[label_order])
+
+    parts = []
+    start = 0
+    for label_idx, end in zip(label_order, ends.tolist()):
+        parts.append(json.dumps(labels[label_idx]) + ':[' + ','.join(records[start:end]) + ']')
+        start = end
+    return '{' + ','.join(parts) + '}'
+
+
+def _factorize_locations(locations: dict) -> tuple:
+    """
+    Numbers the distinct locations described by one or more parallel columns.
+
+    :return: (codes, uniques) where uniques maps each column name to the
+             column's value for every distinct location, in sorted order.
+    """
+    names = list(locations)
+    columns = [np.asarray(locations[name]) for name in names]
+
+    if not len(columns[0]):
+        return np.empty(0, dtype=np.intp), {name: [] for name in names}
+
+    if len(columns) == 1:
+        codes, uniques = pd.factorize(columns[0], sort=True)
+        return codes, {names[0]: uniques.tolist()}
+
+    codes, uniques = pd.MultiIndex.from_arrays(columns).factorize(sort=True)
+    return codes, {name: uniques.get_level_values(i).tolist() for i, name in enumerate(names)}
+
+
+def encode_columnar(labels, codes: np.ndarray, locations: dict, value_name: str, values: np.ndarray) -> str:
+    """
+    Encodes grouped rows in the compact columnar layout: each distinct location
+    once, then for every group label an array of values parallel to the
+    locations, with null where a location has no row.
+
+        {"locations": {"location_dir_id": ["1", "2"]},
+         "daily_volume": {"Mon, 01 Jul 2024 00:00:00 GMT": [812, null]}}
+
+    Labels keep the order they are given in. If a location has several rows
+    in one group, the last one wins.
+
+    :param labels: The group labels.
+    :param codes: For every row, the position of its group in labels.
+    :param locations: Mapping of location field name to a column array.
+    :param value_name: The name of the value field (e.g., 'daily_volume').
+    :param values: The value of every row.
+    """
+    location_codes, unique_locations = _factorize_locations(locations)
+    n_locations = len(next(iter(unique_locations.values()), []))
+
+    matrix = np.full((len(labels), n_locations), 'null', dtype=object)
+    matrix[codes, location_codes] = _encode_column(values)
+
+    rows = [
+        json.dumps(str(label)) + ':[' + ','.join(row) + ']'
+        for label, row in zip(labels, matrix.tolist())
+    ]
+    return (
+        '{"locations":' + json.dumps(unique_locations, separators=(',', ':'))
+        + ',' + json.dumps(value_name) + ':{' + ','.join(rows) + '}}'
+    )
+
+
+def encode_arrow_stream(labels, codes: np.ndarray, locations: dict, value_name: str, values: np.ndarray) -> bytes:
+    """
+    Encodes grouped rows as an Arrow IPC stream with one record batch of
+    columns: 'key' and the location fields (dictionary-encoded), then the value.
+
+    Requires pyarrow; check ARROW_AVAILABLE before calling.
+
+    :param labels: The group labels.
+    :param codes: For every row, the position of its group in labels.
+    :param locations: Mapping of location field name to a column array.
+    :param value_name: The name of the value field (e.g., 'daily_volume').
+    :param values: The value of every row.
+    """
+    columns = {
+        'key': pa.DictionaryArray.from_arrays(
+            pa.array(np.asarray(codes, dtype=np.int32)),
+            pa.array([str(label) for label in labels], type=pa.string())
+        )
+    }
+    for name, column in locations.items():
+        columns[name] = pa.array(np.asarray(column)).dictionary_encode()
+    columns[value_name] = pa.array(np.asarray(values))
+
+    table = pa.table(columns)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def json_response(body: str):
+    """
+    Wraps a pre-encoded JSON body in a response, the same way jsonify does.
+
+    When the app is configured for indented JSON (e.g., debug mode) the body is
+    re-encoded through the app's JSON provider so the output still matches
+    jsonify.
+    """
+    provider = current_app.json
+    compact = getattr(provider, 'compact', None)
+    if compact is False or (compact is None and current_app.debug):
+        return provider.response(json.loads(body))
+    return current_app.response_class(body + '\n', mimetype=provider.mimetype)
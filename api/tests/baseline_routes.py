@@ -0,0 +1,214 @@
+"""
+The date-range, chart and GeoJSON routes as they were before the dataset
+registry: every request reads and aggregates the data file with pandas and
+encodes the result with jsonify. Tests compare the API's responses to these
+byte for byte.
+
+Each view reads its query parameters from flask.request, like the route it
+mirrors, and takes the file to read as an argument.
+"""
+import json
+
+import numpy as np
+import pandas as pd
+from flask import jsonify, request
+
+
+def _date_range():
+    """Returns (start, end) or the error response the routes gave."""
+    start_date = request.args.get('start')
+    end_date = request.args.get('end')
+
+    if not start_date or not end_date:
+        return None, (jsonify({"error": "Missing start or end date"}), 400)
+
+    try:
+        return (pd.to_datetime(start_date), pd.to_datetime(end_date)), None
+    except Exception:
+        return None, (jsonify({"error": "Invalid date format. Use YYYY-MM-DD."}), 400)
+
+
+def _sorted_range(file_path, time_col: str, start_dt, end_dt) -> pd.DataFrame:
+    df = pd.read_parquet(file_path)
+    df = df.set_index(time_col)
+    df = df.sort_index()
+
+    filtered_df = df.loc[start_dt:end_dt]
+    return filtered_df.reset_index(names=[time_col])
+
+
+def daily_counts_in_date_range(file_path):
+    dates, error = _date_range()
+    if error:
+        return error
+
+    filtered_df = _sorted_range(file_path, 'dt', *dates)
+    if filtered_df.empty:
+        return jsonify([]), 200
+
+    result_df = filtered_df[["dt", "location_dir_id", "daily_volume"]].copy()
+    result_df['dt'] = result_df['dt'].dt.strftime('%a, %d %b %Y %H:%M:%S GMT')
+    grouped_data = result_df.groupby('dt').apply(
+        lambda x: x[['daily_volume', 'location_dir_id']].to_dict(orient='records')
+    ).to_dict()
+
+    return jsonify(grouped_data), 200
+
+
+def daily_counts_by_location_name_in_date_range(file_path):
+    dates, error = _date_range()
+    if error:
+        return error
+
+    filtered_df = _sorted_range(file_path, 'dt', *dates)
+    if filtered_df.empty:
+        return jsonify([]), 200
+
+    result_df = filtered_df[['name', 'coordinates', "dt", "location_dir_ids", "daily_volume"]].copy()
+    result_df['dt'] = result_df['dt'].dt.strftime('%a, %d %b %Y %H:%M:%S GMT')
+    grouped_data = result_df.groupby('dt').apply(
+        lambda x: x[['name', 'daily_volume', 'location_dir_ids', 'coordinates']].to_dict(orient='records')
+    ).to_dict()
+
+    return jsonify(grouped_data), 200
+
+
+def fifteen_min_counts_in_date_range(file_path):
+    dates, error = _date_range()
+    if error:
+        return error
+
+    filtered_df = _sorted_range(file_path, 'datetime_bin', *dates)
+    if filtered_df.empty:
+        return jsonify([]), 200
+
+    filtered_df["time_bin"] = filtered_df["datetime_bin"].dt.strftime("%H:%M:%S")
+    agg_df = (
+        filtered_df
+        .groupby(["location_dir_id", "time_bin"], as_index=False)
+        .agg(avg_bin_volume=("bin_volume", "mean"))
+    )
+    grouped_data = agg_df.groupby('time_bin').apply(
+        lambda x: x[['location_dir_id', 'avg_bin_volume']].to_dict(orient='records')
+    ).to_dict()
+
+    return jsonify(grouped_data), 200
+
+
+def fifteen_min_counts_by_location_name_in_date_range(file_path):
+    dates, error = _date_range()
+    if error:
+        return error
+
+    filtered_df = _sorted_range(file_path, 'datetime_bin', *dates)
+    if filtered_df.empty:
+        return jsonify([]), 200
+
+    filtered_df["time_bin"] = filtered_df["datetime_bin"].dt.strftime("%H:%M:%S")
+    agg_df = (
+        filtered_df
+        .groupby(["name", "time_bin", "location_dir_ids", "coordinates"], as_index=False)
+        .agg(avg_bin_volume=("total_bin_volume", "mean"))
+    )
+    grouped_data = agg_df.groupby('time_bin').apply(
+        lambda x: x[['name', 'avg_bin_volume', "location_dir_ids", "coordinates"]].to_dict(orient='records')
+    ).to_dict()
+
+    return jsonify(grouped_data), 200
+
+
+def avg_daily_vol_for_date_range(file_path):
+    dates, error = _date_range()
+    if error:
+        return error
+    start_dt, end_dt = dates
+
+    df = pd.read_parquet(file_path)
+    mask = (df["dt"] >= start_dt) & (df["dt"] <= end_dt)
+    filtered_df = df.loc[mask]
+
+    if filtered_df.empty:
+        return jsonify([]), 200
+
+    if start_dt < end_dt:
+        agg_df = (
+            filtered_df
+            .groupby(["location_dir_id"], as_index=False)
+            .agg(avg_daily_volume=("daily_volume", "mean"))
+        )
+        result_df = agg_df[["location_dir_id", "avg_daily_volume"]]
+    else:
+        result_df = filtered_df[["location_dir_id", "daily_volume"]].copy()
+        result_df.rename(columns={"daily_volume": "avg_daily_volume"}, inplace=True)
+
+    return jsonify(result_df.to_dict(orient="records")), 200
+
+
+def daily_chart_frame(counts_daily_file) -> pd.DataFrame:
+    """The dense (date x location) chart table the ETL used to write to counts_daily_chart.parquet."""
+    df = pd.read_parquet(counts_daily_file)
+    df['location_name'] = df['location_name'].str.replace(' (retired)', '', regex=False)
+    df['dt'] = pd.to_datetime(df['dt'])
+
+    df_pivot = (
+        df.groupby(['dt', 'location_name'])['daily_volume']
+        .sum()
+        .unstack(level='location_name')
+    )
+
+    all_dates = pd.date_range(start=df_pivot.index.min(), end=df_pivot.index.max(), freq='D')
+    df_pivot = df_pivot.reindex(all_dates)
+    df_pivot = df_pivot.sort_index(axis=1)
+    df_pivot.index = df_pivot.index.strftime('%Y-%m-%d')
+    df_pivot.index.name = 'date'
+    return df_pivot
+
+
+def daily_counts_chart(counts_daily_file):
+    df = daily_chart_frame(counts_daily_file)
+    clean_data = df.replace({np.nan: None}).reset_index().to_dict(orient='records')
+    return jsonify({
+        "availableLocations": df.columns.tolist(),
+        "data": clean_data
+    })
+
+
+def counter_locations(file_path):
+    with open(file_path, 'r', encoding='utf-8') as f:
+        full_geojson = json.load(f)
+
+    location_dir_id = request.args.get('location_dir_id')
+
+    if location_dir_id:
+        try:
+            target_id_str = str(int(location_dir_id))
+        except ValueError:
+            return jsonify({"error": "Invalid location_dir_id format. Must be an integer-like string."}), 400
+
+        result_geojson = {
+            "type": "FeatureCollection",
+            "features": [
+                feature
+                for feature in full_geojson.get('features', [])
+                if str(feature.get('id')) == target_id_str
+            ]
+        }
+    else:
+        result_geojson = full_geojson
+
+    if not result_geojson.get('features'):
+        result_geojson['features'] = []
+
+    return jsonify(result_geojson), 200
+
+
+def counter_groups(file_path):
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return jsonify(json.load(f)), 200
+
+
+def response(app, url: str, view, *args):
+    """Runs a baseline view for url and returns its (status code, body)."""
+    with app.test_request_context(url):
+        result = app.make_response(view(*args))
+    return result.status_code, result.get_data()
@@ -0,0 +1,124 @@
+import os
+import sys
+import json
+import sqlite3
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+API_DIR = Path(__file__).resolve().parents[1]
+DATA_DIR = API_DIR / "data"
+
+# The API is imported as the `api` package, the ETL's modules as top-level
+# packages (run_etl.py runs from api/)
+sys.path[:0] = [str(API_DIR.parent), str(API_DIR)]
+
+# Read by routes.py and db.py at import time: serve the committed data files
+# and the small database below
+TEST_DB_PATH = Path(tempfile.mkdtemp(prefix="bike-api-tests-")) / "db.sqlite3"
+os.environ["DATA_DIR"] = str(DATA_DIR)
+os.environ["DB_PATH"] = str(TEST_DB_PATH)
+os.environ.pop("PRELOAD_DATASETS", None)
+os.environ.pop("PRELOAD_DATASET_NAMES", None)
+
+with sqlite3.connect(TEST_DB_PATH) as conn:
+    conn.execute("CREATE TABLE IF NOT EXISTS bicycle_counters (id INTEGER PRIMARY KEY, location_name TEXT, direction TEXT)")
+    conn.execute("DELETE FROM bicycle_counters")
+    conn.executemany(
+        "INSERT INTO bicycle_counters VALUES (?, ?, ?)",
+        [(1, "Bloor St E, west of Castle Frank Rd", "Eastbound"), (2, "Bloor St E, west of Castle Frank Rd", "Westbound")]
+    )
+conn.close()
+
+
+def pytest_configure(config):
+    # baseline_routes keeps the original routes' groupby().apply() calls as they were
+    config.addinivalue_line(
+        "filterwarnings", "ignore:DataFrameGroupBy.apply operated on the grouping columns:FutureWarning"
+    )
+
+
+@pytest.fixture
+def app():
+    from api import create_app
+    from api.datasets import datasets
+    from api.response_cache import response_cache
+
+    datasets.clear()
+    response_cache.clear()
+    app = create_app(preload='off')
+    yield app
+    datasets.clear()
+    response_cache.clear()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def use_dataset(monkeypatch):
+    """
+    Points a registered dataset at another file for one test, keeping its
+    loader unless given one.
+    """
+    from api.datasets import datasets
+
+    def use(name: str, file_path, loader=None, depends_on=()):
+        _, registered_loader, _ = datasets._specs[name]
+        monkeypatch.setitem(
+            datasets._specs, name,
+            (Path(file_path), loader or registered_loader, [Path(path) for path in depends_on])
+        )
+        datasets._entries.pop(name, None)
+    return use
+
+
+def make_counts_15m(location_dir_ids: list, first_day: str, n_days: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Generated 15-minute counts laid out as the ETL writes them: by location,
+    then time, with about a tenth of the bins missing.
+    """
+    rng = np.random.default_rng(seed)
+    bins = pd.date_range(first_day, periods=n_days * 96, freq='15min')
+    frames = []
+    for location_dir_id in location_dir_ids:
+        kept = bins[rng.random(len(bins)) > 0.1]
+        frames.append(pd.DataFrame({
+            'location_dir_id': str(location_dir_id),
+            'datetime_bin': kept,
+            'bin_volume': rng.integers(0, 200, len(kept)),
+        }))
+    df = pd.concat(frames, ignore_index=True)
+    df.insert(0, 'record_id', np.arange(len(df)))
+    return df
+
+
+@pytest.fixture(scope='session')
+def counts_15m_dir(tmp_path_factory):
+    """
+    A data directory with generated counts_15m.parquet and
+    counts_15m_by_location_name.parquet files for the counters of the
+    committed counter groups, and the location group dimension.
+    """
+    from etl_pipelines.bicycle_counters.aggregations import build_location_groups, aggregate_by_location_group
+    from modules.parquet_loader import ParquetLoader
+    from modules.numpy_loader import NumpyLoader
+
+    data_dir = tmp_path_factory.mktemp("data")
+    with open(DATA_DIR / "counter_groups.geojson", 'r', encoding='utf-8') as f:
+        groups = build_location_groups(json.load(f)['features'])
+
+    df = make_counts_15m(groups['dir_ids'][:8].tolist() + [999], '2024-06-28', 10)
+    ParquetLoader().df_to_parquet(df, str(data_dir / "counts_15m.parquet"), overwrite=True)
+
+    by_name = aggregate_by_location_group(groups, df, 'datetime_bin', 'bin_volume')
+    by_name = by_name.rename(columns={'bin_volume': 'total_bin_volume'})
+    ParquetLoader().df_to_parquet(by_name, str(data_dir / "counts_15m_by_location_name.parquet"), overwrite=True)
+
+    NumpyLoader().arrays_to_npz(groups, str(data_dir / "location_groups.npz"), overwrite=True)
+    return data_dir
@@ -0,0 +1,58 @@
+"""
+Every rewritten endpoint answers the committed data files byte for byte as
+the original pandas routes did (see baseline_routes). The 15-minute files
+are not committed; their endpoints are compared on generated data in
+test_time_of_day_profile.py.
+"""
+import pytest
+
+import baseline_routes
+from conftest import DATA_DIR
+
+COUNTS_DAILY_FILE = DATA_DIR / "counts_daily.parquet"
+COUNTS_DAILY_BY_LOCATION_NAME_FILE = DATA_DIR / "counts_daily_by_location_name.parquet"
+
+DATE_RANGES = [
+    'start=2024-07-01&end=2024-07-07',
+    'start=2024-07-03&end=2024-07-03',
+    'start=2019-01-01&end=2023-12-31',
+    'start=1994-06-26&end=1994-06-28',
+    'start=2024-07-03T10:00&end=2024-07-04',
+    'start=2024-07-03T00:00:01&end=2024-07-03T12:00',
+    'start=2024-08-10&end=2024-08-01',
+    'start=1990-01-01&end=1990-02-01',
+    'start=2025-06-01&end=2030-06-30',
+    'start=bad&end=2024-01-01',
+    'start=2024-01-01',
+]
+
+CASES = [
+    *[(f'/daily-counts-in-date-range?{q}', baseline_routes.daily_counts_in_date_range, COUNTS_DAILY_FILE)
+      for q in DATE_RANGES],
+    *[(f'/daily-counts-by-location-name-in-date-range?{q}', baseline_routes.daily_counts_by_location_name_in_date_range,
+       COUNTS_DAILY_BY_LOCATION_NAME_FILE) for q in DATE_RANGES],
+    *[(f'/avg-daily-vol-for-date-range?{q}', baseline_routes.avg_daily_vol_for_date_range, COUNTS_DAILY_FILE)
+      for q in DATE_RANGES + ['start=1994-01-01&end=2030-12-31', 'start=2010-03-01&end=2012-05-30']],
+    ('/daily-counts-chart', baseline_routes.daily_counts_chart, COUNTS_DAILY_FILE),
+    *[(f'/counter-locations{q}', baseline_routes.counter_locations, DATA_DIR / "counter_locations.geojson")
+      for q in ['', '?location_dir_id=2', '?location_dir_id=02', '?location_dir_id=x', '?location_dir_id=99999', '?location_dir_id=']],
+    ('/counter-groups', baseline_routes.counter_groups, DATA_DIR / "counter_groups.geojson"),
+]
+
+
+@pytest.mark.parametrize('path, view, file_path', CASES, ids=[case[0] for case in CASES])
+def test_response_matches_baseline(app, client, path, view, file_path):
+    expected = baseline_routes.response(app, path, view, file_path)
+
+    response = client.get('/api/v1' + path)
+
+    assert (response.status_code, response.get_data()) == expected
+
+
+@pytest.mark.parametrize('path, view, file_path', CASES[:3], ids=[case[0] for case in CASES[:3]])
+def test_repeated_and_cached_responses_match_baseline(app, client, path, view, file_path):
+    expected = baseline_routes.response(app, path, view, file_path)
+
+    for _ in range(2):
+        response = client.get('/api/v1' + path)
+        assert (response.status_code, response.get_data()) == expected
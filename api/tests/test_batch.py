@@ -0,0 +1,117 @@
+import pandas as pd
+import pytest
+
+from api import routes
+from api.datasets import PartitionedTimeSeries
+from modules.parquet_loader import ParquetLoader
+
+QUERIES = [
+    {"path": "/daily-counts-in-date-range", "params": {"start": "2024-07-01", "end": "2024-07-07"}},
+    {"path": "/daily-counts-by-location-name-in-date-range", "params": {"start": "2024-07-01", "end": "2024-07-03"}},
+    {"path": "/avg-daily-vol-for-date-range", "params": {"start": "2024-01-01", "end": "2024-06-30"}},
+    {"path": "/counter-groups"},
+    {"path": "/counter-locations", "params": {"location_dir_id": 2}},
+    {"path": "/daily-counts-chart", "params": {"start": "2024-07-01", "end": "2024-07-03", "resolution": "week"}},
+    {"path": "/daily-counts-in-date-range", "params": {"start": "bad", "end": "2024-07-07"}},
+]
+
+
+def get(client, query):
+    response = client.get('/api/v1' + query['path'], query_string=query.get('params', {}))
+    return {"body": response.get_json(), "status": response.status_code}
+
+
+def post_batch(client, queries):
+    return client.post('/api/v1/batch', json={"queries": queries})
+
+
+def test_results_match_individual_requests(client):
+    response = post_batch(client, QUERIES)
+
+    assert response.status_code == 200
+    assert response.get_json()['results'] == [get(client, query) for query in QUERIES]
+
+
+def test_list_params_repeat_the_parameter(client):
+    chart = client.get('/api/v1/daily-counts-chart?start=2024-07-01&end=2024-07-02').get_json()
+    locations = chart['availableLocations'][:2]
+    query = {"path": "/daily-counts-chart", "params": {"start": "2024-07-01", "end": "2024-07-02", "locations": locations}}
+
+    result = post_batch(client, [query]).get_json()['results'][0]
+
+    assert result == get(client, query)
+    assert result['body']['availableLocations'] == locations
+
+
+def test_identical_queries_run_once(client, monkeypatch):
+    calls = []
+    run_sub_query = routes.run_sub_query
+
+    def counted(path, params):
+        calls.append(path)
+        return run_sub_query(path, params)
+    monkeypatch.setattr(routes, 'run_sub_query', counted)
+
+    results = post_batch(client, [QUERIES[0], QUERIES[3], dict(QUERIES[0], params=dict(reversed(QUERIES[0]['params'].items())))])
+
+    assert len(calls) == 2
+    first, _, repeated = results.get_json()['results']
+    assert first == repeated
+
+
+@pytest.mark.parametrize('path', ['/no-such-endpoint', '/batch', '/../hi'])
+def test_unknown_paths_give_a_404_result(client, path):
+    result = post_batch(client, [{"path": path}]).get_json()['results'][0]
+
+    assert result['status'] == 404
+    assert 'error' in result['body']
+
+
+def test_non_json_responses_are_rejected_per_query(client):
+    query = {"path": "/daily-counts-in-date-range", "params": {"start": "2024-07-01", "end": "2024-07-07", "format": "arrow"}}
+
+    results = post_batch(client, [query, QUERIES[3]]).get_json()['results']
+
+    assert results[0]['status'] == 400
+    assert results[1]['status'] == 200
+
+
+@pytest.mark.parametrize('body', [
+    {"queries": [{"path": "/counter-groups"}] * (routes.MAX_BATCH_QUERIES + 1)},
+    {"queries": {"path": "/counter-groups"}},
+    {"queries": [{"path": "counter-groups"}]},
+    {"queries": [{"path": "/counter-groups?x=1"}]},
+    {"queries": [{"path": "/counter-groups#top"}]},
+    {"queries": [{"path": "/counter-groups", "params": ["a"]}]},
+    {"query": []},
+])
+def test_invalid_batches_are_rejected(client, body):
+    response = client.post('/api/v1/batch', json=body)
+
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+
+
+def test_narrower_ranges_reuse_a_wider_range_read(client, use_dataset, counts_15m_dir, tmp_path, monkeypatch):
+    counts_file = counts_15m_dir / "counts_15m.parquet"
+    use_dataset('counts_15m', counts_file)
+    ParquetLoader().df_to_partitioned_parquet(pd.read_parquet(counts_file), str(tmp_path / "partitioned"), 'datetime_bin')
+    use_dataset('counts_15m_partitioned', tmp_path / "partitioned")
+
+    reads = []
+    slice_partitions = PartitionedTimeSeries.slice
+
+    def counted(self, *args, **kwargs):
+        reads.append(args)
+        return slice_partitions(self, *args, **kwargs)
+    monkeypatch.setattr(PartitionedTimeSeries, 'slice', counted)
+
+    queries = [
+        {"path": "/fifteen-min-counts-in-date-range", "params": {"start": "2024-07-02", "end": "2024-07-03"}},
+        {"path": "/fifteen-min-counts-in-date-range", "params": {"start": "2024-06-28", "end": "2024-07-07"}},
+        {"path": "/fifteen-min-counts-in-date-range", "params": {"start": "2024-07-05T06:00", "end": "2024-07-05T18:00"}},
+    ]
+    results = post_batch(client, queries).get_json()['results']
+
+    assert len(reads) == 1
+    assert results == [get(client, query) for query in queries]
@@ -0,0 +1,100 @@
+import asyncio
+
+import aiohttp
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from etl_pipelines.toronto_open_data.client import CityOfTorontoClient
+
+
+def make_app(failures: dict, calls: dict) -> web.Application:
+    """A fake CKAN API whose paths fail with the given status the given number of times."""
+    async def handler(request):
+        path = request.path
+        calls[path] = calls.get(path, 0) + 1
+        status, times = failures.get(path, (None, 0))
+        if calls[path] <= times:
+            return web.Response(status=status)
+        if path == '/package_show':
+            return web.json_response({"success": True, "result": {"id": request.query['id'], "resources": []}})
+        return web.json_response({"path": path, "query": dict(request.query)})
+
+    app = web.Application()
+    app.router.add_get('/{tail:.*}', handler)
+    return app
+
+
+async def with_server(failures: dict, calls: dict, run):
+    server = TestServer(make_app(failures, calls))
+    await server.start_server()
+    try:
+        return await run(str(server.make_url('')))
+    finally:
+        await server.close()
+
+
+def test_transient_failures_are_retried():
+    calls = {}
+    client = CityOfTorontoClient(max_retries=3, backoff=0)
+
+    data = asyncio.run(with_server(
+        {'/flaky': (503, 2)}, calls,
+        lambda url: client._get_json(url + '/flaky', params={'a': '1'}),
+    ))
+
+    assert data == {"path": "/flaky", "query": {"a": "1"}}
+    assert calls['/flaky'] == 3
+
+
+def test_retries_give_up_after_max_retries():
+    calls = {}
+    client = CityOfTorontoClient(max_retries=2, backoff=0)
+
+    with pytest.raises(aiohttp.ClientResponseError) as error:
+        asyncio.run(with_server({'/down': (429, 10)}, calls, lambda url: client._get_json(url + '/down')))
+
+    assert error.value.status == 429
+    assert calls['/down'] == 3
+
+
+def test_client_errors_are_not_retried():
+    calls = {}
+    client = CityOfTorontoClient(max_retries=3, backoff=0)
+
+    with pytest.raises(aiohttp.ClientResponseError):
+        asyncio.run(with_server({'/gone': (404, 10)}, calls, lambda url: client._get_json(url + '/gone')))
+
+    assert calls['/gone'] == 1
+
+
+def test_pooled_mode_fetches_package_metadata_once(monkeypatch):
+    calls = {}
+
+    async def run(url):
+        monkeypatch.setattr(CityOfTorontoClient, 'BASE_URL', url)
+        async with CityOfTorontoClient(backoff=0) as client:
+            return await asyncio.gather(*(client.get_package_metadata('counts') for _ in range(5)))
+
+    results = asyncio.run(with_server({'/package_show': (500, 1)}, calls, run))
+
+    assert all(result['result']['id'] == 'counts' for result in results)
+    assert calls['/package_show'] == 2
+
+
+def test_gather_bounded_limits_concurrency_and_keeps_order():
+    client = CityOfTorontoClient(max_concurrency=3)
+    running, peak = 0, 0
+
+    async def job(i):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01 * (10 - i))
+        running -= 1
+        return i
+
+    results = asyncio.run(client.gather_bounded(*(job(i) for i in range(10))))
+
+    assert results == list(range(10))
+    assert peak == 3
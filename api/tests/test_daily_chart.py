@@ -0,0 +1,117 @@
+import numpy as np
+import pandas as pd
+import pytest
+from flask import jsonify
+
+import baseline_routes
+from conftest import DATA_DIR
+from api.datasets import largest_triangle_three_buckets
+
+CHART = baseline_routes.daily_chart_frame(DATA_DIR / "counts_daily.parquet")
+LOCATIONS = CHART.columns.tolist()
+
+
+def lttb_reference(y: list, threshold: int) -> list:
+    """Largest-Triangle-Three-Buckets as originally described, one point at a time."""
+    n = len(y)
+    if threshold >= n:
+        return list(range(n))
+    every = (n - 2) / (threshold - 2)
+    picked = [0]
+    a = 0
+    for i in range(threshold - 2):
+        avg_start = int((i + 1) * every) + 1
+        avg_end = min(int((i + 2) * every) + 1, n)
+        avg_x = sum(range(avg_start, avg_end)) / (avg_end - avg_start)
+        avg_y = sum(y[avg_start:avg_end]) / (avg_end - avg_start)
+
+        best, best_area = None, -1
+        for j in range(int(i * every) + 1, int((i + 1) * every) + 1):
+            area = abs((a - avg_x) * (y[j] - y[a]) - (a - j) * (avg_y - y[a]))
+            if area > best_area:
+                best, best_area = j, area
+        picked.append(best)
+        a = best
+    picked.append(n - 1)
+    return picked
+
+
+@pytest.mark.parametrize('n, n_points', [(100, 10), (1000, 37), (50, 3), (7, 5), (5, 5), (5, 9)])
+def test_lttb_matches_the_reference(n, n_points):
+    y = np.random.default_rng(n).normal(100, 30, n).round()
+
+    picked = largest_triangle_three_buckets(y, n_points)
+
+    assert picked.tolist() == lttb_reference(y.tolist(), n_points)
+    assert len(picked) == min(n, n_points)
+
+
+def expected_chart(app, frame: pd.DataFrame) -> bytes:
+    """The chart payload of a (date x location) frame, as the original route encoded it."""
+    with app.test_request_context():
+        return jsonify({
+            "availableLocations": frame.columns.tolist(),
+            "data": frame.replace({np.nan: None}).reset_index().to_dict(orient='records'),
+        }).get_data()
+
+
+def mean_by_period(frame: pd.DataFrame, resolution: str) -> pd.DataFrame:
+    dates = pd.to_datetime(frame.index)
+    if resolution == 'week':
+        periods = dates - pd.to_timedelta(dates.weekday, unit='D')
+    else:
+        periods = dates.to_period('M').to_timestamp()
+    result = frame.groupby(periods.strftime('%Y-%m-%d')).mean()
+    result.index.name = 'date'
+    return result
+
+
+@pytest.mark.parametrize('query, start, end, locations', [
+    ('start=2024-07-01&end=2024-07-31', '2024-07-01', '2024-07-31', None),
+    ('start=2019-02-01', '2019-02-01', None, None),
+    ('end=1994-07-15', None, '1994-07-15', None),
+    ('start=1990-01-01&end=2100-01-01', None, None, None),
+    ('start=2024-07-10&end=2024-07-01', '2024-07-10', '2024-07-01', None),
+    (f'locations={LOCATIONS[3]}&locations={LOCATIONS[0]}', None, None, [LOCATIONS[3], LOCATIONS[0]]),
+    (f'start=2023-05-01&end=2023-05-14&locations={LOCATIONS[1]}', '2023-05-01', '2023-05-14', [LOCATIONS[1]]),
+])
+def test_windows_match_slicing_the_dense_chart(app, client, query, start, end, locations):
+    expected = CHART.loc[start:end, locations if locations is not None else LOCATIONS]
+
+    response = client.get(f'/api/v1/daily-counts-chart?{query}')
+
+    assert response.status_code == 200
+    assert response.get_data() == expected_chart(app, expected)
+
+
+@pytest.mark.parametrize('resolution', ['week', 'month'])
+@pytest.mark.parametrize('query, start, end', [
+    ('', None, None),
+    ('start=2024-07-03&end=2024-09-17&', '2024-07-03', '2024-09-17'),
+])
+def test_weekly_and_monthly_means_match_pandas(app, client, resolution, query, start, end):
+    expected = mean_by_period(CHART.loc[start:end], resolution)
+
+    response = client.get(f'/api/v1/daily-counts-chart?{query}resolution={resolution}')
+
+    assert response.status_code == 200
+    assert response.get_data() == expected_chart(app, expected)
+
+
+@pytest.mark.parametrize('n_points', [3, 100, 1000000])
+def test_downsampled_days_are_the_lttb_picks_of_the_total_volume(app, client, n_points):
+    window = CHART.loc['2018-01-01':'2024-12-31']
+    picked = lttb_reference(window.sum(axis=1).tolist(), n_points)
+
+    response = client.get(f'/api/v1/daily-counts-chart?start=2018-01-01&end=2024-12-31&resolution={n_points}')
+
+    assert response.status_code == 200
+    assert response.get_data() == expected_chart(app, window.iloc[picked])
+
+
+@pytest.mark.parametrize('query', ['resolution=year', 'resolution=2', 'resolution=-5', 'locations=Nowhere', 'start=bad'])
+def test_invalid_parameters_are_rejected(client, query):
+    response = client.get(f'/api/v1/daily-counts-chart?{query}')
+
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
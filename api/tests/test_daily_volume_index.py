@@ -0,0 +1,65 @@
+import pandas as pd
+import pytest
+
+import baseline_routes
+from conftest import DATA_DIR
+from api.datasets import DailyVolumeIndex
+from etl_pipelines.bicycle_counters.aggregations import build_daily_volume_index
+from modules.numpy_loader import NumpyLoader
+
+COUNTS_DAILY_FILE = DATA_DIR / "counts_daily.parquet"
+
+QUERIES = [
+    'start=2024-07-01&end=2024-07-07',
+    'start=1994-01-01&end=2030-12-31',
+    'start=2010-03-01&end=2012-05-30',
+    'start=1994-06-26&end=1994-06-28',
+    'start=2024-07-03T10:00&end=2024-07-04',
+    'start=2024-07-03T10:00&end=2024-07-04T09:00',
+    'start=2024-07-03&end=2024-07-03',
+    'start=2024-08-10&end=2024-08-01',
+    'start=1990-01-01&end=1990-02-01',
+    'start=2026-01-01&end=2030-01-01',
+]
+
+
+@pytest.fixture
+def volume_index_file(tmp_path):
+    index = build_daily_volume_index(
+        pd.read_parquet(COUNTS_DAILY_FILE),
+        time_col='dt',
+        key_col='location_dir_id',
+        value_col='daily_volume'
+    )
+    npz_path = tmp_path / "counts_daily_volume_index.npz"
+    NumpyLoader().arrays_to_npz(index, str(npz_path), overwrite=True)
+    return npz_path
+
+
+@pytest.mark.parametrize('query', QUERIES)
+def test_avg_daily_vol_from_the_index_matches_baseline(app, client, use_dataset, volume_index_file, query):
+    use_dataset('counts_daily_volume_index', volume_index_file)
+    path = f'/avg-daily-vol-for-date-range?{query}'
+    expected = baseline_routes.response(app, path, baseline_routes.avg_daily_vol_for_date_range, COUNTS_DAILY_FILE)
+
+    response = client.get('/api/v1' + path)
+
+    assert (response.status_code, response.get_data()) == expected
+
+
+def test_average_matches_a_groupby_mean(volume_index_file):
+    df = pd.read_parquet(COUNTS_DAILY_FILE)
+    index = DailyVolumeIndex.from_npz(volume_index_file)
+
+    result = index.average(pd.Timestamp('2015-01-01'), pd.Timestamp('2018-06-30'), value_name='avg')
+
+    in_range = df[(df['dt'] >= '2015-01-01') & (df['dt'] <= '2018-06-30')]
+    expected = in_range.groupby('location_dir_id', as_index=False).agg(avg=('daily_volume', 'mean'))
+    pd.testing.assert_frame_equal(result.astype({'location_dir_id': object}), expected)
+
+
+def test_rejects_timestamps_that_are_not_days():
+    df = pd.DataFrame({'dt': pd.to_datetime(['2024-01-01 12:00']), 'location_dir_id': ['1'], 'daily_volume': [5]})
+
+    with pytest.raises(ValueError):
+        build_daily_volume_index(df, time_col='dt', key_col='location_dir_id', value_col='daily_volume')
@@ -0,0 +1,182 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from api.datasets import DatasetRegistry, TimeSeriesTable
+
+
+class CountingLoader():
+    """Loads a file as its text and counts the loads."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, file_path):
+        self.calls += 1
+        return file_path.read_text()
+
+
+def touch(path, content: str, mtime_ns: int):
+    path.write_text(content)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+@pytest.fixture
+def registry():
+    return DatasetRegistry()
+
+
+def test_get_loads_once_and_reloads_when_the_file_changes(registry, tmp_path):
+    data = tmp_path / "data.txt"
+    touch(data, "v1", 1_000_000_000)
+    loader = CountingLoader()
+    registry.register('data', data, loader=loader)
+
+    assert registry.loaded('data') is None
+    assert registry.get('data') == "v1"
+    assert registry.get('data') == "v1"
+    assert loader.calls == 1
+    assert registry.loaded('data') == "v1"
+
+    touch(data, "v2", 2_000_000_000)
+    assert registry.loaded('data') is None
+    assert registry.get('data') == "v2"
+    assert loader.calls == 2
+
+
+def test_dependencies_reload_the_dataset(registry, tmp_path):
+    data = tmp_path / "data.txt"
+    dependency = tmp_path / "dependency.txt"
+    touch(data, "v1", 1_000_000_000)
+    loader = CountingLoader()
+    registry.register('data', data, loader=loader, depends_on=[dependency])
+
+    registry.get('data')
+    touch(dependency, "", 1_000_000_000)   # appears
+    registry.get('data')
+    touch(dependency, "", 3_000_000_000)   # changes
+    registry.get('data')
+    dependency.unlink()                    # goes
+    registry.get('data')
+    registry.get('data')
+
+    assert loader.calls == 4
+
+
+def test_files_lists_each_file_once(registry, tmp_path):
+    registry.register('a', tmp_path / "a.parquet", loader=CountingLoader(), depends_on=[tmp_path / "shared.npz"])
+    registry.register('b', tmp_path / "b.npz", loader=CountingLoader(), depends_on=[tmp_path / "shared.npz"])
+
+    assert registry.files('a', 'b') == [tmp_path / "a.parquet", tmp_path / "shared.npz", tmp_path / "b.npz"]
+
+
+def test_missing_file_raises(registry, tmp_path):
+    registry.register('data', tmp_path / "missing.txt", loader=CountingLoader())
+
+    with pytest.raises(FileNotFoundError):
+        registry.get('data')
+    assert registry.loaded('data') is None
+
+
+def test_get_derived_skips_missing_or_stale_files(registry, tmp_path):
+    source = tmp_path / "source.txt"
+    derived = tmp_path / "derived.txt"
+    touch(source, "source", 2_000_000_000)
+    registry.register('source', source, loader=CountingLoader())
+    registry.register('derived', derived, loader=CountingLoader())
+
+    assert registry.get_derived('derived', 'source') is None
+    touch(derived, "derived", 1_000_000_000)
+    assert registry.get_derived('derived', 'source') is None
+    touch(derived, "derived", 2_000_000_000)
+    assert registry.get_derived('derived', 'source') == "derived"
+
+
+def test_snapshot_pins_the_first_version_seen(registry, tmp_path):
+    data = tmp_path / "data.txt"
+    touch(data, "v1", 1_000_000_000)
+    registry.register('data', data, loader=CountingLoader())
+
+    seen_by_other_thread = []
+    with registry.snapshot() as scratch:
+        assert registry.get('data') == "v1"
+        touch(data, "v2", 2_000_000_000)
+        assert registry.get('data') == "v1"
+        assert registry.loaded('data') == "v1"
+
+        with registry.snapshot() as nested_scratch:
+            assert nested_scratch is scratch
+            assert registry.get('data') == "v1"
+
+        thread = threading.Thread(target=lambda: seen_by_other_thread.append(registry.get('data')))
+        thread.start()
+        thread.join()
+
+    assert seen_by_other_thread == ["v2"]
+    assert registry.get('data') == "v2"
+    assert registry.snapshot_scratch() is None
+
+
+def test_clear_drops_loaded_datasets(registry, tmp_path):
+    data = tmp_path / "data.txt"
+    touch(data, "v1", 1_000_000_000)
+    loader = CountingLoader()
+    registry.register('data', data, loader=loader)
+
+    registry.get('data')
+    registry.clear()
+    registry.get('data')
+
+    assert loader.calls == 2
+
+
+def test_from_frame_orders_rows_as_sort_index():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        'dt': pd.to_datetime('2024-01-01') + pd.to_timedelta(rng.integers(0, 20, 500), unit='D'),
+        'record_id': np.arange(500),
+    })
+
+    table = TimeSeriesTable.from_frame(df, 'dt')
+
+    expected = df.set_index('dt').sort_index().reset_index()
+    pd.testing.assert_frame_equal(table.to_frame(['dt', 'record_id']), expected[['dt', 'record_id']])
+
+
+def test_from_frame_keeps_rows_already_in_time_order():
+    df = pd.DataFrame({
+        'dt': pd.to_datetime(['2024-01-01', '2024-01-01', '2024-01-02', '2024-01-02']),
+        'record_id': [3, 1, 4, 2],
+    })
+
+    table = TimeSeriesTable.from_frame(df, 'dt')
+
+    assert table.columns['record_id'].tolist() == [3, 1, 4, 2]
+
+
+@pytest.mark.parametrize('start, end', [
+    ('2024-01-05', '2024-01-09'),
+    ('2024-01-05 06:00', '2024-01-05 06:00'),
+    ('2024-01-05 06:07', '2024-01-06 13:14'),
+    ('2023-01-01', '2030-01-01'),
+    ('2024-01-09', '2024-01-05'),
+    ('1990-01-01', '1990-02-01'),
+])
+def test_slice_matches_a_sorted_label_slice(start, end):
+    rng = np.random.default_rng(1)
+    df = pd.DataFrame({
+        'datetime_bin': pd.to_datetime('2024-01-01') + pd.to_timedelta(rng.integers(0, 20 * 96, 5000) * 15, unit='min'),
+        'bin_volume': rng.integers(0, 100, 5000),
+    })
+    table = TimeSeriesTable.from_frame(df, 'datetime_bin')
+
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    sliced = table.slice(start, end)
+    lo, hi = table.bounds(start, end)
+
+    expected = df.set_index('datetime_bin').sort_index().loc[start:end].reset_index()
+    pd.testing.assert_frame_equal(sliced.to_frame(['datetime_bin', 'bin_volume']), expected)
+    assert hi - lo == len(expected)
@@ -0,0 +1,142 @@
+import asyncio
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from conftest import DATA_DIR, make_counts_15m
+from etl_pipelines.bicycle_counters.loader import BicycleCountersLoader
+
+DAILY_COUNTS = pd.read_parquet(DATA_DIR / "counts_daily.parquet").reset_index(drop=True)
+FIFTEEN_MIN_COUNTS = make_counts_15m([3, 17, 104], '2022-12-30', 40)
+
+
+@pytest.fixture(scope='module')
+def db_path(tmp_path_factory):
+    """A database with the TEXT and epoch tables built from the same counts."""
+    db_path = tmp_path_factory.mktemp("epoch") / "db.sqlite3"
+    loader = BicycleCountersLoader(bulk_load=True)
+    loader.DB_PATH = str(db_path)
+
+    async def get_daily_counts_frame():
+        return DAILY_COUNTS
+
+    async def iter_15m_count_batches():
+        for start in range(0, len(FIFTEEN_MIN_COUNTS), 5000):
+            yield 'counts.json', FIFTEEN_MIN_COUNTS.iloc[start:start + 5000]
+
+    loader.get_daily_counts_frame = get_daily_counts_frame
+    loader.iter_15m_count_batches = iter_15m_count_batches
+
+    asyncio.run(loader.load_daily_counts_into_sqlite())
+    asyncio.run(loader.load_15m_counts_into_sqlite())
+    loader.load_monthly_counts_into_sqlite()
+    loader.load_hourly_counts_into_sqlite()
+    loader.load_fifteen_min_counts_by_year_and_month_into_sqlite()
+
+    asyncio.run(loader.load_daily_counts_into_epoch_sqlite())
+    asyncio.run(loader.load_15m_counts_into_epoch_sqlite())
+    loader.load_hourly_counts_into_epoch_sqlite()
+    loader.load_monthly_counts_into_epoch_sqlite()
+    loader.load_fifteen_min_counts_by_year_and_month_into_epoch_sqlite()
+    return db_path
+
+
+def query(db_path, sql: str) -> list:
+    conn = sqlite3.connect(db_path)
+    try:
+        return sorted(conn.execute(sql).fetchall())
+    finally:
+        conn.close()
+
+
+def test_epoch_counts_hold_the_same_rows(db_path):
+    assert query(db_path, "select count(*) from fifteen_min_bicycle_counts_epoch") == [(len(FIFTEEN_MIN_COUNTS),)]
+    assert query(db_path, "select count(*) from daily_bicycle_counts_epoch") == query(
+        db_path, "select count(*) from daily_bicycle_counts"
+    )
+    assert query(db_path, """
+        select location_dir_id, date(dt * 86400, 'unixepoch'), daily_volume from daily_bicycle_counts_epoch
+    """) == query(db_path, "select cast(location_dir_id as integer), date(dt), daily_volume from daily_bicycle_counts")
+
+
+def test_monthly_counts_match_the_text_schema(db_path):
+    assert query(db_path, "select location_dir_id, year, month, volume from monthly_bicycle_counts_epoch") == query(
+        db_path, "select cast(location_dir_id as integer), cast(year as integer), cast(month as integer), volume from monthly_bicycle_counts"
+    )
+
+
+def test_hourly_counts_match_the_text_schema(db_path):
+    assert query(db_path, """
+        select location_dir_id, date(dt * 86400, 'unixepoch'), hour_of_day, volume from hourly_bicycle_counts_epoch
+    """) == query(db_path, """
+        select cast(location_dir_id as integer), date, cast(hour as integer), volume from hourly_bicycle_counts
+    """)
+
+
+def test_fifteen_min_counts_by_year_and_month_match_the_text_schema(db_path):
+    epoch = query(db_path, """
+        select location_dir_id, year, month, time(time_of_day, 'unixepoch'), avg_vol
+        from fifteen_min_counts_by_year_and_month_epoch
+    """)
+    text = query(db_path, """
+        select cast(location_dir_id as integer), cast(year as integer), cast(month as integer), time, avg_vol
+        from fifteen_min_counts_by_year_and_month
+    """)
+
+    assert [row[:4] for row in epoch] == [row[:4] for row in text]
+    assert [row[4] for row in epoch] == pytest.approx([row[4] for row in text])
+    assert {row[1] for row in epoch} == {2023}
+
+
+@pytest.mark.parametrize('aggregate', [
+    "select location_dir_id, hour, sum(bin_volume) from fifteen_min_bicycle_counts_epoch group by location_dir_id, hour",
+    "select location_dir_id, year, month, sum(daily_volume) from daily_bicycle_counts_epoch group by location_dir_id, year, month",
+    """
+        select location_dir_id, year, month, time_of_day, avg(bin_volume) from fifteen_min_bicycle_counts_epoch
+        where year >= 2023 group by location_dir_id, year, month, time_of_day
+    """,
+])
+def test_aggregates_scan_a_covering_index_in_order(db_path, aggregate):
+    plan = ' '.join(row[3] for row in query(db_path, f"explain query plan {aggregate}"))
+
+    assert 'COVERING INDEX' in plan
+    assert 'TEMP B-TREE' not in plan
+
+
+def test_calendar_columns_are_stored(db_path):
+    for table in ('daily_bicycle_counts_epoch', 'fifteen_min_bicycle_counts_epoch', 'hourly_bicycle_counts_epoch'):
+        # table_xinfo flags generated columns as hidden
+        assert all(column[-1] == 0 for column in query(db_path, f"pragma table_xinfo({table})"))
+
+
+def test_tables_with_an_older_schema_are_rebuilt(tmp_path):
+    db_path = tmp_path / "db.sqlite3"
+    with sqlite3.connect(db_path) as conn:
+        conn.execute('''
+            CREATE TABLE hourly_bicycle_counts_epoch (
+                location_dir_id INTEGER NOT NULL,
+                hour INTEGER NOT NULL,
+                volume INTEGER,
+                dt INTEGER GENERATED ALWAYS AS (hour / 24) VIRTUAL,
+                PRIMARY KEY (location_dir_id, hour)
+            ) WITHOUT ROWID
+        ''')
+        conn.execute("INSERT INTO hourly_bicycle_counts_epoch (location_dir_id, hour, volume) VALUES (1, 1, 1)")
+    conn.close()
+    loader = BicycleCountersLoader()
+    loader.DB_PATH = str(db_path)
+
+    async def iter_15m_count_batches():
+        yield 'counts.json', FIFTEEN_MIN_COUNTS
+    loader.iter_15m_count_batches = iter_15m_count_batches
+    asyncio.run(loader.load_15m_counts_into_epoch_sqlite())
+    loader.load_hourly_counts_into_epoch_sqlite()
+    schema = query(db_path, "select sql from sqlite_master where name = 'hourly_bicycle_counts_epoch'")
+    loader.load_hourly_counts_into_epoch_sqlite()
+
+    assert 'hour_of_day INTEGER NOT NULL' in schema[0][0]
+    assert query(db_path, "select sql from sqlite_master where name = 'hourly_bicycle_counts_epoch'") == schema
+    assert query(db_path, "select location_dir_id, hour, volume from hourly_bicycle_counts_epoch") == query(db_path, """
+        select location_dir_id, hour, sum(bin_volume) from fifteen_min_bicycle_counts_epoch group by location_dir_id, hour
+    """)
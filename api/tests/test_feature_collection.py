@@ -0,0 +1,50 @@
+import json
+
+import pytest
+from flask import jsonify
+
+from api.datasets import FeatureCollection
+
+COLLECTION = {
+    "type": "FeatureCollection",
+    "features": [
+        {"type": "Feature", "id": 2, "properties": {"name": "Bloor St É", "location_dir_id": 2}},
+        {"type": "Feature", "id": "10", "properties": {"name": "Yonge St"}},
+        {"type": "Feature", "id": 2, "properties": {"name": "Bloor St É, again"}},
+        {"type": "Feature", "properties": {"name": "No id"}},
+    ],
+}
+
+
+def jsonify_body(app, value) -> str:
+    with app.test_request_context():
+        return jsonify(value).get_data(as_text=True).rstrip('\n')
+
+
+def test_body_is_encoded_as_jsonify_would(app):
+    assert FeatureCollection(json.loads(json.dumps(COLLECTION))).body == jsonify_body(app, COLLECTION)
+
+
+@pytest.mark.parametrize('feature_id', ['2', '10', 'None', '99'])
+def test_filtered_body_matches_filtering_the_collection(app, feature_id):
+    collection = FeatureCollection(json.loads(json.dumps(COLLECTION)))
+
+    expected = {
+        "type": "FeatureCollection",
+        "features": [feature for feature in COLLECTION['features'] if str(feature.get('id')) == feature_id],
+    }
+    assert collection.filtered_body(feature_id) == jsonify_body(app, expected)
+
+
+def test_missing_features_become_an_empty_list(app):
+    collection = FeatureCollection({"type": "FeatureCollection"})
+
+    assert collection.body == jsonify_body(app, {"type": "FeatureCollection", "features": []})
+
+
+def test_invalid_json_is_reported(tmp_path):
+    broken = tmp_path / "counter_locations.geojson"
+    broken.write_text('{"type": ')
+
+    with pytest.raises(ValueError, match="Error decoding JSON"):
+        FeatureCollection.from_file(broken)
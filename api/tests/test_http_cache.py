@@ -0,0 +1,126 @@
+import hashlib
+import os
+import sqlite3
+
+import pytest
+
+from conftest import TEST_DB_PATH
+from api.http_cache import file_digest, file_version, data_version
+
+
+def test_file_version_follows_the_content_of_the_file_and_wal_file(tmp_path):
+    db = tmp_path / "db.sqlite3"
+    assert file_version(db) == 'missing/missing'
+
+    db.write_bytes(b"1234")
+    digest = hashlib.sha256(b"1234").hexdigest()
+    assert file_version(db) == f"{digest}/missing"
+
+    wal = tmp_path / "db.sqlite3-wal"
+    wal.write_bytes(b"12")
+    assert file_version(db) == f"{digest}/{hashlib.sha256(b'12').hexdigest()}"
+
+    # Another instance's copy of the same data has other mtimes
+    os.utime(db, ns=(5_000_000_000, 5_000_000_000))
+    assert file_version(db) == f"{digest}/{hashlib.sha256(b'12').hexdigest()}"
+
+
+def test_files_are_hashed_again_only_when_their_mtime_or_size_changes(tmp_path, monkeypatch):
+    data = tmp_path / "data.parquet"
+    data.write_bytes(b"v1")
+    os.utime(data, ns=(1_000_000_000, 1_000_000_000))
+    file_digest(str(data))
+
+    hashed = []
+    sha256 = hashlib.sha256
+    monkeypatch.setattr(hashlib, 'sha256', lambda *args: hashed.append(args) or sha256(*args))
+
+    file_digest(str(data))
+    assert hashed == []
+
+    data.write_bytes(b"v2")
+    os.utime(data, ns=(2_000_000_000, 2_000_000_000))
+    assert file_digest(str(data)) == sha256(b"v2").hexdigest()
+    assert len(hashed) == 1
+
+
+def test_data_version_changes_with_any_file(tmp_path):
+    first, second = tmp_path / "a.parquet", tmp_path / "b.parquet"
+    first.write_bytes(b"a")
+    second.write_bytes(b"b")
+    version = data_version([first, second])
+
+    assert data_version([first, second]) == version
+    second.write_bytes(b"c")
+    assert data_version([first, second]) != version
+
+
+def test_tracked_routes_get_an_etag_and_answer_304(client):
+    response = client.get('/api/v1/counter-groups')
+    etag = response.headers['ETag']
+
+    assert response.status_code == 200
+    assert response.headers['Cache-Control'] == 'public, max-age=3600, s-maxage=86400, stale-while-revalidate=604800'
+
+    not_modified = client.get('/api/v1/counter-groups', headers={'If-None-Match': etag})
+    assert not_modified.status_code == 304
+    assert not_modified.get_data() == b''
+    assert not_modified.headers['ETag'] == etag
+
+    stale = client.get('/api/v1/counter-groups', headers={'If-None-Match': '"other"'})
+    assert stale.status_code == 200
+    assert stale.get_data() == response.get_data()
+
+
+def test_etag_depends_on_the_query_but_not_its_order(client):
+    etag = client.get('/api/v1/daily-counts-in-date-range?start=2024-07-01&end=2024-07-07').headers['ETag']
+
+    assert client.get('/api/v1/daily-counts-in-date-range?end=2024-07-07&start=2024-07-01').headers['ETag'] == etag
+    assert client.get('/api/v1/daily-counts-in-date-range?start=2024-07-01&end=2024-07-08').headers['ETag'] != etag
+
+
+def test_etag_changes_when_the_data_file_changes(client):
+    response = client.get('/api/v1/bicycle-counters')
+    etag = response.headers['ETag']
+    assert response.get_json()[0]['location_name'] == "Bloor St E, west of Castle Frank Rd"
+
+    with sqlite3.connect(TEST_DB_PATH) as conn:
+        conn.execute("INSERT INTO bicycle_counters VALUES (3, 'Added by the test', 'Northbound')")
+    conn.close()
+    try:
+        assert client.get('/api/v1/bicycle-counters', headers={'If-None-Match': etag}).status_code == 200
+        assert client.get('/api/v1/bicycle-counters').headers['ETag'] != etag
+    finally:
+        with sqlite3.connect(TEST_DB_PATH) as conn:
+            conn.execute("DELETE FROM bicycle_counters WHERE id = 3")
+        conn.close()
+
+
+@pytest.mark.parametrize('endpoint, dataset_name', [
+    ('api.get_daily_counts_in_date_range', 'counts_daily'),
+    ('api.get_daily_counts_by_location_name_in_date_range', 'counts_daily_by_location_name'),
+    ('api.get_fifteen_min_counts_by_location_name_in_date_range', 'counts_15m_by_location_name'),
+])
+def test_routes_track_the_files_their_datasets_depend_on(app, endpoint, dataset_name):
+    from api.datasets import datasets
+    _, _, depends_on = datasets._specs[dataset_name]
+
+    assert depends_on
+    assert set(depends_on) <= set(app.view_functions[endpoint].data_files)
+
+
+def test_errors_and_untracked_routes_are_not_cached(client):
+    error = client.get('/api/v1/daily-counts-in-date-range?start=bad&end=2024-07-07')
+    assert error.status_code == 400
+    assert 'ETag' not in error.headers
+    assert 'Cache-Control' not in error.headers
+
+    assert 'ETag' not in client.get('/api/v1/hi').headers
+
+
+def test_cache_lifetimes_come_from_the_config(app, client):
+    app.config.update(HTTP_CACHE_MAX_AGE=60, HTTP_CACHE_SHARED_MAX_AGE=120, HTTP_CACHE_STALE_WHILE_REVALIDATE=0)
+
+    response = client.get('/api/v1/counter-groups')
+
+    assert response.headers['Cache-Control'] == 'public, max-age=60, s-maxage=120, stale-while-revalidate=0'
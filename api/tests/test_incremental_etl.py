@@ -0,0 +1,134 @@
+import asyncio
+import json
+
+import fastparquet
+import pandas as pd
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from etl_pipelines.bicycle_counters.loader import BicycleCountersLoader
+from modules.etl_state import EtlState
+from modules.parquet_loader import ParquetLoader
+
+
+def test_state_round_trips_through_its_file(tmp_path):
+    state_path = tmp_path / "state" / "etl_state.json"
+    state = EtlState(str(state_path))
+    assert state.get('daily') == {}
+
+    state.update('daily', etag='"v1"', high_water_mark='2024-07-01T00:00:00')
+    state.update('daily', etag='"v2"')
+    state.get('daily')['etag'] = 'not saved'
+    state.save()
+
+    assert not (tmp_path / "state" / "etl_state.json.tmp").exists()
+    assert json.loads(state_path.read_text()) == {
+        'resources': {'daily': {'etag': '"v2"', 'high_water_mark': '2024-07-01T00:00:00'}}
+    }
+    assert EtlState(str(state_path)).get('daily') == {'etag': '"v2"', 'high_water_mark': '2024-07-01T00:00:00'}
+
+
+def counts(location_dir_ids, days, volume):
+    return pd.DataFrame([
+        {'location_dir_id': location_dir_id, 'dt': pd.Timestamp(day), 'daily_volume': volume}
+        for day in days for location_dir_id in location_dir_ids
+    ])
+
+
+def test_upsert_replaces_rows_by_key_and_appends_new_ones(tmp_path):
+    parquet_path = str(tmp_path / "counts_daily.parquet")
+    old = counts([1, 2], pd.date_range('2024-06-01', '2024-06-30'), 10)
+    fastparquet.write(parquet_path, old, row_group_offsets=10, write_index=False)
+    new = counts([2, 3], pd.date_range('2024-06-29', '2024-07-03'), 20)
+
+    assert ParquetLoader().upsert_parquet(new, parquet_path, 'dt', ['location_dir_id', 'dt']) == len(new)
+
+    expected = (
+        pd.concat([old, new]).drop_duplicates(['location_dir_id', 'dt'], keep='last')
+        .sort_values(['dt', 'location_dir_id']).reset_index(drop=True)
+    )
+    result = pd.read_parquet(parquet_path).sort_values(['dt', 'location_dir_id']).reset_index(drop=True)
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+    assert not (tmp_path / "counts_daily.parquet.tmp").exists()
+
+
+def test_upsert_creates_missing_files_and_requires_the_time_column_in_the_key(tmp_path):
+    parquet_path = str(tmp_path / "new.parquet")
+    df = counts([1], pd.date_range('2024-07-01', '2024-07-02'), 5)
+
+    with pytest.raises(ValueError):
+        ParquetLoader().upsert_parquet(df, parquet_path, 'dt', ['location_dir_id'])
+    assert ParquetLoader().upsert_parquet(df.iloc[:0], parquet_path, 'dt', ['location_dir_id', 'dt']) == 0
+    assert ParquetLoader().upsert_parquet(df, parquet_path, 'dt', ['location_dir_id', 'dt']) == 2
+    assert len(pd.read_parquet(parquet_path)) == 2
+
+
+@pytest.fixture
+def loader(tmp_path):
+    loader = BicycleCountersLoader(incremental=True, backoff=0)
+    loader.etl_state = EtlState(str(tmp_path / "etl_state.json"))
+    return loader
+
+
+def test_rows_are_kept_from_the_day_of_the_high_water_mark(loader):
+    df = counts([1], pd.date_range('2024-06-28', '2024-07-03'), 1)
+    assert loader._since_high_water_mark('daily', df, 'dt') is df
+
+    loader.etl_state.update('daily', high_water_mark='2024-07-01T15:45:00')
+
+    assert list(loader._since_high_water_mark('daily', df, 'dt')['dt'].dt.day) == [1, 2, 3]
+
+
+def test_high_water_marks_never_move_back(loader):
+    loader.etl_state.update('a', high_water_mark='2024-07-10T00:00:00')
+    loader.etl_state.update('b', high_water_mark='2024-07-01T00:00:00')
+
+    loader._record_resources(
+        {'a': {'etag': '"a2"'}, 'b': {'etag': '"b2"'}, 'c': {'etag': '"c1"'}},
+        {'a': pd.Timestamp('2024-07-05'), 'b': pd.Timestamp('2024-07-05')},
+    )
+
+    saved = EtlState(loader.etl_state.state_path)
+    assert saved.get('a') == {'etag': '"a2"', 'high_water_mark': '2024-07-10T00:00:00'}
+    assert saved.get('b') == {'etag': '"b2"', 'high_water_mark': '2024-07-05T00:00:00'}
+    assert saved.get('c') == {'etag': '"c1"', 'high_water_mark': None}
+
+
+def make_ckan_app(etag: str) -> web.Application:
+    """A fake CKAN API with one resource, answering conditional HEAD requests by ETag."""
+    async def package_show(request):
+        url = str(request.url.with_path('/daily.json').with_query(None))
+        resource = {"name": "daily", "url": url, "last_modified": "2024-07-01T10:00:00"}
+        return web.json_response({"success": True, "result": {"resources": [resource]}})
+
+    async def resource(request):
+        if request.headers.get('If-None-Match') == etag:
+            return web.Response(status=304, headers={'ETag': etag})
+        return web.Response(body=b'[]', headers={'ETag': etag})
+
+    app = web.Application()
+    app.router.add_get('/package_show', package_show)
+    app.router.add_route('*', '/daily.json', resource)
+    return app
+
+
+def changed_validators(monkeypatch, loader, previous):
+    async def run():
+        server = TestServer(make_ckan_app('"v2"'))
+        await server.start_server()
+        monkeypatch.setattr(BicycleCountersLoader, 'BASE_URL', str(server.make_url('')))
+        try:
+            return await loader.get_changed_resource_validators(loader.PACKAGE_ID, 'daily', previous)
+        finally:
+            await server.close()
+
+    return asyncio.run(run())
+
+
+def test_changed_resources_are_detected_by_their_validators(monkeypatch, loader):
+    assert changed_validators(monkeypatch, loader, None) == {
+        'etag': '"v2"', 'last_modified': None, 'ckan_last_modified': '2024-07-01T10:00:00'
+    }
+    assert changed_validators(monkeypatch, loader, {'etag': '"v1"'})['etag'] == '"v2"'
+    assert changed_validators(monkeypatch, loader, {'etag': '"v2"'}) is None
@@ -0,0 +1,90 @@
+import asyncio
+import json
+
+import pytest
+
+from etl_pipelines.toronto_open_data import json_stream
+from etl_pipelines.toronto_open_data.json_stream import JsonArrayParser, iter_json_array_batches
+
+DOCUMENT = json.dumps([
+    {"_id": 1, "location_dir_id": 3, "datetime_bin": "2024-07-01T00:00:00", "bin_volume": 12},
+    {"_id": 2, "location_name": "Bloor St É, west of Castle Frank Rd — 中", "bin_volume": 1234567},
+    [1.5, -2e-3, None, True, False, "a \"quoted\" ] , [ string"],
+    12345678901234567890,
+    3.25,
+    "text",
+], ensure_ascii=False, indent=1).encode()
+
+
+class ChunkedStream():
+    """An async byte stream serving a document in fixed-size chunks, like aiohttp's response.content."""
+
+    def __init__(self, data: bytes, chunk_size: int):
+        self.data = data
+        self.chunk_size = chunk_size
+
+    async def read(self, n: int = -1) -> bytes:
+        size = self.chunk_size if n < 0 else min(n, self.chunk_size)
+        chunk, self.data = self.data[:size], self.data[size:]
+        return chunk
+
+
+def parse_in_chunks(data: bytes, chunk_size: int) -> list:
+    parser = JsonArrayParser()
+    items = []
+    for i in range(0, len(data), chunk_size):
+        items.extend(parser.feed(data[i:i + chunk_size]))
+    items.extend(parser.feed(b'', final=True))
+    return items
+
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 3, 7, 64, len(DOCUMENT)])
+def test_any_chunking_parses_like_json_loads(chunk_size):
+    assert parse_in_chunks(DOCUMENT, chunk_size) == json.loads(DOCUMENT)
+
+
+def test_numbers_split_between_chunks_are_not_cut():
+    parser = JsonArrayParser()
+
+    assert parser.feed(b'[12') == []
+    assert parser.feed(b'34, 5') == [1234]
+    assert parser.feed(b'6.') == []
+    assert parser.feed(b'5e') == []
+    assert parser.feed(b'-1, 7') == [56.5e-1]
+    assert parser.feed(b']', final=True) == [7]
+
+
+@pytest.mark.parametrize('document', [b'[]', b' [ ] ', b'\n[\n]\n'])
+def test_empty_arrays(document):
+    assert parse_in_chunks(document, 1) == []
+
+
+@pytest.mark.parametrize('document', [b'{"a": 1}', b'[1 2]', b'[1,,2]', b'[1] 2', b'[{"a": }]'])
+def test_malformed_documents_raise(document):
+    with pytest.raises(ValueError):
+        parse_in_chunks(document, 2)
+
+
+@pytest.mark.parametrize('document', [b'', b'[1, 2', b'[{"a": 1}'])
+def test_truncated_documents_raise(document):
+    with pytest.raises(ValueError):
+        parse_in_chunks(document, 2)
+
+
+async def collect_batches(stream, batch_size):
+    return [batch async for batch in iter_json_array_batches(stream, batch_size)]
+
+
+@pytest.mark.parametrize('use_ijson', [False, True], ids=['JsonArrayParser', 'ijson'])
+def test_batches_hold_every_element_in_order(monkeypatch, use_ijson):
+    if use_ijson and json_stream.ijson is None:
+        pytest.skip("ijson is not installed")
+    if not use_ijson:
+        monkeypatch.setattr(json_stream, 'ijson', None)
+    monkeypatch.setattr(json_stream, 'CHUNK_SIZE', 5)
+    document = json.dumps([{"_id": i, "bin_volume": i * 10} for i in range(23)]).encode()
+
+    batches = asyncio.run(collect_batches(ChunkedStream(document, 7), batch_size=10))
+
+    assert [len(batch) for batch in batches] == [10, 10, 3]
+    assert [item for batch in batches for item in batch] == json.loads(document)
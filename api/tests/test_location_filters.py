@@ -0,0 +1,126 @@
+"""
+A location filter returns exactly the unfiltered (baseline) response
+filtered on the client, on every path a query can take.
+"""
+import json
+
+import pandas as pd
+import pytest
+
+import baseline_routes
+from conftest import DATA_DIR
+from api.datasets import datasets
+from etl_pipelines.bicycle_counters.aggregations import build_time_of_day_profile
+from modules.numpy_loader import NumpyLoader
+from modules.parquet_loader import ParquetLoader
+
+COUNTS_DAILY_FILE = DATA_DIR / "counts_daily.parquet"
+COUNTS_DAILY_BY_LOCATION_NAME_FILE = DATA_DIR / "counts_daily_by_location_name.parquet"
+NAMES = sorted(pd.read_parquet(COUNTS_DAILY_BY_LOCATION_NAME_FILE, columns=['name'])['name'].unique())
+
+
+def filtered(body, field: str, values: list):
+    """Keeps the records whose field is one of values, dropping emptied time keys."""
+    if isinstance(body, list):
+        return [record for record in body if str(record[field]) in values]
+    kept = [(key, [record for record in records if str(record[field]) in values]) for key, records in body.items()]
+    return [(key, records) for key, records in kept if records] or []
+
+
+def as_items(body):
+    return list(body.items()) if isinstance(body, dict) else body
+
+
+def query_string(start, end, param, values):
+    return f'start={start}&end={end}' + ''.join(f'&{param}={value}' for value in values)
+
+
+def assert_filtered_like_baseline(app, client, path, view, file_path, start, end, param, values):
+    _, expected = baseline_routes.response(app, f'{path}?start={start}&end={end}', view, file_path)
+
+    response = client.get(f'/api/v1{path}?{query_string(start, end, param, values)}')
+
+    assert response.status_code == 200
+    assert as_items(json.loads(response.get_data(), object_pairs_hook=dict)) == filtered(json.loads(expected), param, values)
+
+
+LOCATION_DIR_IDS = [['1'], ['2', '7'], ['7', '2', '2'], ['99999'], ['x']]
+RANGES = [('2024-07-01', '2024-07-07'), ('2019-01-01', '2023-12-31'), ('2024-07-03', '2024-07-03')]
+
+
+@pytest.mark.parametrize('start, end', RANGES)
+@pytest.mark.parametrize('values', LOCATION_DIR_IDS)
+def test_daily_counts(app, client, start, end, values):
+    assert_filtered_like_baseline(
+        app, client, '/daily-counts-in-date-range', baseline_routes.daily_counts_in_date_range, COUNTS_DAILY_FILE,
+        start, end, 'location_dir_id', values
+    )
+
+
+@pytest.mark.parametrize('start, end', RANGES)
+@pytest.mark.parametrize('values', [NAMES[:1], [NAMES[5], NAMES[2]], ['Nowhere']])
+def test_daily_counts_by_location_name(app, client, start, end, values):
+    assert_filtered_like_baseline(
+        app, client, '/daily-counts-by-location-name-in-date-range',
+        baseline_routes.daily_counts_by_location_name_in_date_range, COUNTS_DAILY_BY_LOCATION_NAME_FILE,
+        start, end, 'name', values
+    )
+
+
+@pytest.mark.parametrize('start, end', RANGES + [('2024-07-03', '2024-07-01')])
+@pytest.mark.parametrize('values', LOCATION_DIR_IDS)
+def test_avg_daily_vol(app, client, start, end, values):
+    assert_filtered_like_baseline(
+        app, client, '/avg-daily-vol-for-date-range', baseline_routes.avg_daily_vol_for_date_range, COUNTS_DAILY_FILE,
+        start, end, 'location_dir_id', values
+    )
+
+
+def save_profile(df, key_cols, value_col, npz_path):
+    arrays = build_time_of_day_profile(df, time_col='datetime_bin', key_cols=key_cols, value_col=value_col)
+    NumpyLoader().arrays_to_npz(arrays, str(npz_path), overwrite=True)
+
+
+@pytest.mark.parametrize('source', ['table', 'partitioned', 'profile'])
+@pytest.mark.parametrize('positions', [[0], [-1, 0], []])
+def test_fifteen_min_counts(app, client, use_dataset, counts_15m_dir, tmp_path, source, positions):
+    counts_file = counts_15m_dir / "counts_15m.parquet"
+    use_dataset('counts_15m', counts_file)
+    df = pd.read_parquet(counts_file)
+    location_dir_ids = df['location_dir_id'].unique()
+    values = [location_dir_ids[position] for position in positions] or ['12345']
+    if source == 'table':
+        datasets.get('counts_15m')
+    elif source == 'partitioned':
+        ParquetLoader().df_to_partitioned_parquet(df, str(tmp_path / "partitioned"), 'datetime_bin')
+        use_dataset('counts_15m_partitioned', tmp_path / "partitioned")
+    else:
+        save_profile(df, ['location_dir_id'], 'bin_volume', tmp_path / "profile.npz")
+        use_dataset('counts_15m_profile', tmp_path / "profile.npz")
+
+    assert_filtered_like_baseline(
+        app, client, '/fifteen-min-counts-in-date-range', baseline_routes.fifteen_min_counts_in_date_range, counts_file,
+        '2024-07-01', '2024-07-03T12:00', 'location_dir_id', values
+    )
+
+
+@pytest.mark.parametrize('source', ['table', 'partitioned', 'profile'])
+def test_fifteen_min_counts_by_location_name(app, client, use_dataset, counts_15m_dir, tmp_path, source):
+    counts_file = counts_15m_dir / "counts_15m_by_location_name.parquet"
+    use_dataset('counts_15m_by_location_name', counts_file)
+    df = pd.read_parquet(counts_file)
+    values = sorted(df['name'].unique())[:2]
+    if source == 'table':
+        datasets.get('counts_15m_by_location_name')
+    elif source == 'partitioned':
+        ParquetLoader().df_to_partitioned_parquet(df, str(tmp_path / "partitioned"), 'datetime_bin')
+        use_dataset('counts_15m_by_location_name_partitioned', tmp_path / "partitioned")
+    else:
+        save_profile(df, ['name', 'location_dir_ids', 'coordinates'], 'total_bin_volume', tmp_path / "profile.npz")
+        use_dataset('counts_15m_by_location_name_profile', tmp_path / "profile.npz")
+
+    assert_filtered_like_baseline(
+        app, client, '/fifteen-min-counts-by-location-name-in-date-range',
+        baseline_routes.fifteen_min_counts_by_location_name_in_date_range, counts_file,
+        '2024-06-30', '2024-07-02', 'name', values
+    )
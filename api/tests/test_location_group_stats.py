@@ -0,0 +1,120 @@
+import asyncio
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from conftest import DATA_DIR
+from etl_pipelines.bicycle_counters.loader import BicycleCountersLoader
+
+DAILY_COUNTS = pd.read_parquet(DATA_DIR / "counts_daily.parquet").reset_index(drop=True)
+
+# The SQL the location_group_stats tables were built with, one query per granularity
+STATS_COLUMNS = """
+    JSON_GROUP_ARRAY(distinct cast(dbc.location_dir_id as integer)) location_dir_ids,
+    MIN(dbc.dt) as first_active,
+    MAX(dbc.dt) as last_active,
+    JULIANDAY(max(dbc.dt)) - JULIANDAY(min(dbc.dt)) + 1 as days_bw_first_last,
+    count(distinct dt) as days_active,
+    count(distinct dt)/(JULIANDAY(max(dbc.dt)) - JULIANDAY(min(dbc.dt)) + 1) as prct_active_days,
+    sum(daily_volume) total_vol,
+    sum(daily_volume)/count(distinct dt) avg_daily_vol
+"""
+PERIODS = {
+    'overall': [],
+    'yearly': [("STRFTIME('%Y', dt)", 'year')],
+    'monthly': [("STRFTIME('%Y', dt)", 'year'), ("STRFTIME('%m', dt)", 'month')],
+    'weekly': [("STRFTIME('%Y', dt)", 'year'), ("STRFTIME('%m', dt)", 'month'), ("STRFTIME('%W', dt)", 'week')],
+}
+
+
+def baseline_stats(conn, granularity: str) -> list:
+    periods = PERIODS[granularity]
+    period_cols = ''.join(f"{expression} {name}, " for expression, name in periods)
+    group_by = ''.join(f", {name}" for _, name in periods)
+    return conn.execute(f"""
+        select REPLACE(TRIM(dbc.location_name), ' (retired)', '') location_name, {period_cols} {STATS_COLUMNS}
+        from daily_bicycle_counts dbc
+        GROUP BY REPLACE(TRIM(dbc.location_name), ' (retired)', ''){group_by}
+    """).fetchall()
+
+
+def make_loader(db_path, daily_counts=DAILY_COUNTS, **options) -> BicycleCountersLoader:
+    loader = BicycleCountersLoader(**options)
+    loader.DB_PATH = str(db_path)
+
+    async def get_daily_counts_frame():
+        return daily_counts
+    loader.get_daily_counts_frame = get_daily_counts_frame
+    return loader
+
+
+def read_stats(db_path, granularity: str) -> list:
+    conn = sqlite3.connect(db_path)
+    try:
+        columns = ['location_name'] + [name for _, name in PERIODS[granularity]] + [
+            'location_dir_ids', 'first_active', 'last_active', 'days_bw_first_last', 'days_active',
+            'prct_active_days', 'total_vol', 'avg_daily_vol',
+        ]
+        return conn.execute(f"select {', '.join(columns)} from location_group_stats_{granularity}").fetchall()
+    finally:
+        conn.close()
+
+
+@pytest.fixture(scope='module')
+def db_path(tmp_path_factory):
+    db_path = tmp_path_factory.mktemp("stats") / "db.sqlite3"
+    loader = make_loader(db_path, bulk_load=True)
+    asyncio.run(loader.load_daily_counts_into_sqlite())
+    loader.load_location_group_stats_into_sqlite()
+    return db_path
+
+
+@pytest.mark.parametrize('granularity', list(PERIODS))
+def test_stats_match_the_sql_they_replace(db_path, granularity):
+    conn = sqlite3.connect(db_path)
+    try:
+        expected = sorted(baseline_stats(conn, granularity))
+    finally:
+        conn.close()
+
+    result = sorted(read_stats(db_path, granularity))
+
+    assert len(result) == len(expected)
+    for row, expected_row in zip(result, expected):
+        assert row[:-3] == expected_row[:-3]
+        assert row[-3:] == pytest.approx(expected_row[-3:])
+
+
+def test_overall_stats_are_sorted_by_mean_daily_volume(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        volumes = [row[0] for row in conn.execute("select avg_daily_vol from location_group_stats_overall order by rowid")]
+    finally:
+        conn.close()
+
+    assert volumes == sorted(volumes, reverse=True)
+
+
+def test_an_incremental_update_matches_a_full_rebuild(tmp_path):
+    cutoff = pd.Timestamp('2023-06-15')
+    db_path = tmp_path / "db.sqlite3"
+    before = DAILY_COUNTS[DAILY_COUNTS['dt'] < cutoff]
+    full = make_loader(db_path, before, bulk_load=True)
+    asyncio.run(full.load_daily_counts_into_sqlite())
+    full.load_location_group_stats_into_sqlite()
+
+    changed = DAILY_COUNTS.copy()
+    changed.loc[changed['dt'] >= cutoff - pd.Timedelta(days=30), 'daily_volume'] += 7
+    incremental = make_loader(db_path, changed, incremental=True)
+    asyncio.run(incremental.load_daily_counts_into_sqlite())
+    incremental.changed_since = {'counts_daily': cutoff - pd.Timedelta(days=30)}
+    incremental.load_location_group_stats_into_sqlite()
+
+    rebuilt_path = tmp_path / "rebuilt.sqlite3"
+    rebuilt = make_loader(rebuilt_path, changed, bulk_load=True)
+    asyncio.run(rebuilt.load_daily_counts_into_sqlite())
+    rebuilt.load_location_group_stats_into_sqlite()
+
+    for granularity in PERIODS:
+        assert sorted(read_stats(db_path, granularity)) == sorted(read_stats(rebuilt_path, granularity)), granularity
@@ -0,0 +1,138 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import baseline_routes
+from conftest import DATA_DIR, make_counts_15m
+from api.datasets import CodedColumn, LocationGroups, TimeSeriesTable, datasets
+from etl_pipelines.bicycle_counters.aggregations import build_location_groups, aggregate_by_location_group
+from modules.numpy_loader import NumpyLoader
+
+with open(DATA_DIR / "counter_groups.geojson", 'r', encoding='utf-8') as f:
+    FEATURES = json.load(f)['features']
+GROUPS = build_location_groups(FEATURES)
+
+
+def baseline_aggregate(df: pd.DataFrame, time_col: str, value_col: str) -> pd.DataFrame:
+    """The merge and groupby the by-location-name files were built with."""
+    names_df = pd.DataFrame([
+        {
+            'name': feature['properties']['name'],
+            'location_dir_ids': feature['properties']['location_dir_ids'],
+            'coordinates': str([float(value) for value in feature['geometry']['coordinates']]),
+        }
+        for feature in FEATURES
+    ])
+    names_df = names_df.explode('location_dir_ids').rename(columns={'location_dir_ids': 'location_dir_id'})
+    names_df['location_dir_id'] = names_df['location_dir_id'].astype('int64')
+
+    counts_df = df.assign(location_dir_id=df['location_dir_id'].astype('int64'))
+    merged_df = pd.merge(counts_df, names_df, on='location_dir_id', how='left')
+    aggregated_df = merged_df.groupby(['name', 'coordinates', time_col]).agg(
+        location_dir_ids=('location_dir_id', list),
+        **{value_col: (value_col, 'sum')}
+    ).reset_index()
+    aggregated_df['location_dir_ids'] = aggregated_df['location_dir_ids'].astype(str)
+    return aggregated_df[['name', 'coordinates', time_col, value_col, 'location_dir_ids']]
+
+
+def test_groups_are_numbered_in_name_and_coordinates_order():
+    pairs = list(zip(GROUPS['names'], GROUPS['coordinates']))
+
+    assert pairs == sorted(pairs)
+    assert GROUPS['group_offsets'][0] == 0
+    assert GROUPS['group_offsets'][-1] == len(GROUPS['dir_ids']) == sum(
+        len(feature['properties']['location_dir_ids']) for feature in FEATURES
+    )
+    for g in range(len(pairs)):
+        members = GROUPS['dir_ids'][GROUPS['group_offsets'][g]:GROUPS['group_offsets'][g + 1]]
+        assert list(members) == sorted(members)
+
+
+def test_a_counter_in_two_groups_is_rejected():
+    duplicated = json.loads(json.dumps(FEATURES[:2]))
+    duplicated[1]['properties']['location_dir_ids'] = duplicated[0]['properties']['location_dir_ids'][:1]
+
+    with pytest.raises(ValueError):
+        build_location_groups(duplicated)
+
+
+def test_daily_aggregate_reproduces_the_committed_file():
+    df = pd.read_parquet(DATA_DIR / "counts_daily.parquet")
+
+    result = aggregate_by_location_group(GROUPS, df, 'dt', 'daily_volume')
+
+    committed = pd.read_parquet(DATA_DIR / "counts_daily_by_location_name.parquet").reset_index(drop=True)
+    pd.testing.assert_frame_equal(result[list(committed.columns)], committed)
+
+
+def test_fifteen_min_aggregate_matches_the_pandas_groupby():
+    df = make_counts_15m(GROUPS['dir_ids'][:12].tolist() + [999], '2024-06-28', 3)
+
+    result = aggregate_by_location_group(GROUPS, df, 'datetime_bin', 'bin_volume')
+
+    pd.testing.assert_frame_equal(result, baseline_aggregate(df, 'datetime_bin', 'bin_volume'))
+
+
+@pytest.fixture
+def groups_file(tmp_path):
+    groups_path = tmp_path / "location_groups.npz"
+    NumpyLoader().arrays_to_npz(GROUPS, str(groups_path), overwrite=True)
+    return groups_path
+
+
+@pytest.mark.parametrize('query', [
+    'start=2024-07-01&end=2024-07-07',
+    'start=2019-01-01&end=2023-12-31',
+    'start=2024-07-03T10:00&end=2024-07-04',
+    'start=2024-08-10&end=2024-08-01',
+])
+def test_coded_daily_counts_by_location_name_match_baseline(app, client, use_dataset, groups_file, query):
+    counts_file = DATA_DIR / "counts_daily_by_location_name.parquet"
+    use_dataset(
+        'counts_daily_by_location_name', counts_file,
+        loader=LocationGroups.table_loader(groups_file, 'dt'), depends_on=[groups_file]
+    )
+
+    path = f'/daily-counts-by-location-name-in-date-range?{query}'
+    expected = baseline_routes.response(app, path, baseline_routes.daily_counts_by_location_name_in_date_range, counts_file)
+
+    response = client.get('/api/v1' + path)
+
+    assert (response.status_code, response.get_data()) == expected
+    assert isinstance(datasets.loaded('counts_daily_by_location_name').columns['name'], CodedColumn)
+
+
+@pytest.mark.parametrize('query', ['start=2024-06-28&end=2024-07-07', 'start=2024-07-01T06:07&end=2024-07-01T13:14'])
+def test_coded_fifteen_min_counts_by_location_name_match_baseline(app, client, use_dataset, counts_15m_dir, query):
+    counts_file = counts_15m_dir / "counts_15m_by_location_name.parquet"
+    groups_path = counts_15m_dir / "location_groups.npz"
+    use_dataset(
+        'counts_15m_by_location_name', counts_file,
+        loader=LocationGroups.table_loader(groups_path, 'datetime_bin'), depends_on=[groups_path]
+    )
+
+    path = f'/fifteen-min-counts-by-location-name-in-date-range?{query}'
+    expected = baseline_routes.response(
+        app, path, baseline_routes.fifteen_min_counts_by_location_name_in_date_range, counts_file
+    )
+
+    response = client.get('/api/v1' + path)
+
+    assert (response.status_code, response.get_data()) == expected
+    assert isinstance(datasets.loaded('counts_15m_by_location_name').columns['name'], CodedColumn)
+
+
+def test_rows_outside_the_dimension_keep_the_table_uncoded():
+    first_group = LocationGroups(
+        GROUPS['names'][:1].astype(object), GROUPS['coordinates'][:1].astype(object),
+        GROUPS['dir_ids'][:GROUPS['group_offsets'][1]], GROUPS['group_offsets'][:2],
+    )
+    df = pd.read_parquet(DATA_DIR / "counts_daily_by_location_name.parquet")
+    table = TimeSeriesTable.from_frame(df, 'dt')
+
+    assert first_group.coded_table(table) is table
+    codes = first_group.group_codes(df['name'].to_numpy(), df['coordinates'].to_numpy())
+    assert set(np.unique(codes)) == {-1, 0}
@@ -0,0 +1,142 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import baseline_routes
+from conftest import DATA_DIR
+from api import routes
+from api.datasets import CodedColumn, LocationGroups, TimeSeriesTable, has_current_arrow_copy, load_npz
+from modules.arrow_loader import ArrowLoader
+
+COUNTS_DAILY_FILE = DATA_DIR / "counts_daily.parquet"
+COUNTS_DAILY_BY_LOCATION_NAME_FILE = DATA_DIR / "counts_daily_by_location_name.parquet"
+
+
+def write_arrow(file_path, arrow_path, time_col: str):
+    ArrowLoader().df_to_arrow(pd.read_parquet(file_path), str(arrow_path), time_col, overwrite=True)
+    return arrow_path
+
+
+@pytest.mark.parametrize('file_path, time_col', [
+    (COUNTS_DAILY_FILE, 'dt'),
+    (COUNTS_DAILY_BY_LOCATION_NAME_FILE, 'dt'),
+])
+def test_mapped_tables_hold_the_parquet_rows_in_the_same_order(tmp_path, file_path, time_col):
+    arrow_path = write_arrow(file_path, tmp_path / "copy.arrow", time_col)
+
+    mapped = TimeSeriesTable.from_arrow(arrow_path, time_col)
+    decoded = TimeSeriesTable.from_frame(pd.read_parquet(file_path), time_col)
+
+    assert list(mapped.columns) == list(decoded.columns)
+    pd.testing.assert_frame_equal(mapped.to_frame(), decoded.to_frame())
+    assert any(isinstance(column, CodedColumn) for column in mapped.columns.values())
+
+
+def test_generated_fifteen_min_copy_matches(tmp_path, counts_15m_dir):
+    counts_file = counts_15m_dir / "counts_15m.parquet"
+    arrow_path = write_arrow(counts_file, tmp_path / "counts_15m.arrow", 'datetime_bin')
+
+    mapped = TimeSeriesTable.from_arrow(arrow_path, 'datetime_bin')
+
+    pd.testing.assert_frame_equal(
+        mapped.to_frame(), TimeSeriesTable.from_frame(pd.read_parquet(counts_file), 'datetime_bin').to_frame()
+    )
+    # Numeric columns are views of the mapped file, not copies
+    assert not mapped.columns['bin_volume'].flags.owndata
+
+
+def test_a_copy_is_only_current_when_at_least_as_new_as_its_source(tmp_path):
+    source, copy = tmp_path / "counts.parquet", tmp_path / "counts.arrow"
+    assert not has_current_arrow_copy(source, copy)
+
+    source.write_bytes(b"parquet")
+    copy.write_bytes(b"arrow")
+    os.utime(source, ns=(2_000_000_000, 2_000_000_000))
+    os.utime(copy, ns=(2_000_000_000, 2_000_000_000))
+    assert has_current_arrow_copy(source, copy)
+
+    os.utime(source, ns=(3_000_000_000, 3_000_000_000))
+    assert not has_current_arrow_copy(source, copy)
+
+
+@pytest.mark.parametrize('compressed', [False, True])
+def test_load_npz_matches_np_load(tmp_path, compressed):
+    arrays = {
+        'days': np.arange(10, dtype=np.int64),
+        'cube': np.random.default_rng(0).random((4, 3, 96)),
+        'fortran': np.asfortranarray(np.arange(12.0).reshape(3, 4)),
+        'names': np.array(['Bloor', 'Yonge']),
+        'scalar': np.array(5),
+        'empty': np.zeros(0),
+    }
+    npz_path = tmp_path / "arrays.npz"
+    (np.savez_compressed if compressed else np.savez)(npz_path, **arrays)
+
+    loaded = load_npz(npz_path)
+
+    with np.load(npz_path) as expected:
+        assert sorted(loaded) == sorted(expected.files)
+        for name in ('days', 'cube', 'fortran', 'names', 'scalar', 'empty'):
+            np.testing.assert_array_equal(loaded[name], expected[name], err_msg=name)
+    assert isinstance(loaded['cube'], np.memmap) != compressed
+    assert loaded['fortran'].flags.f_contiguous
+
+
+def test_the_committed_daily_chart_is_mapped():
+    loaded = load_npz(DATA_DIR / "counts_daily_chart.npz")
+
+    assert isinstance(loaded['volumes'], np.memmap)
+
+
+DAILY_QUERIES = ['start=2024-07-01&end=2024-07-07', 'start=2019-01-01&end=2023-12-31', 'start=2024-07-03&end=2024-07-03']
+
+
+@pytest.mark.parametrize('query', DAILY_QUERIES)
+@pytest.mark.parametrize('path, view', [
+    ('/daily-counts-in-date-range', baseline_routes.daily_counts_in_date_range),
+    ('/avg-daily-vol-for-date-range', baseline_routes.avg_daily_vol_for_date_range),
+])
+def test_daily_endpoints_through_the_arrow_copy_match_baseline(app, client, use_dataset, tmp_path, path, view, query):
+    arrow_path = write_arrow(COUNTS_DAILY_FILE, tmp_path / "counts_daily.arrow", 'dt')
+    use_dataset('counts_daily', COUNTS_DAILY_FILE, loader=TimeSeriesTable.loader('dt', arrow_path), depends_on=[arrow_path])
+
+    expected = baseline_routes.response(app, f'{path}?{query}', view, COUNTS_DAILY_FILE)
+    response = client.get(f'/api/v1{path}?{query}')
+
+    assert (response.status_code, response.get_data()) == expected
+    assert isinstance(routes.datasets.loaded('counts_daily').columns['location_name'], CodedColumn)
+
+
+@pytest.mark.parametrize('query', DAILY_QUERIES)
+def test_by_location_name_through_the_arrow_copy_match_baseline(app, client, use_dataset, counts_15m_dir, tmp_path, query):
+    arrow_path = write_arrow(COUNTS_DAILY_BY_LOCATION_NAME_FILE, tmp_path / "by_name.arrow", 'dt')
+    groups_path = counts_15m_dir / "location_groups.npz"
+    use_dataset(
+        'counts_daily_by_location_name', COUNTS_DAILY_BY_LOCATION_NAME_FILE,
+        loader=LocationGroups.table_loader(groups_path, 'dt', arrow_path), depends_on=[groups_path, arrow_path]
+    )
+
+    path = f'/daily-counts-by-location-name-in-date-range?{query}'
+    expected = baseline_routes.response(
+        app, path, baseline_routes.daily_counts_by_location_name_in_date_range, COUNTS_DAILY_BY_LOCATION_NAME_FILE
+    )
+    response = client.get('/api/v1' + path)
+
+    assert (response.status_code, response.get_data()) == expected
+
+
+@pytest.mark.parametrize('query', ['start=2024-06-28&end=2024-07-07', 'start=2024-07-01T06:07&end=2024-07-01T13:14'])
+def test_fifteen_min_counts_through_the_arrow_copy_match_baseline(app, client, use_dataset, counts_15m_dir, tmp_path, monkeypatch, query):
+    counts_file = counts_15m_dir / "counts_15m.parquet"
+    arrow_path = write_arrow(counts_file, tmp_path / "counts_15m.arrow", 'datetime_bin')
+    use_dataset('counts_15m', counts_file, loader=TimeSeriesTable.loader('datetime_bin', arrow_path), depends_on=[arrow_path])
+    monkeypatch.setitem(routes.ARROW_COPIES, 'counts_15m', (counts_file, arrow_path))
+
+    path = f'/fifteen-min-counts-in-date-range?{query}'
+    expected = baseline_routes.response(app, path, baseline_routes.fifteen_min_counts_in_date_range, counts_file)
+    response = client.get('/api/v1' + path)
+
+    assert (response.status_code, response.get_data()) == expected
+    assert not routes.datasets.loaded('counts_15m').columns['bin_volume'].flags.owndata
@@ -0,0 +1,101 @@
+import pandas as pd
+import pytest
+
+import baseline_routes
+from conftest import make_counts_15m
+from api.datasets import PartitionedTimeSeries, TimeSeriesTable
+from modules.parquet_loader import ParquetLoader
+
+RANGES = [
+    ('2024-06-28', '2024-07-07 23:45'),
+    ('2024-06-30 12:00', '2024-07-01 12:00'),
+    ('2024-07-01', '2024-07-01'),
+    ('2024-06-29 06:07', '2024-06-29 13:14'),
+    ('2023-01-01', '2023-12-31'),
+]
+
+
+def write_partitioned(df, dataset_dir, **kwargs) -> PartitionedTimeSeries:
+    ParquetLoader().df_to_partitioned_parquet(df, str(dataset_dir), 'datetime_bin', row_group_size=500, **kwargs)
+    return PartitionedTimeSeries(dataset_dir, 'datetime_bin')
+
+
+def assert_same_rows(table: TimeSeriesTable, expected: TimeSeriesTable):
+    pd.testing.assert_frame_equal(
+        table.to_frame(list(expected.columns)).astype({'location_dir_id': object}),
+        expected.to_frame(),
+        check_dtype=False,
+    )
+
+
+@pytest.mark.parametrize('keys', [None, ['3', '17']])
+@pytest.mark.parametrize('start, end', RANGES)
+def test_slice_matches_slicing_the_whole_table(tmp_path, start, end, keys):
+    df = make_counts_15m([3, 4, 17], '2024-06-28', 10)
+    partitioned = write_partitioned(df, tmp_path / "counts_15m_partitioned")
+
+    table = partitioned.slice(start, end, 'location_dir_id', keys)
+
+    expected = TimeSeriesTable.from_frame(df, 'datetime_bin').slice(
+        pd.Timestamp(start), pd.Timestamp(end), 'location_dir_id', keys
+    )
+    assert_same_rows(table, expected)
+
+
+def test_months_are_written_as_hive_partitions(tmp_path):
+    write_partitioned(make_counts_15m([3], '2024-06-28', 10), tmp_path / "dataset")
+
+    parts = sorted(path.relative_to(tmp_path / "dataset").as_posix() for path in (tmp_path / "dataset").rglob('*.parquet'))
+    assert parts == ['year=2024/month=06/part-0.parquet', 'year=2024/month=07/part-0.parquet']
+    assert not (tmp_path / "dataset.tmp").exists()
+
+
+def test_replacing_partitions_keeps_the_other_months(tmp_path):
+    df = make_counts_15m([3, 4], '2024-06-28', 10)
+    partitioned = write_partitioned(df, tmp_path / "dataset")
+    june = (tmp_path / "dataset" / "year=2024" / "month=06" / "part-0.parquet").read_bytes()
+
+    july = df[df['datetime_bin'] >= '2024-07-01'].assign(bin_volume=lambda d: d['bin_volume'] + 1000)
+    write_partitioned(july, tmp_path / "dataset", replace_partitions=True)
+
+    assert (tmp_path / "dataset" / "year=2024" / "month=06" / "part-0.parquet").read_bytes() == june
+    expected = pd.concat([df[df['datetime_bin'] < '2024-07-01'], july]).sort_values('record_id', ignore_index=True)
+    result = partitioned.slice('2024-06-28', '2024-07-31').to_frame(list(df.columns))
+    pd.testing.assert_frame_equal(
+        result.sort_values('record_id', ignore_index=True).astype({'location_dir_id': object}), expected, check_dtype=False
+    )
+
+
+@pytest.fixture
+def partitioned_reads(monkeypatch):
+    """Counts the range reads served from a partitioned copy."""
+    reads = []
+    slice_partitions = PartitionedTimeSeries.slice
+
+    def counted(self, *args, **kwargs):
+        reads.append(args)
+        return slice_partitions(self, *args, **kwargs)
+    monkeypatch.setattr(PartitionedTimeSeries, 'slice', counted)
+    return reads
+
+
+@pytest.mark.parametrize('query', [
+    'start=2024-06-28&end=2024-07-07',
+    'start=2024-06-30T06:07&end=2024-07-01T13:14',
+    'start=2024-07-01&end=2024-07-01',
+    'start=2024-07-02&end=2024-07-01',
+])
+def test_fifteen_min_counts_from_the_partitioned_copy_match_baseline(
+        app, client, use_dataset, counts_15m_dir, tmp_path, partitioned_reads, query):
+    counts_file = counts_15m_dir / "counts_15m.parquet"
+    use_dataset('counts_15m', counts_file)
+    write_partitioned(pd.read_parquet(counts_file), tmp_path / "counts_15m_partitioned")
+    use_dataset('counts_15m_partitioned', tmp_path / "counts_15m_partitioned")
+
+    path = f'/fifteen-min-counts-in-date-range?{query}'
+    expected = baseline_routes.response(app, path, baseline_routes.fifteen_min_counts_in_date_range, counts_file)
+
+    response = client.get('/api/v1' + path)
+
+    assert (response.status_code, response.get_data()) == expected
+    assert len(partitioned_reads) == 1
@@ -0,0 +1,73 @@
+import pytest
+
+from api import create_app
+from api.datasets import DatasetRegistry, datasets
+
+
+def failing_loader(file_path):
+    raise ValueError("corrupt")
+
+
+@pytest.fixture
+def registry(tmp_path):
+    registry = DatasetRegistry()
+    for name in ('small', 'large', 'broken'):
+        (tmp_path / name).write_text(name)
+    registry.register('small', tmp_path / "small", loader=lambda path: path.read_text())
+    registry.register('large', tmp_path / "large", loader=lambda path: path.read_text(), preload=False)
+    registry.register('broken', tmp_path / "broken", loader=failing_loader)
+    registry.register('missing', tmp_path / "missing", loader=lambda path: path.read_text())
+    return registry
+
+
+def test_preload_loads_the_default_datasets(registry):
+    loaded = registry.preload()
+
+    assert set(loaded) == {'small'}
+    assert registry.loaded('small') == "small"
+    assert registry.loaded('large') is None
+    assert registry.ready.is_set()
+
+
+def test_preload_of_named_datasets(registry):
+    assert set(registry.preload(['large'])) == {'large'}
+    assert registry.loaded('small') is None
+
+
+def test_background_preload_sets_ready_when_done(registry):
+    thread = registry.start_preload(background=True)
+    thread.join()
+
+    assert registry.ready.is_set()
+    assert 'small' in registry.load_times
+
+
+def test_sync_preload_at_startup_skips_the_full_15_minute_tables(client, use_dataset, counts_15m_dir):
+    use_dataset('counts_15m', counts_15m_dir / "counts_15m.parquet")
+
+    create_app(preload='sync')
+
+    assert datasets.loaded('counts_daily') is not None
+    assert datasets.loaded('counts_daily_chart') is not None
+    assert datasets.loaded('counts_15m') is None
+
+    response = client.get('/api/v1/ready')
+    assert response.status_code == 200
+    assert 'counts_daily' in response.get_json()['load_times']
+
+
+def test_named_preload_from_the_environment(client, monkeypatch, use_dataset, counts_15m_dir):
+    use_dataset('counts_15m', counts_15m_dir / "counts_15m.parquet")
+    monkeypatch.setenv('PRELOAD_DATASET_NAMES', 'counts_15m, counter_groups')
+
+    create_app(preload='sync')
+
+    assert datasets.loaded('counts_15m') is not None
+    assert datasets.loaded('counter_groups') is not None
+    assert datasets.loaded('counts_daily') is None
+
+
+@pytest.mark.parametrize('kwargs', [dict(preload='eager'), dict(preload='sync', preload_names=['counts_16m'])])
+def test_invalid_preload_settings_are_rejected(kwargs):
+    with pytest.raises(ValueError):
+        create_app(**kwargs)
@@ -0,0 +1,106 @@
+import os
+
+import pytest
+from flask import Flask, jsonify, request
+
+from api.http_cache import http_cache
+from api.response_cache import ResponseCache
+
+
+@pytest.fixture
+def cached_app(tmp_path):
+    """An app with one cached route over a data file, counting the route's runs."""
+    data_file = tmp_path / "data.parquet"
+    data_file.write_bytes(b"v1")
+
+    app = Flask(__name__)
+    app.runs = 0
+    app.cache = ResponseCache()
+    app.data_file = data_file
+
+    @app.route('/range')
+    @http_cache.track(data_file)
+    @app.cache.cached
+    def get_range():
+        app.runs += 1
+        if request.args.get('fail'):
+            return jsonify({"error": "bad"}), 400
+        return jsonify({"start": request.args.get('start'), "pad": "x" * int(request.args.get('pad', 0))}), 200
+
+    return app
+
+
+def test_repeated_queries_are_served_from_the_cache(cached_app):
+    client = cached_app.test_client()
+
+    first = client.get('/range?start=2024-07-01&end=2024-07-07')
+    second = client.get('/range?end=2024-07-07&start=2024-07-01')
+    third = client.get('/range?start=2024-07-01T00:00:00&end=2024-07-07')
+
+    assert cached_app.runs == 1
+    assert first.get_data() == second.get_data() == third.get_data()
+    assert second.mimetype == 'application/json'
+    with cached_app.app_context():
+        assert cached_app.cache.stats()['hits'] == 2
+
+
+def test_a_new_data_file_invalidates_entries(cached_app):
+    client = cached_app.test_client()
+    client.get('/range?start=2024-07-01')
+
+    cached_app.data_file.write_bytes(b"version 2")
+    os.utime(cached_app.data_file, ns=(5_000_000_000, 5_000_000_000))
+    client.get('/range?start=2024-07-01')
+
+    assert cached_app.runs == 2
+    assert cached_app.cache.invalidations == 1
+
+
+def test_errors_are_not_cached(cached_app):
+    client = cached_app.test_client()
+
+    client.get('/range?fail=1')
+    client.get('/range?fail=1')
+
+    assert cached_app.runs == 2
+
+
+def test_least_recently_used_entries_are_evicted_by_size(cached_app):
+    cached_app.config['RESPONSE_CACHE_MAX_BYTES'] = 2500
+    client = cached_app.test_client()
+
+    client.get('/range?start=a&pad=1000')
+    client.get('/range?start=b&pad=1000')
+    client.get('/range?start=a&pad=1000')   # a is now the most recently used
+    client.get('/range?start=c&pad=1000')   # evicts b
+    assert cached_app.runs == 3
+
+    client.get('/range?start=a&pad=1000')
+    assert cached_app.runs == 3
+    client.get('/range?start=b&pad=1000')
+    assert cached_app.runs == 4
+
+    with cached_app.app_context():
+        stats = cached_app.cache.stats()
+    assert stats['size_bytes'] <= 2500
+    assert stats['evictions'] == 2
+
+
+def test_a_zero_byte_budget_disables_caching(cached_app):
+    cached_app.config['RESPONSE_CACHE_MAX_BYTES'] = 0
+    client = cached_app.test_client()
+
+    client.get('/range?start=a')
+    client.get('/range?start=a')
+
+    assert cached_app.runs == 2
+
+
+def test_cache_stats_endpoint(client):
+    client.get('/api/v1/daily-counts-in-date-range?start=2024-07-01&end=2024-07-07')
+    client.get('/api/v1/daily-counts-in-date-range?start=2024-07-01&end=2024-07-07')
+
+    stats = client.get('/api/v1/cache-stats').get_json()
+
+    assert stats['entries'] == 1
+    assert stats['hits'] >= 1
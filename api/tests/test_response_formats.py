@@ -0,0 +1,67 @@
+import json
+
+import pandas as pd
+import pytest
+
+from api.serializers import ARROW_AVAILABLE
+
+if ARROW_AVAILABLE:
+    import pyarrow as pa
+
+RANGE = 'start=2024-07-01&end=2024-07-07'
+
+
+def json_rows(client, path: str, value_name: str) -> dict:
+    """{(day, location fields...): value} from the default JSON format."""
+    body = client.get(f'/api/v1{path}?{RANGE}').get_json()
+    return {
+        (day, *(record[field] for field in sorted(record) if field != value_name)): record[value_name]
+        for day, records in body.items() for record in records
+    }
+
+
+@pytest.mark.parametrize('path, value_name', [
+    ('/daily-counts-in-date-range', 'daily_volume'),
+    ('/daily-counts-by-location-name-in-date-range', 'daily_volume'),
+])
+def test_columnar_format_holds_the_json_rows(client, path, value_name):
+    body = client.get(f'/api/v1{path}?{RANGE}&format=columnar').get_json()
+
+    fields = sorted(body['locations'])
+    locations = list(zip(*(body['locations'][field] for field in fields)))
+    rows = {
+        (day, *location): value
+        for day, values in body[value_name].items()
+        for location, value in zip(locations, values) if value is not None
+    }
+    assert rows == json_rows(client, path, value_name)
+    days = pd.to_datetime(list(body[value_name]), format='%a, %d %b %Y %H:%M:%S GMT')
+    assert days.is_monotonic_increasing
+
+
+@pytest.mark.skipif(not ARROW_AVAILABLE, reason="pyarrow is not installed")
+@pytest.mark.parametrize('path, value_name', [
+    ('/daily-counts-in-date-range', 'daily_volume'),
+    ('/daily-counts-by-location-name-in-date-range', 'daily_volume'),
+])
+def test_arrow_format_holds_the_json_rows(client, path, value_name):
+    response = client.get(f'/api/v1{path}?{RANGE}&format=arrow')
+
+    assert response.mimetype == 'application/vnd.apache.arrow.stream'
+    table = pa.ipc.open_stream(response.get_data()).read_all().to_pylist()
+    fields = sorted(name for name in table[0] if name not in ('key', value_name))
+    rows = {(row['key'], *(row[field] for field in fields)): row[value_name] for row in table}
+    assert rows == json_rows(client, path, value_name)
+
+
+def test_columnar_format_of_an_empty_range(client):
+    body = client.get('/api/v1/daily-counts-in-date-range?start=1990-01-01&end=1990-02-01&format=columnar').get_json()
+
+    assert body == {'locations': {'location_dir_id': []}, 'daily_volume': {}}
+
+
+def test_unknown_format_is_rejected(client):
+    response = client.get(f'/api/v1/daily-counts-in-date-range?{RANGE}&format=xml')
+
+    assert response.status_code == 400
+    assert 'Invalid format' in json.loads(response.get_data())['error']
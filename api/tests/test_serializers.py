@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+import pytest
+from flask import jsonify
+
+from api.serializers import CodedColumn, encode_records, encode_grouped_records, json_response
+
+
+@pytest.fixture
+def frame():
+    return pd.DataFrame({
+        'location_dir_id': ['1', '22', '1', 'é "quoted"', 'é中', '22'],
+        'daily_volume': np.array([0, 17, -3, 2**40, 5, 12], dtype=np.int64),
+        'avg_bin_volume': [0.1, 1 / 3, 1e20, 1.5e-7, -0.0, 250.0],
+        'active': [True, False, True, True, False, False],
+    })
+
+
+def jsonify_body(app, value) -> bytes:
+    with app.test_request_context():
+        return jsonify(value).get_data()
+
+
+def test_encode_records_matches_jsonify(app, frame):
+    body = encode_records({col: frame[col].to_numpy() for col in frame.columns})
+
+    assert (body + '\n').encode() == jsonify_body(app, frame.to_dict(orient='records'))
+
+
+def test_encode_records_nan_as_null_matches_jsonify_of_none(app):
+    df = pd.DataFrame({'date': ['2024-01-01', '2024-01-02'], 'Bloor': [1.0, np.nan], 'Yonge': [np.nan, 2.5]})
+
+    body = encode_records({col: df[col].to_numpy() for col in df.columns}, nan_as_null=True)
+
+    expected = jsonify_body(app, df.replace({np.nan: None}).to_dict(orient='records'))
+    assert (body + '\n').encode() == expected
+
+
+def test_encode_records_of_coded_columns_decodes_them(app):
+    names = CodedColumn(np.array([2, 0, 2, 1]), np.array(['a', 'b', 'c'], dtype=object))
+
+    body = encode_records({'name': names, 'volume': np.array([1, 2, 3, 4])})
+
+    expected = [{'name': 'c', 'volume': 1}, {'name': 'a', 'volume': 2}, {'name': 'c', 'volume': 3}, {'name': 'b', 'volume': 4}]
+    assert (body + '\n').encode() == jsonify_body(app, expected)
+
+
+def test_encode_records_of_no_rows():
+    assert encode_records({'a': np.array([], dtype=np.int64)}) == '[]'
+
+
+def test_encode_grouped_records_matches_groupby_apply(app, frame):
+    frame['day'] = ['Wed, 03 Jul 2024', 'Mon, 01 Jul 2024', 'Wed, 03 Jul 2024', 'Tue, 02 Jul 2024', 'Mon, 01 Jul 2024', 'Wed, 03 Jul 2024']
+    codes, labels = pd.factorize(frame['day'])
+    fields = ['location_dir_id', 'daily_volume', 'avg_bin_volume']
+
+    body = encode_grouped_records(labels, codes, {col: frame[col].to_numpy() for col in fields})
+
+    expected = frame.groupby('day').apply(lambda x: x[fields].to_dict(orient='records')).to_dict()
+    assert (body + '\n').encode() == jsonify_body(app, expected)
+
+
+def test_json_response_matches_jsonify_when_indenting(app, frame):
+    app.json.compact = False
+    records = frame.to_dict(orient='records')
+
+    with app.test_request_context():
+        response = json_response(encode_records({col: frame[col].to_numpy() for col in frame.columns}))
+        assert response.get_data() == jsonify(records).get_data()
+        assert response.mimetype == 'application/json'
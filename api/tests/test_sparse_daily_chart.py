@@ -0,0 +1,95 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import DATA_DIR
+from api.datasets import DailyChart
+from etl_pipelines.bicycle_counters.aggregations import build_daily_chart
+from modules.numpy_loader import NumpyLoader
+
+
+def chart_counts() -> pd.DataFrame:
+    """Daily counts with gaps, a location with a single day and two counters sharing a location."""
+    rows = []
+    for day in pd.date_range('2024-01-01', '2024-03-31'):
+        if day.day % 10 != 0:
+            rows.append(('Bloor', day, 100 + day.day))
+            rows.append(('Bloor', day, 1))
+        if day.month == 2:
+            rows.append(('Yonge', day, 50))
+    rows.append(('Queen', pd.Timestamp('2024-03-31'), 7))
+    return pd.DataFrame(rows, columns=['location_name', 'dt', 'daily_volume'])
+
+
+def dense_chart(df: pd.DataFrame) -> pd.DataFrame:
+    """The (date x location) pivot the chart used to be stored as."""
+    pivot = df.groupby(['dt', 'location_name'])['daily_volume'].sum().unstack(level='location_name')
+    pivot = pivot.reindex(pd.date_range(pivot.index.min(), pivot.index.max(), freq='D')).sort_index(axis=1)
+    pivot.index = pivot.index.strftime('%Y-%m-%d')
+    return pivot
+
+
+def save_chart(df: pd.DataFrame, npz_path) -> DailyChart:
+    arrays = build_daily_chart(df, time_col='dt', key_col='location_name', value_col='daily_volume')
+    NumpyLoader().arrays_to_npz(arrays, str(npz_path), overwrite=True)
+    return DailyChart.from_npz(npz_path)
+
+
+def decode(body: str) -> pd.DataFrame:
+    payload = json.loads(body)
+    frame = pd.DataFrame(payload['data'], columns=['date'] + payload['availableLocations']).set_index('date')
+    return frame.astype(float)
+
+
+@pytest.mark.parametrize('start, end', [
+    (None, None),
+    ('2024-01-05', '2024-01-25'),
+    ('2024-01-10', '2024-01-10'),
+    ('2024-01-30', '2024-02-02'),
+    ('2023-12-01', '2024-01-03'),
+    ('2024-03-30', '2024-05-01'),
+    ('2025-01-01', '2025-02-01'),
+    ('2024-02-10', '2024-02-01'),
+])
+@pytest.mark.parametrize('locations', [None, ['Yonge'], ['Queen', 'Bloor']])
+def test_windows_match_slicing_the_dense_chart(tmp_path, start, end, locations):
+    df = chart_counts()
+    chart = save_chart(df, tmp_path / "chart.npz")
+
+    result = decode(chart.encode(start, end, locations))
+
+    expected = dense_chart(df).loc[start:end, locations if locations is not None else slice(None)]
+    expected.columns.name = None
+    expected.index.name = 'date'
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+
+def test_spans_cover_runs_of_consecutive_days(tmp_path):
+    arrays = build_daily_chart(chart_counts(), time_col='dt', key_col='location_name', value_col='daily_volume')
+
+    assert arrays['keys'].tolist() == ['Bloor', 'Queen', 'Yonge']
+    assert np.diff(arrays['span_key']).min() >= 0
+    # Bloor skips the 10th, 20th and 30th (8 days, runs crossing month ends
+    # join up); Queen and Yonge have one run each
+    assert np.bincount(arrays['span_key']).tolist() == [9, 1, 1]
+    assert arrays['span_offsets'][-1] == len(arrays['volumes']) == (91 - 8) + 1 + 29
+
+
+def test_the_committed_chart_is_built_from_the_committed_daily_counts(tmp_path):
+    df = pd.read_parquet(DATA_DIR / "counts_daily.parquet", columns=['location_name', 'dt', 'daily_volume'])
+    df['location_name'] = df['location_name'].str.replace(' (retired)', '', regex=False)
+
+    built = build_daily_chart(df, time_col='dt', key_col='location_name', value_col='daily_volume')
+
+    with np.load(DATA_DIR / "counts_daily_chart.npz") as committed:
+        assert sorted(committed.files) == sorted(built)
+        for name, values in built.items():
+            np.testing.assert_array_equal(committed[name], values, err_msg=name)
+
+
+def test_an_empty_chart_encodes_no_days(tmp_path):
+    chart = save_chart(chart_counts().iloc[:0], tmp_path / "chart.npz")
+
+    assert chart.body() == '{"availableLocations":[],"data":[]}'
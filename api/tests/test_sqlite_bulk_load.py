@@ -0,0 +1,86 @@
+import asyncio
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from conftest import DATA_DIR
+from etl_pipelines.bicycle_counters.loader import BicycleCountersLoader
+
+DAILY_COUNTS = pd.read_parquet(DATA_DIR / "counts_daily.parquet").reset_index(drop=True)
+
+
+def load(db_path, bulk_load: bool, daily_counts: pd.DataFrame = DAILY_COUNTS):
+    loader = BicycleCountersLoader(bulk_load=bulk_load)
+    loader.DB_PATH = str(db_path)
+
+    async def get_daily_counts_frame():
+        return daily_counts
+    loader.get_daily_counts_frame = get_daily_counts_frame
+
+    asyncio.run(loader.load_daily_counts_into_sqlite())
+    loader.load_annual_counts_into_sqlite()
+
+
+def dump(db_path) -> dict:
+    with sqlite3.connect(db_path) as conn:
+        tables = {
+            table: conn.execute(f"SELECT * FROM {table} ORDER BY 1, 2").fetchall()
+            for table in ('daily_bicycle_counts', 'annual_bicycle_counts')
+        }
+        tables['indexes'] = sorted(conn.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'idx_%'").fetchall())
+    conn.close()
+    return tables
+
+
+def journal_mode(db_path) -> str:
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute("PRAGMA journal_mode").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_bulk_load_writes_the_same_tables_as_upserts(tmp_path):
+    load(tmp_path / "upsert" / "db.sqlite3", bulk_load=False)
+    load(tmp_path / "bulk" / "db.sqlite3", bulk_load=True)
+
+    bulk = dump(tmp_path / "bulk" / "db.sqlite3")
+    assert bulk == dump(tmp_path / "upsert" / "db.sqlite3")
+    assert len(bulk['daily_bicycle_counts']) == len(DAILY_COUNTS)
+    assert len(bulk['indexes']) == 6
+
+
+@pytest.mark.parametrize('bulk_load', [False, True])
+def test_the_database_is_left_in_rollback_journal_mode(tmp_path, bulk_load):
+    db_path = tmp_path / "db.sqlite3"
+
+    load(db_path, bulk_load=bulk_load)
+
+    assert journal_mode(db_path) == 'delete'
+    assert not (tmp_path / "db.sqlite3-wal").exists()
+    assert not (tmp_path / "db.sqlite3-shm").exists()
+
+
+def test_bulk_load_replaces_rows_that_upserts_keep(tmp_path):
+    db_path = tmp_path / "db.sqlite3"
+    load(db_path, bulk_load=False)
+    newer = DAILY_COUNTS.iloc[:100]
+
+    load(db_path, bulk_load=False, daily_counts=newer)
+    assert len(dump(db_path)['daily_bicycle_counts']) == len(DAILY_COUNTS)
+
+    load(db_path, bulk_load=True, daily_counts=newer)
+    assert len(dump(db_path)['daily_bicycle_counts']) == 100
+
+
+def test_a_failed_load_is_rolled_back(tmp_path):
+    db_path = tmp_path / "db.sqlite3"
+    load(db_path, bulk_load=True)
+    broken = DAILY_COUNTS.iloc[:10].assign(location_dir_id=None)
+
+    with pytest.raises(sqlite3.IntegrityError):
+        load(db_path, bulk_load=True, daily_counts=broken)
+
+    assert len(dump(db_path)['daily_bicycle_counts']) == len(DAILY_COUNTS)
+    assert journal_mode(db_path) == 'delete'
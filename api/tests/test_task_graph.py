@@ -0,0 +1,96 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from etl_pipelines.bicycle_counters import loader as loader_module
+from etl_pipelines.bicycle_counters.loader import BicycleCountersLoader
+from modules.task_graph import TaskGraph
+
+
+def step(events: list, name: str, delay: float = 0.01, result=None):
+    async def run():
+        events.append(('start', name))
+        await asyncio.sleep(delay)
+        events.append(('end', name))
+        return result if result is not None else name
+    return run
+
+
+def test_steps_start_after_their_dependencies_and_share_results():
+    events = []
+    graph = TaskGraph()
+    graph.add('download_a', step(events, 'download_a', 0.03))
+    graph.add('download_b', step(events, 'download_b', 0.01))
+    graph.add('transform', step(events, 'transform'), depends_on=['download_a', 'download_b'])
+    graph.add('export', step(events, 'export'), depends_on=['transform'])
+
+    results = asyncio.run(graph.run())
+
+    assert results == {name: name for name in ('download_a', 'download_b', 'transform', 'export')}
+    assert set(graph.timings) == set(results)
+    assert events.index(('start', 'transform')) > events.index(('end', 'download_a'))
+    assert events.index(('start', 'export')) > events.index(('end', 'transform'))
+
+
+def test_independent_steps_run_concurrently():
+    events = []
+    graph = TaskGraph()
+    for name in ('a', 'b', 'c'):
+        graph.add(name, step(events, name))
+
+    asyncio.run(graph.run())
+
+    assert [event for event, _ in events] == ['start'] * 3 + ['end'] * 3
+
+
+def test_a_failing_step_cancels_the_running_ones():
+    events = []
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("download failed")
+
+    graph = TaskGraph()
+    graph.add('slow', step(events, 'slow', delay=10))
+    graph.add('broken', fail)
+    graph.add('after_broken', step(events, 'after_broken'), depends_on=['broken'])
+
+    with pytest.raises(RuntimeError, match="download failed"):
+        asyncio.run(graph.run())
+
+    assert events == [('start', 'slow')]
+    assert 'slow' not in graph.results
+
+
+def test_unknown_dependencies_and_duplicate_steps_are_rejected():
+    graph = TaskGraph()
+    graph.add('a', step([], 'a'))
+
+    # Dependencies must be added first, so the graph can't contain a cycle
+    with pytest.raises(ValueError, match="unknown step 'b'"):
+        graph.add('c', step([], 'c'), depends_on=['b'])
+    with pytest.raises(ValueError, match="already added"):
+        graph.add('a', step([], 'a'), depends_on=['a'])
+
+
+def test_executor_steps_merge_their_changed_datasets(monkeypatch):
+    calls = []
+
+    def fake_run_loader_step(step_name, options, changed_since):
+        calls.append((step_name, options, changed_since))
+        return {**changed_since, 'counts_daily_chart': None}
+    monkeypatch.setattr(loader_module, 'run_loader_step', fake_run_loader_step)
+
+    loader = BicycleCountersLoader(incremental=True, max_concurrency=2)
+    loader.changed_since = {'counts_daily': '2024-07-01'}
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        asyncio.run(loader.run_step_in_executor(executor, 'counts_daily_chart_to_npz'))
+
+    assert calls == [(
+        'counts_daily_chart_to_npz',
+        {'incremental': True, 'bulk_load': False, 'max_concurrency': 2},
+        {'counts_daily': '2024-07-01'},
+    )]
+    assert loader.changed_since == {'counts_daily': '2024-07-01', 'counts_daily_chart': None}
@@ -0,0 +1,93 @@
+import pandas as pd
+import pytest
+
+import baseline_routes
+from conftest import make_counts_15m
+from api.datasets import TimeOfDayProfile
+from etl_pipelines.bicycle_counters.aggregations import build_time_of_day_profile
+from modules.numpy_loader import NumpyLoader
+
+RANGES = [
+    ('2024-07-01', '2024-07-03'),
+    ('2024-07-02', '2024-07-02'),
+    ('2024-07-01 06:07', '2024-07-03 13:14'),
+    ('2024-07-01 06:00', '2024-07-01 06:00'),
+    ('2024-06-30 23:59', '2024-07-01 00:01'),
+    ('2024-06-01', '2024-12-31'),
+    ('2024-07-03', '2024-07-01'),
+    ('1990-01-01', '1990-02-01'),
+]
+
+QUERIES = [f'start={start}&end={end}'.replace(' ', 'T') for start, end in RANGES] + ['start=bad&end=2024-07-01', 'end=2024-07-01']
+
+
+def save_profile(df, key_cols, value_col, npz_path) -> TimeOfDayProfile:
+    arrays = build_time_of_day_profile(df, time_col='datetime_bin', key_cols=key_cols, value_col=value_col)
+    NumpyLoader().arrays_to_npz(arrays, str(npz_path), overwrite=True)
+    return TimeOfDayProfile.from_npz(npz_path)
+
+
+@pytest.mark.parametrize('start, end', RANGES)
+def test_average_matches_a_groupby_mean(tmp_path, start, end):
+    df = make_counts_15m([3, 4, 17], '2024-06-28', 8)
+    profile = save_profile(df, ['location_dir_id'], 'bin_volume', tmp_path / "profile.npz")
+
+    result = profile.average(pd.Timestamp(start), pd.Timestamp(end), value_name='avg_bin_volume')
+
+    in_range = df[(df['datetime_bin'] >= pd.Timestamp(start)) & (df['datetime_bin'] <= pd.Timestamp(end))].copy()
+    in_range['time_bin'] = in_range['datetime_bin'].dt.strftime('%H:%M:%S')
+    expected = (
+        in_range
+        .groupby(['location_dir_id', 'time_bin'], as_index=False)
+        .agg(avg_bin_volume=('bin_volume', 'mean'))
+    )
+    assert len(result) == len(expected)
+    if len(expected):
+        pd.testing.assert_frame_equal(result.astype({'location_dir_id': object}), expected)
+
+
+def test_rejects_times_off_the_15_minute_grid():
+    df = make_counts_15m([3], '2024-06-28', 1)
+    df.loc[5, 'datetime_bin'] += pd.Timedelta(minutes=1)
+
+    with pytest.raises(ValueError):
+        build_time_of_day_profile(df, time_col='datetime_bin', key_cols=['location_dir_id'], value_col='bin_volume')
+
+
+@pytest.mark.parametrize('with_profile', [False, True], ids=['raw rows', 'profile'])
+@pytest.mark.parametrize('query', QUERIES)
+def test_fifteen_min_counts_match_baseline(app, client, use_dataset, counts_15m_dir, tmp_path, with_profile, query):
+    counts_file = counts_15m_dir / "counts_15m.parquet"
+    use_dataset('counts_15m', counts_file)
+    if with_profile:
+        save_profile(pd.read_parquet(counts_file), ['location_dir_id'], 'bin_volume', tmp_path / "profile.npz")
+        use_dataset('counts_15m_profile', tmp_path / "profile.npz")
+
+    path = f'/fifteen-min-counts-in-date-range?{query}'
+    expected = baseline_routes.response(app, path, baseline_routes.fifteen_min_counts_in_date_range, counts_file)
+
+    response = client.get('/api/v1' + path)
+
+    assert (response.status_code, response.get_data()) == expected
+
+
+@pytest.mark.parametrize('with_profile', [False, True], ids=['raw rows', 'profile'])
+@pytest.mark.parametrize('query', QUERIES)
+def test_fifteen_min_counts_by_location_name_match_baseline(app, client, use_dataset, counts_15m_dir, tmp_path, with_profile, query):
+    counts_file = counts_15m_dir / "counts_15m_by_location_name.parquet"
+    use_dataset('counts_15m_by_location_name', counts_file)
+    if with_profile:
+        save_profile(
+            pd.read_parquet(counts_file), ['name', 'location_dir_ids', 'coordinates'], 'total_bin_volume',
+            tmp_path / "profile.npz"
+        )
+        use_dataset('counts_15m_by_location_name_profile', tmp_path / "profile.npz")
+
+    path = f'/fifteen-min-counts-by-location-name-in-date-range?{query}'
+    expected = baseline_routes.response(
+        app, path, baseline_routes.fifteen_min_counts_by_location_name_in_date_range, counts_file
+    )
+
+    response = client.get('/api/v1' + path)
+
+    assert (response.status_code, response.get_data()) == expected
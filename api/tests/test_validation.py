@@ -0,0 +1,108 @@
+from datetime import datetime
+from typing import Optional
+
+import pandas as pd
+import pytest
+from pydantic import BaseModel, ValidationError
+
+from etl_pipelines.bicycle_counters.models import DailyCount, FifteenMinCount
+from etl_pipelines.bicycle_counters.validation import InvalidRecordsError, validate_records
+
+
+class Reading(BaseModel):
+    sensor: str
+    value: Optional[int] = None
+    ratio: Optional[float] = None
+    note: Optional[str] = None
+
+
+FIFTEEN_MIN_RECORDS = [
+    {"_id": 1, "location_dir_id": "3", "datetime_bin": "2024-07-01T00:00:00", "bin_volume": 12},
+    {"_id": 2.0, "location_dir_id": "3", "datetime_bin": "2024-07-01T00:15:00", "bin_volume": "7"},
+    {"record_id": 3, "location_dir_id": "17", "datetime_bin": "2024-07-01T00:30:00", "bin_volume": " 8.0 ", "extra": [1]},
+    {"_id": "4", "location_dir_id": "17", "datetime_bin": "2024-07-01T00:45:00", "bin_volume": True},
+]
+
+READINGS = [
+    {"sensor": "a", "value": 1, "ratio": 0.5, "note": "ok"},
+    {"sensor": "b", "value": None, "ratio": "1.5"},
+    {"sensor": "c", "value": "-3", "ratio": 2},
+    {"sensor": "d"},
+]
+
+
+def dump_each(records, model) -> pd.DataFrame:
+    return pd.DataFrame([model.model_validate(record).model_dump() for record in records])
+
+
+def values(column: pd.Series) -> list:
+    """The column's values with every kind of null as None."""
+    return column.astype(object).where(column.notna(), None).tolist()
+
+
+def invalid_rows(records, model) -> set:
+    rows = set()
+    for row, record in enumerate(records):
+        try:
+            model.model_validate(record)
+        except ValidationError:
+            rows.add(row)
+    return rows
+
+
+@pytest.mark.parametrize('records, model', [(FIFTEEN_MIN_RECORDS, FifteenMinCount), (READINGS, Reading)])
+def test_valid_records_match_model_dump(records, model):
+    result = validate_records(records, model)
+    expected = dump_each(records, model)
+
+    assert list(result.columns) == list(expected.columns)
+    for column in expected.columns:
+        assert values(result[column]) == values(expected[column]), column
+
+
+def test_daily_counts_match_model_dump():
+    records = [
+        {"_id": i, "location_dir_id": str(i % 3), "location_name": "Bloor St É", "direction": "EB",
+         "linear_name_full": "Bloor St E", "side_street": "Castle Frank Rd",
+         "dt": f"2024-07-{i + 1:02d}", "daily_volume": i * 100}
+        for i in range(5)
+    ]
+
+    result = validate_records(records, DailyCount)
+
+    assert result.to_dict(orient='records') == [
+        {**row, 'dt': pd.Timestamp(row['dt'])} for row in dump_each(records, DailyCount).to_dict(orient='records')
+    ]
+    assert result['dt'].dtype == 'datetime64[ns]'
+    assert result['daily_volume'].dtype == 'int64'
+
+
+INVALID_RECORDS = [
+    {"_id": 1, "location_dir_id": "3", "datetime_bin": "2024-07-01T00:00:00", "bin_volume": 1},
+    {"_id": 2, "location_dir_id": "3", "datetime_bin": "2024-07-01T00:15:00", "bin_volume": 1.5},
+    {"_id": 3, "location_dir_id": 3, "datetime_bin": "2024-07-01T00:30:00", "bin_volume": 1},
+    {"_id": 4, "location_dir_id": "3", "datetime_bin": "yesterday", "bin_volume": 1},
+    {"_id": 5, "location_dir_id": "3", "datetime_bin": "2024-07-01T01:00:00"},
+    {"_id": "six", "location_dir_id": None, "datetime_bin": "2024-07-01T01:15:00", "bin_volume": "1e3"},
+    {"_id": 7, "location_dir_id": "3", "datetime_bin": "2024-07-01T01:30:00", "bin_volume": "2"},
+]
+
+
+def test_invalid_records_are_the_ones_pydantic_rejects():
+    with pytest.raises(InvalidRecordsError) as error:
+        validate_records(INVALID_RECORDS, FifteenMinCount)
+
+    errors = error.value.errors
+    assert set(errors['row']) == invalid_rows(INVALID_RECORDS, FifteenMinCount)
+    assert set(zip(errors['row'], errors['field'])) == {
+        (1, 'bin_volume'), (2, 'location_dir_id'), (3, 'datetime_bin'), (4, 'bin_volume'),
+        (5, 'record_id'), (5, 'location_dir_id'), (5, 'bin_volume'),
+    }
+    assert str(error.value).startswith("5 of 7 FifteenMinCount records are invalid:")
+
+
+def test_no_records_give_an_empty_frame_with_the_model_columns():
+    result = validate_records([], FifteenMinCount)
+
+    assert list(result.columns) == ['record_id', 'location_dir_id', 'datetime_bin', 'bin_volume']
+    assert len(result) == 0